@@ -0,0 +1 @@
+"""Benchmarks module for offline, reproducible performance measurements."""
@@ -0,0 +1,142 @@
+"""Correctness checks for the clusterer's assignments on synthetic data.
+
+Run from the ml directory:
+
+    python -m benchmarks.clustering_checks
+
+Every check fits on overlapping Gaussian blobs with a known answer and exits with
+status 1 when one of them fails.
+"""
+
+import argparse
+import logging
+import sys
+from typing import Any, Callable, Dict
+import numpy as np
+from sklearn.datasets import make_blobs
+from sklearn.mixture import GaussianMixture
+
+from clustering.clusterer import SentenceClusterer
+
+logger = logging.getLogger(__name__)
+
+
+def _overlapping_blobs(seed: int = 0) -> np.ndarray:
+    """Four blobs whose spread is large compared to the distance between their centers."""
+    data, _ = make_blobs(
+        n_samples=4000,
+        n_features=64,
+        centers=4,
+        cluster_std=6.0,
+        center_box=(-4.0, 4.0),
+        random_state=seed
+    )
+    return data
+
+
+def check_partitioned_posteriors(seed: int = 0, tolerance: float = 0.05) -> Dict[str, Any]:
+    """
+    Compare the centroid posteriors of a partitioned fit with a spherical GMM.
+    
+    Both treat the clusters as isotropic Gaussians, so their mean top-1 probabilities
+    on the same data should be close.
+    
+    Args:
+        seed: Random seed of the data
+        tolerance: Largest accepted difference of the mean top-1 probabilities
+    
+    Returns:
+        Check result with both mean top-1 probabilities and a 'passed' flag
+    """
+    data = _overlapping_blobs(seed)
+    clusterer = SentenceClusterer(method='gmm', n_components=4, n_partitions=2, n_jobs=2)
+    clusterer.fit_predict(data)
+    _, top_probs = clusterer.predict_topk(data, k=1)
+    
+    reference = GaussianMixture(n_components=4, covariance_type='spherical', random_state=seed)
+    reference.fit(data)
+    
+    partitioned_top1 = float(top_probs[:, 0].mean())
+    spherical_top1 = float(reference.predict_proba(data).max(axis=1).mean())
+    return {
+        'partitioned_top1': partitioned_top1,
+        'spherical_gmm_top1': spherical_top1,
+        'passed': abs(partitioned_top1 - spherical_top1) <= tolerance,
+    }
+
+
+def check_training_drift(seed: int = 0) -> Dict[str, Any]:
+    """
+    Check that a partitioned HDBSCAN fit reports no drift on its own training data.
+    
+    The blobs come with uniform background points, so the fit has noise that
+    assign() has to reproduce.
+    
+    Args:
+        seed: Random seed of the data
+        
+    Returns:
+        Check result with the drift statistics, fit/assign label agreement and a 'passed' flag
+    """
+    blobs, _ = make_blobs(n_samples=3000, n_features=16, centers=8, cluster_std=2.5, random_state=seed)
+    background = np.random.RandomState(seed).uniform(-12.0, 12.0, size=(300, 16))
+    data = np.vstack([blobs, background])
+    clusterer = SentenceClusterer(method='hdbscan', n_partitions=4, n_jobs=2)
+    fit_labels = clusterer.fit_predict(data)
+    assigned = clusterer.assign(data)
+    report = clusterer.drift_report(data, assigned)
+    return {
+        'fit_noise_rate': float(np.mean(fit_labels == -1)),
+        'assign_noise_rate': report['noise_rate'],
+        'label_agreement': float(np.mean(fit_labels == assigned)),
+        'distance_ratio': report['distance_ratio'],
+        'proportion_shift': report['proportion_shift'],
+        'passed': not report['refit_recommended'],
+    }
+
+
+CHECKS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    'partitioned_posteriors': check_partitioned_posteriors,
+    'training_drift': check_training_drift,
+}
+
+
+def main():
+    """Main entry point."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    
+    parser = argparse.ArgumentParser(description="Correctness checks for SentenceClusterer")
+    parser.add_argument(
+        '--checks',
+        default=','.join(CHECKS),
+        help=f"Comma-separated checks out of {', '.join(CHECKS)} (default: all)"
+    )
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the data (default: 0)')
+    args = parser.parse_args()
+    
+    names = [name.strip() for name in args.checks.split(',') if name.strip()]
+    unknown = [name for name in names if name not in CHECKS]
+    if unknown:
+        parser.error(f"Unknown checks: {', '.join(unknown)}")
+    
+    failed = []
+    for name in names:
+        result = CHECKS[name](seed=args.seed)
+        details = ", ".join(f"{key}={value}" for key, value in result.items() if key != 'passed')
+        logger.info(f"{name:<24} {'ok' if result['passed'] else 'FAILED'}  {details}")
+        if not result['passed']:
+            failed.append(name)
+    
+    if failed:
+        logger.error(f"Failed checks: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
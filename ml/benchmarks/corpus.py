@@ -0,0 +1,166 @@
+"""Deterministic synthetic sentence corpora and PDFs for benchmarks."""
+
+import logging
+import textwrap
+from pathlib import Path
+from typing import Dict, List
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Topic vocabularies (nouns, verbs, closing phrases); only articles are shared
+# between topics, so sentences of the same topic form clusters
+TOPICS = {
+    'identity': (
+        ['identity', 'community', 'visibility', 'belonging', 'self-disclosure', 'recognition'],
+        ['shapes', 'reinforces', 'challenges', 'mediates', 'reflects'],
+        ['within peer networks', 'during coming out', 'across generations', 'in queer spaces'],
+    ),
+    'health': (
+        ['wellbeing', 'stress', 'access', 'outcome', 'provider', 'screening'],
+        ['predicts', 'reduces', 'improves', 'affects', 'limits'],
+        ['in primary care', 'among clinic patients', 'after diagnosis', 'for mental health services'],
+    ),
+    'education': (
+        ['curriculum', 'classroom', 'student', 'teacher', 'policy', 'school climate'],
+        ['supports', 'excludes', 'promotes', 'includes', 'restricts'],
+        ['in secondary schools', 'during lessons', 'across campuses', 'for first-year pupils'],
+    ),
+    'workplace': (
+        ['employer', 'hiring', 'wage', 'promotion', 'workplace', 'manager'],
+        ['discourages', 'raises', 'lowers', 'delays', 'protects'],
+        ['in large firms', 'during job interviews', 'across industries', 'for contract workers'],
+    ),
+    'language': (
+        ['pronoun', 'term', 'discourse', 'framing', 'label', 'narrative'],
+        ['encodes', 'signals', 'obscures', 'normalizes', 'conveys'],
+        ['in everyday speech', 'within written corpora', 'across dialects', 'in translated texts'],
+    ),
+    'methods': (
+        ['survey', 'sample', 'estimate', 'regression', 'cohort', 'measure'],
+        ['captures', 'underestimates', 'controls', 'identifies', 'explains'],
+        ['with weighted data', 'using panel waves', 'under missingness', 'via bootstrap intervals'],
+    ),
+    'law': (
+        ['legislation', 'court', 'protection', 'ruling', 'statute', 'right'],
+        ['guarantees', 'overturns', 'extends', 'narrows', 'recognizes'],
+        ['under federal law', 'in appellate decisions', 'across jurisdictions', 'after the amendment'],
+    ),
+    'media': (
+        ['coverage', 'platform', 'audience', 'representation', 'post', 'campaign'],
+        ['amplifies', 'distorts', 'boosts', 'frames', 'targets'],
+        ['on social networks', 'in news headlines', 'during broadcasts', 'across streaming services'],
+    ),
+}
+
+
+def synthetic_sentences(n: int, seed: int = 0) -> List[Dict[str, str]]:
+    """
+    Generate academic-style English sentences drawn from a fixed set of topics.
+    
+    Args:
+        n: Number of sentences
+        seed: Random seed; the same seed always yields the same corpus
+    
+    Returns:
+        Sentence dictionaries with 'sentence_text' and 'topic'
+    """
+    rng = np.random.RandomState(seed)
+    topic_names = sorted(TOPICS)
+    topics = rng.randint(len(topic_names), size=n)
+    choices = rng.randint(1 << 30, size=(n, 4))
+    
+    sentences = []
+    for topic_index, (a, b, c, d) in zip(topics, choices):
+        topic = topic_names[topic_index]
+        nouns, verbs, phrases = TOPICS[topic]
+        text = (
+            f"The {nouns[a % len(nouns)]} {verbs[b % len(verbs)]} the "
+            f"{nouns[c % len(nouns)]} {phrases[d % len(phrases)]}."
+        )
+        sentences.append({'sentence_text': text, 'topic': topic})
+    return sentences
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_pdf(path: Path, text: str, lines_per_page: int = 60, width: int = 95):
+    """
+    Write text to a minimal single-font PDF readable by pdfplumber.
+    
+    Args:
+        path: Output PDF path
+        text: Text to lay out; it is wrapped at ``width`` characters
+        lines_per_page: Lines per page
+        width: Maximum characters per line
+    """
+    lines = textwrap.wrap(text, width=width) or ['']
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+    
+    # Objects: 1 catalog, 2 page tree, 3 font, then a page and a content stream per page
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>", 3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    page_ids = []
+    for index, page_lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * index, 5 + 2 * index
+        page_ids.append(page_id)
+        body = "\n".join(f"({_pdf_escape(line)}) Tj T*" for line in page_lines)
+        stream = f"BT /F1 10 Tf 12 TL 50 770 Td\n{body}\nET".encode('latin-1', errors='replace')
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        objects[page_id] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[2] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+    
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = len(output)
+        output += b"%d 0 obj\n%s\nendobj\n" % (object_id, objects[object_id])
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for object_id in sorted(objects):
+        output += b"%010d 00000 n \n" % offsets[object_id]
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    
+    Path(path).write_bytes(bytes(output))
+
+
+def write_synthetic_pdfs(
+    pdf_dir: Path,
+    n_pdfs: int,
+    sentences_per_pdf: int = 200,
+    seed: int = 0
+) -> List[Dict[str, str]]:
+    """
+    Write a deterministic set of synthetic PDFs.
+    
+    Args:
+        pdf_dir: Directory for the PDFs
+        n_pdfs: Number of PDFs
+        sentences_per_pdf: Sentences per PDF
+        seed: Random seed of the first PDF; PDF i uses seed + i
+    
+    Returns:
+        PDF metadata in the format returned by PDFScraper.scrape()
+    """
+    pdf_dir = Path(pdf_dir)
+    pdf_dir.mkdir(parents=True, exist_ok=True)
+    
+    pdf_metadata = []
+    for index in range(n_pdfs):
+        path = pdf_dir / f"synthetic_{seed + index:06d}.pdf"
+        if not path.exists():
+            sentences = synthetic_sentences(sentences_per_pdf, seed=seed + index)
+            write_pdf(path, " ".join(sentence['sentence_text'] for sentence in sentences))
+        pdf_metadata.append({
+            'url': f"synthetic://{path.name}",
+            'local_path': str(path),
+            'download_timestamp': 0.0,
+        })
+    
+    logger.info(f"Prepared {n_pdfs} synthetic PDFs in {pdf_dir}")
+    return pdf_metadata
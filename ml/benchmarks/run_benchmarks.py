@@ -0,0 +1,422 @@
+"""Offline benchmark suite for the pipeline components and the end-to-end pipeline.
+
+Run from the ml directory:
+
+    python -m benchmarks.run_benchmarks --scales 1k,100k --compare latest
+
+Results are stored as JSON in data/benchmarks/ and can be compared run against run.
+"""
+
+import argparse
+import gc
+import json
+import logging
+import math
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
+from sklearn.metrics import adjusted_rand_score
+
+from benchmarks.corpus import TOPICS, synthetic_sentences, write_synthetic_pdfs
+from benchmarks.stub_encoder import HashingEncoder
+from clustering.clusterer import SentenceClusterer
+from clustering.coreset import label_agreement
+from data_collection.text_extractor import TextExtractor
+from preprocessing.sentence_splitter import SentenceSplitter
+from telemetry.profiler import RunProfiler
+
+logger = logging.getLogger(__name__)
+
+SCALES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+COMPONENTS = ['extract', 'split', 'encode', 'cluster', 'coreset', 'pipeline']
+
+# Largest corpus clustered with one global fit; larger ones use partitioned clustering
+MAX_GLOBAL_FIT = 20_000
+
+
+class SyntheticPDFSource:
+    """Stands in for PDFScraper and serves pre-generated synthetic PDFs."""
+    
+    def __init__(self, pdf_metadata: List[Dict[str, Any]]):
+        """
+        Initialize the source.
+        
+        Args:
+            pdf_metadata: PDF metadata as returned by write_synthetic_pdfs()
+        """
+        self.pdf_metadata = pdf_metadata
+    
+    def iter_scrape(self, target_url: str) -> Iterator[Dict[str, Any]]:
+        """Yield the metadata of every synthetic PDF; the URL is ignored."""
+        yield from self.pdf_metadata
+    
+    def scrape(self, target_url: str) -> List[Dict[str, Any]]:
+        """Return the metadata of every synthetic PDF; the URL is ignored."""
+        return list(self.pdf_metadata)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _make_clusterer(n_sentences: int) -> SentenceClusterer:
+    """Clusterer with a fixed configuration, so timings do not depend on model selection."""
+    n_partitions = None
+    if n_sentences > MAX_GLOBAL_FIT:
+        n_partitions = math.ceil(n_sentences / (MAX_GLOBAL_FIT // 2))
+    return SentenceClusterer(
+        method='gmm',
+        n_components=len(TOPICS),
+        metric='cosine',
+        n_partitions=n_partitions,
+        low_memory=True
+    )
+
+
+def _make_coreset_clusterer(n_sentences: int) -> SentenceClusterer:
+    """Single global fit on a coreset of at most MAX_GLOBAL_FIT sentences, instead of partitions."""
+    return SentenceClusterer(
+        method='gmm',
+        n_components=len(TOPICS),
+        metric='cosine',
+        low_memory=True,
+        coreset_size=min(MAX_GLOBAL_FIT, max(1, n_sentences // 5))
+    )
+
+
+def run_suite(
+    scales: List[str],
+    components: List[str],
+    work_dir: Path,
+    seed: int = 0,
+    repeat: int = 3,
+    max_pdfs: int = 20,
+    sentences_per_pdf: int = 200,
+    encoder: Optional[Any] = None
+) -> Dict[str, Any]:
+    """
+    Run the benchmarks.
+    
+    Args:
+        scales: Corpus scales to run ('1k', '100k', '1m')
+        components: Components to time (see COMPONENTS)
+        work_dir: Directory for synthetic PDFs and pipeline outputs
+        seed: Seed of the synthetic corpus
+        repeat: Runs per benchmark; the best run is used for comparisons
+        max_pdfs: Maximum number of synthetic PDFs for the PDF-based benchmarks
+            (extract, pipeline); they are capped because PDF parsing dominates
+        sentences_per_pdf: Sentences written to each synthetic PDF
+        encoder: Encoder to benchmark (defaults to the deterministic HashingEncoder)
+    
+    Returns:
+        Results dictionary with one entry per '<component>@<scale>' benchmark
+    """
+    # Imported here so that importing the benchmark module does not configure logging
+    from pipeline import DataPipeline
+    
+    encoder = encoder or HashingEncoder()
+    extractor = TextExtractor()
+    splitter = SentenceSplitter(min_tokens=5)
+    benchmarks: Dict[str, Dict[str, Any]] = {}
+    profiler = RunProfiler('benchmarks')
+    
+    def measure(name: str, func, items: int) -> Dict[str, Any]:
+        runs = []
+        for _ in range(repeat):
+            gc.collect()
+            with profiler.stage(name) as record:
+                extra = func() or {}
+                record.add_items(items)
+            runs.append(record)
+        best = min(runs, key=lambda record: record.wall_seconds)
+        result = {
+            'items': items,
+            'wall_seconds': [record.wall_seconds for record in runs],
+            'best_seconds': best.wall_seconds,
+            'cpu_seconds': best.cpu_seconds + best.child_cpu_seconds,
+            'items_per_second': items / best.wall_seconds if best.wall_seconds > 0 else None,
+            'peak_rss_bytes': max(record.peak_rss_bytes for record in runs),
+            **extra,
+        }
+        benchmarks[name] = result
+        logger.info(
+            f"{name}: best {result['best_seconds']:.3f}s of {repeat}, "
+            f"{result['items_per_second'] or 0:.0f} items/s"
+        )
+        return result
+    
+    with profiler:
+        for scale in scales:
+            n_sentences = SCALES[scale]
+            n_pdfs = min(max_pdfs, math.ceil(n_sentences / sentences_per_pdf))
+            pdf_metadata = write_synthetic_pdfs(
+                work_dir / 'pdfs', n_pdfs, sentences_per_pdf=sentences_per_pdf, seed=seed
+            )
+            
+            corpus = synthetic_sentences(n_sentences, seed=seed)
+            texts = [sentence['sentence_text'] for sentence in corpus]
+            topics = [sentence['topic'] for sentence in corpus]
+            del corpus
+            
+            if 'extract' in components:
+                def extract() -> Dict[str, Any]:
+                    failed = sum(1 for pdf in pdf_metadata if not extractor.extract_text(pdf['local_path']))
+                    return {'failed_pdfs': failed}
+                
+                measure(f"extract@{scale}", extract, items=n_pdfs)
+            
+            if 'split' in components:
+                # Split per document, as the pipeline does
+                documents = [
+                    " ".join(texts[start:start + sentences_per_pdf])
+                    for start in range(0, n_sentences, sentences_per_pdf)
+                ]
+                
+                def split() -> Dict[str, Any]:
+                    return {'sentences_out': sum(len(splitter.split(document)) for document in documents)}
+                
+                measure(f"split@{scale}", split, items=n_sentences)
+                del documents
+            
+            if 'encode' in components:
+                def encode() -> Dict[str, Any]:
+                    encoder.encode(texts, show_progress_bar=False)
+                    return {'encoder': getattr(encoder, 'model_name', type(encoder).__name__)}
+                
+                measure(f"encode@{scale}", encode, items=n_sentences)
+            
+            full_labels = None
+            if 'cluster' in components or 'coreset' in components:
+                embeddings = encoder.encode(texts, show_progress_bar=False)
+            
+            if 'cluster' in components:
+                def cluster() -> Dict[str, Any]:
+                    nonlocal full_labels
+                    labels = full_labels = _make_clusterer(n_sentences).fit_predict(embeddings)
+                    return {
+                        'clusters': int(len(set(labels.tolist())) - (1 if -1 in labels else 0)),
+                        'adjusted_rand_index': float(adjusted_rand_score(topics, labels)),
+                    }
+                
+                measure(f"cluster@{scale}", cluster, items=n_sentences)
+            
+            if 'coreset' in components:
+                def coreset() -> Dict[str, Any]:
+                    clusterer = _make_coreset_clusterer(n_sentences)
+                    labels = clusterer.fit_predict(embeddings)
+                    result = {
+                        'clusters': int(len(set(labels.tolist())) - (1 if -1 in labels else 0)),
+                        'adjusted_rand_index': float(adjusted_rand_score(topics, labels)),
+                        'coreset': clusterer.coreset_report_,
+                    }
+                    if full_labels is not None:
+                        # Agreement with the full fit of the cluster benchmark
+                        result['agreement_with_full_fit'] = label_agreement(labels, full_labels)
+                    return result
+                
+                measure(f"coreset@{scale}", coreset, items=n_sentences)
+            
+            if 'cluster' in components or 'coreset' in components:
+                del embeddings
+            
+            if 'pipeline' in components:
+                output_dir = work_dir / f"pipeline_{scale}"
+                
+                def pipeline() -> Dict[str, Any]:
+                    shutil.rmtree(output_dir, ignore_errors=True)
+                    data_pipeline = DataPipeline(
+                        target_url='synthetic://',
+                        output_dir=str(output_dir),
+                        pdf_dir=str(work_dir / 'pdfs'),
+                        encoder=encoder
+                    )
+                    data_pipeline.pdf_scraper = SyntheticPDFSource(pdf_metadata)
+                    data_pipeline.clusterer = _make_clusterer(n_pdfs * sentences_per_pdf)
+                    data_pipeline.run()
+                    report = json.loads(data_pipeline.report_path.read_text())
+                    return {'stages': {stage['name']: stage.get('wall_seconds') for stage in report['stages']}}
+                
+                measure(f"pipeline@{scale}", pipeline, items=n_pdfs)
+    
+    report = profiler.report()
+    return {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'git_commit': _git_commit(),
+        'system': report['system'],
+        'config': {
+            'scales': scales,
+            'components': components,
+            'seed': seed,
+            'repeat': repeat,
+            'max_pdfs': max_pdfs,
+            'sentences_per_pdf': sentences_per_pdf,
+            'numpy': np.__version__,
+        },
+        'benchmarks': benchmarks,
+    }
+
+
+def compare_results(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = 1.2
+) -> List[Dict[str, Any]]:
+    """
+    Compare the best times of two benchmark runs.
+    
+    Args:
+        current: Results of this run
+        baseline: Results of an earlier run
+        threshold: A benchmark regressed if its best time grew by more than this factor
+    
+    Returns:
+        One entry per benchmark present in both runs, with the time 'ratio'
+        (current / baseline) and a 'regressed' flag
+    """
+    comparisons = []
+    for name, result in current['benchmarks'].items():
+        previous = baseline['benchmarks'].get(name)
+        if previous is None or not previous['best_seconds']:
+            continue
+        ratio = result['best_seconds'] / previous['best_seconds']
+        comparisons.append({
+            'benchmark': name,
+            'baseline_seconds': previous['best_seconds'],
+            'current_seconds': result['best_seconds'],
+            'ratio': ratio,
+            'regressed': ratio > threshold,
+        })
+    return comparisons
+
+
+def _latest_results(results_dir: Path) -> Optional[Path]:
+    candidates = sorted(results_dir.glob('results_*.json'))
+    return candidates[-1] if candidates else None
+
+
+def main():
+    """Main entry point."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    
+    parser = argparse.ArgumentParser(
+        description="Offline benchmarks for the data collection and weak labeling pipeline"
+    )
+    parser.add_argument(
+        '--scales',
+        default='1k,100k',
+        help=f"Comma-separated corpus scales out of {', '.join(SCALES)} (default: 1k,100k)"
+    )
+    parser.add_argument(
+        '--components',
+        default=','.join(COMPONENTS),
+        help=f"Comma-separated components out of {', '.join(COMPONENTS)} (default: all)"
+    )
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per benchmark (default: 3)')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic corpus seed (default: 0)')
+    parser.add_argument(
+        '--max-pdfs',
+        type=int,
+        default=20,
+        help='Maximum synthetic PDFs for the extract and pipeline benchmarks (default: 20)'
+    )
+    parser.add_argument(
+        '--real-encoder',
+        action='store_true',
+        help='Benchmark SentenceEncoder instead of the hashing stub (downloads the model)'
+    )
+    parser.add_argument(
+        '--results-dir',
+        default='data/benchmarks',
+        help='Directory for result files (default: data/benchmarks)'
+    )
+    parser.add_argument(
+        '--work-dir',
+        default=None,
+        help='Directory for synthetic PDFs and pipeline outputs (default: a temporary directory)'
+    )
+    parser.add_argument(
+        '--compare',
+        default=None,
+        help="Results file to compare against, or 'latest' for the most recent earlier run"
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=1.2,
+        help='Slowdown factor reported as a regression (default: 1.2)'
+    )
+    args = parser.parse_args()
+    
+    scales = [scale.strip() for scale in args.scales.split(',') if scale.strip()]
+    components = [component.strip() for component in args.components.split(',') if component.strip()]
+    unknown = [scale for scale in scales if scale not in SCALES] + [c for c in components if c not in COMPONENTS]
+    if unknown:
+        parser.error(f"Unknown scales/components: {', '.join(unknown)}")
+    
+    results_dir = Path(args.results_dir)
+    results_dir.mkdir(parents=True, exist_ok=True)
+    baseline_path = _latest_results(results_dir) if args.compare == 'latest' else (
+        Path(args.compare) if args.compare else None
+    )
+    
+    encoder = None
+    if args.real_encoder:
+        from embeddings.encoder import SentenceEncoder
+        encoder = SentenceEncoder()
+    
+    work_dir = Path(args.work_dir) if args.work_dir else Path(tempfile.mkdtemp(prefix='inclusify-bench-'))
+    try:
+        results = run_suite(
+            scales, components, work_dir,
+            seed=args.seed,
+            repeat=args.repeat,
+            max_pdfs=args.max_pdfs,
+            encoder=encoder
+        )
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    results_path = results_dir / f"results_{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    with open(results_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    logger.info(f"Saved benchmark results to {results_path}")
+    
+    if baseline_path is None:
+        return
+    if not baseline_path.exists():
+        logger.error(f"Baseline results not found: {baseline_path}")
+        sys.exit(2)
+    
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    comparisons = compare_results(results, baseline, threshold=args.threshold)
+    logger.info(f"\nComparison against {baseline_path} (commit {baseline.get('git_commit')}):")
+    for comparison in comparisons:
+        marker = "REGRESSION" if comparison['regressed'] else "ok"
+        logger.info(
+            f"  {comparison['benchmark']:<20} {comparison['baseline_seconds']:>9.3f}s -> "
+            f"{comparison['current_seconds']:>9.3f}s  x{comparison['ratio']:.2f}  {marker}"
+        )
+    if any(comparison['regressed'] for comparison in comparisons):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Recall@k versus queries per second for the sentence search indexes.
+
+Run from the ml directory, on synthetic clustered embeddings or on the pipeline's:
+
+    python -m benchmarks.search_benchmark --n-vectors 200000 --dim 768
+    python -m benchmarks.search_benchmark --embeddings data/output/embeddings.npy
+
+Recall@k is measured against exact search on the same vectors.
+"""
+
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+import numpy as np
+
+from search.index import ExactIndex, IVFIndex, VectorIndex
+
+logger = logging.getLogger(__name__)
+
+
+def synthetic_embeddings(n: int, dim: int, n_centers: int = 256, spread: float = 1.5, seed: int = 0) -> np.ndarray:
+    """
+    Unit-norm embeddings scattered around random topic directions.
+    
+    Args:
+        n: Number of embeddings
+        dim: Embedding dimension
+        n_centers: Number of topic directions
+        spread: Noise scale relative to the unit-norm topic direction
+        seed: Random seed
+    
+    Returns:
+        Float32 array with shape [n, dim]
+    """
+    rng = np.random.RandomState(seed)
+    centers = rng.standard_normal((n_centers, dim)).astype(np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    embeddings = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, 65536):
+        end = min(start + 65536, n)
+        noise = rng.standard_normal((end - start, dim)).astype(np.float32) * (spread / np.sqrt(dim))
+        block = centers[rng.randint(n_centers, size=end - start)] + noise
+        embeddings[start:end] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    return embeddings
+
+
+def _timed_search(index: VectorIndex, queries: np.ndarray, k: int, batch_size: int, **kwargs) -> Dict[str, Any]:
+    """Search all queries in batches; return the IDs and queries per second."""
+    started = time.perf_counter()
+    ids = np.concatenate([
+        index.search(queries[start:start + batch_size], k=k, **kwargs)[0]
+        for start in range(0, len(queries), batch_size)
+    ])
+    elapsed = time.perf_counter() - started
+    return {'ids': ids, 'qps': len(queries) / elapsed if elapsed > 0 else float('inf')}
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    """
+    Mean fraction of the true k nearest neighbors that were found.
+    
+    Args:
+        found: Returned IDs with shape [n_queries, k]
+        truth: Exact nearest-neighbor IDs with shape [n_queries, k]
+    
+    Returns:
+        Recall@k in [0, 1]
+    """
+    hits = [len(np.intersect1d(f[f >= 0], t[t >= 0])) / max(1, (t >= 0).sum()) for f, t in zip(found, truth)]
+    return float(np.mean(hits))
+
+
+def run_search_benchmark(
+    embeddings: np.ndarray,
+    queries: np.ndarray,
+    work_dir: Path,
+    k: int = 10,
+    batch_size: int = 256,
+    n_lists: Optional[int] = None,
+    nprobes: Sequence[int] = (1, 2, 4, 8, 16, 32)
+) -> Dict[str, Any]:
+    """
+    Build exact and IVF indexes and measure recall@k and QPS for each nprobe.
+    
+    Args:
+        embeddings: Indexed embeddings with shape [n_vectors, dim]
+        queries: Query embeddings with shape [n_queries, dim]
+        work_dir: Directory for the index files
+        k: Neighbors per query
+        batch_size: Queries per search call
+        n_lists: IVF lists (IVFIndex default if None)
+        nprobes: Lists scanned per query, one measurement each
+    
+    Returns:
+        Results with the build times and one row per index configuration
+    """
+    ids = np.arange(len(embeddings), dtype=np.int64)
+    
+    started = time.perf_counter()
+    exact = ExactIndex.build(embeddings, ids, work_dir / "exact")
+    exact_build = time.perf_counter() - started
+    started = time.perf_counter()
+    ivf = IVFIndex.build(embeddings, ids, work_dir / "ivf", n_lists=n_lists)
+    ivf_build = time.perf_counter() - started
+    
+    truth = _timed_search(exact, queries, k, batch_size)
+    rows = [{'index': 'exact', 'nprobe': None, 'recall': 1.0, 'qps': round(truth['qps'], 1)}]
+    logger.info(f"exact: recall@{k} 1.000, {truth['qps']:.0f} queries/s")
+    
+    for nprobe in nprobes:
+        if nprobe > ivf.n_lists:
+            break
+        result = _timed_search(ivf, queries, k, batch_size, nprobe=nprobe)
+        recall = recall_at_k(result['ids'], truth['ids'])
+        rows.append({'index': 'ivf', 'nprobe': nprobe, 'recall': round(recall, 4), 'qps': round(result['qps'], 1)})
+        logger.info(
+            f"ivf nprobe={nprobe}: recall@{k} {recall:.3f}, {result['qps']:.0f} queries/s "
+            f"({result['qps'] / truth['qps']:.1f}x exact)"
+        )
+    
+    return {
+        'n_vectors': int(embeddings.shape[0]),
+        'dim': int(embeddings.shape[1]),
+        'n_queries': int(len(queries)),
+        'k': k,
+        'batch_size': batch_size,
+        'n_lists': ivf.n_lists,
+        'build_seconds': {'exact': round(exact_build, 2), 'ivf': round(ivf_build, 2)},
+        'rows': rows,
+    }
+
+
+def main():
+    """Main entry point."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    
+    parser = argparse.ArgumentParser(description="Recall@k versus QPS of the sentence search indexes")
+    parser.add_argument(
+        '--embeddings',
+        default=None,
+        help='Benchmark on these embeddings (.npy) instead of synthetic ones; queries are sampled from them'
+    )
+    parser.add_argument('--n-vectors', type=int, default=100_000, help='Synthetic vectors (default: 100000)')
+    parser.add_argument('--dim', type=int, default=768, help='Synthetic embedding dimension (default: 768)')
+    parser.add_argument('--n-queries', type=int, default=1000, help='Queries (default: 1000)')
+    parser.add_argument('--k', type=int, default=10, help='Neighbors per query (default: 10)')
+    parser.add_argument('--batch-size', type=int, default=256, help='Queries per search call (default: 256)')
+    parser.add_argument('--n-lists', type=int, default=None, help='IVF lists (default: 4 * sqrt(n_vectors))')
+    parser.add_argument(
+        '--nprobe',
+        type=int,
+        nargs='+',
+        default=[1, 2, 4, 8, 16, 32],
+        help='IVF lists scanned per query, one measurement each (default: 1 2 4 8 16 32)'
+    )
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument(
+        '--results-dir',
+        default='data/benchmarks',
+        help='Directory for the JSON results (default: data/benchmarks)'
+    )
+    args = parser.parse_args()
+    
+    rng = np.random.RandomState(args.seed)
+    if args.embeddings:
+        embeddings = np.load(args.embeddings, mmap_mode='r')
+        sample = np.sort(rng.choice(len(embeddings), size=min(args.n_queries, len(embeddings)), replace=False))
+        queries = np.asarray(embeddings[sample], dtype=np.float32)
+        source = str(args.embeddings)
+    else:
+        # Queries come from the same distribution but are not in the index
+        data = synthetic_embeddings(args.n_vectors + args.n_queries, args.dim, seed=args.seed)
+        embeddings, queries = data[:args.n_vectors], data[args.n_vectors:]
+        source = 'synthetic'
+    
+    logger.info(f"Benchmarking search over {embeddings.shape[0]} x {embeddings.shape[1]} {source} embeddings")
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = run_search_benchmark(
+            embeddings, queries, Path(work_dir),
+            k=args.k, batch_size=args.batch_size, n_lists=args.n_lists, nprobes=args.nprobe
+        )
+    results['source'] = source
+    
+    results_dir = Path(args.results_dir)
+    results_dir.mkdir(parents=True, exist_ok=True)
+    results_path = results_dir / f"search_{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    with open(results_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    logger.info(f"Results saved to {results_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Tiny deterministic encoder standing in for SentenceEncoder in benchmarks."""
+
+import logging
+from typing import List
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+
+logger = logging.getLogger(__name__)
+
+
+class HashingEncoder:
+    """Encodes sentences as unit-norm hashed word and bigram counts; needs no model download."""
+    
+    def __init__(self, embedding_dim: int = 64, batch_size: int = 8192):
+        """
+        Initialize the hashing encoder.
+        
+        Args:
+            embedding_dim: Embedding dimension
+            batch_size: Sentences vectorized per batch
+        """
+        self.embedding_dim = embedding_dim
+        self.batch_size = batch_size
+        self.model_name = f"hashing-{embedding_dim}"
+        self._vectorizer = HashingVectorizer(
+            n_features=embedding_dim,
+            ngram_range=(1, 2),
+            alternate_sign=True,
+            norm='l2'
+        )
+    
+    def encode(self, sentences: List[str], show_progress_bar: bool = True) -> np.ndarray:
+        """
+        Generate embeddings for a list of sentences.
+        
+        Args:
+            sentences: List of sentence strings
+            show_progress_bar: Ignored; kept for SentenceEncoder compatibility
+        
+        Returns:
+            Float32 array of unit-norm embeddings with shape [n_sentences, embedding_dim]
+        """
+        if not sentences:
+            logger.warning("Empty sentence list provided")
+            return np.array([])
+        
+        embeddings = np.empty((len(sentences), self.embedding_dim), dtype=np.float32)
+        for start in range(0, len(sentences), self.batch_size):
+            batch = sentences[start:start + self.batch_size]
+            embeddings[start:start + len(batch)] = self._vectorizer.transform(batch).toarray()
+        
+        logger.info(f"Generated embeddings with shape {embeddings.shape}")
+        return embeddings
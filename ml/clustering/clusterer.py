@@ -1,13 +1,117 @@
 """Clustering module for semantic clustering of sentence embeddings."""
 
+import hashlib
+import json
 import logging
-from typing import List, Optional
+import os
+import pickle
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
 import hdbscan
+import sklearn
+from scipy import sparse
+from sklearn.cluster import MiniBatchKMeans
 from sklearn.mixture import GaussianMixture
+from threadpoolctl import threadpool_limits
+
+from clustering.coreset import CORESET_STRATEGIES, coreset_indices
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever the layout of the persisted model state changes
+MODEL_FORMAT_VERSION = 1
+
+
+def _cluster_centroids(data: np.ndarray, labels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the mean embedding of every cluster, ignoring noise points.
+    
+    Args:
+        data: Embeddings with shape [n_sentences, embedding_dim]
+        labels: Cluster labels (-1 for noise)
+        
+    Returns:
+        Tuple of (sorted cluster IDs, centroids with shape [n_clusters, embedding_dim])
+    """
+    assigned = np.flatnonzero(labels >= 0)
+    if len(assigned) == 0:
+        return np.array([], dtype=np.int64), np.empty((0, data.shape[1]), dtype=data.dtype)
+    
+    ids, rows, counts = np.unique(labels[assigned], return_inverse=True, return_counts=True)
+    # Sparse [n_clusters, n_sentences] indicator product: no copy of the embeddings
+    indicator = sparse.csr_matrix(
+        (np.ones(len(assigned), dtype=data.dtype), (rows, assigned)),
+        shape=(len(ids), data.shape[0])
+    )
+    sums = np.asarray(indicator @ data)
+    return ids.astype(np.int64), sums / counts[:, None].astype(data.dtype)
+
+
+def save_soft_assignments(
+    path: str,
+    sentence_ids: np.ndarray,
+    cluster_ids: np.ndarray,
+    probabilities: np.ndarray
+) -> Path:
+    """
+    Store top-k soft cluster assignments as compressed columns.
+    
+    Args:
+        path: Output .npz file path
+        sentence_ids: Sentence IDs with shape [n_sentences]
+        cluster_ids: Top-k cluster IDs with shape [n_sentences, k] (-1 for padding)
+        probabilities: Matching probabilities with shape [n_sentences, k]
+        
+    Returns:
+        Path the assignments were written to
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        path,
+        sentence_id=np.asarray(sentence_ids, dtype=np.int64),
+        cluster_ids=cluster_ids.astype(np.int32, copy=False),
+        probabilities=probabilities.astype(np.float16, copy=False)
+    )
+    logger.info(f"Saved top-{cluster_ids.shape[1]} soft assignments for {len(cluster_ids)} sentences to {path}")
+    return path
+
+
+def load_soft_assignments(path: str) -> Dict[str, np.ndarray]:
+    """
+    Load soft cluster assignments written by save_soft_assignments().
+    
+    Args:
+        path: Path of the .npz file
+        
+    Returns:
+        Dictionary with 'sentence_id', 'cluster_ids' and 'probabilities' columns
+    """
+    with np.load(path) as columns:
+        return {name: columns[name] for name in columns.files}
+
+
+def _fit_partition(params: Dict[str, Any], data: np.ndarray, n_threads: int) -> np.ndarray:
+    """
+    Fit the fine clusterer on a single partition (runs in a worker process).
+    
+    Args:
+        params: Constructor arguments for the per-partition SentenceClusterer
+        data: Prepared (already normalized) embeddings of the partition
+        n_threads: Number of BLAS/OpenMP threads the worker may use
+        
+    Returns:
+        Partition-local cluster labels
+    """
+    # Keep quiet in workers, the parent logs the aggregated statistics
+    logger.setLevel(logging.WARNING)
+    with threadpool_limits(limits=n_threads):
+        return SentenceClusterer(**params)._fit_labels(data)
+
 
 class SentenceClusterer:
     """Performs semantic clustering on sentence embeddings."""
@@ -18,7 +122,14 @@ class SentenceClusterer:
         min_samples: int = 5,
         metric: str = 'euclidean',
         method: str = 'hdbscan',
-        n_components: Optional[int] = None
+        n_components: Optional[int] = None,
+        n_partitions: Optional[int] = None,
+        n_jobs: Optional[int] = None,
+        merge_threshold: Optional[float] = None,
+        low_memory: bool = False,
+        copy: bool = True,
+        coreset_size: Optional[int] = None,
+        coreset_strategy: str = 'kmeans++'
     ):
         """
         Initialize the clusterer.
@@ -29,13 +140,51 @@ class SentenceClusterer:
             metric: Distance metric ('euclidean' or 'cosine')
             method: Clustering method ('hdbscan' or 'gmm' for EM/GMM)
             n_components: Number of clusters for GMM (auto-determined if None)
+            n_partitions: Number of coarse k-means partitions for hierarchical
+                clustering; the fine clusterer runs on each partition in parallel
+                (disabled if None)
+            n_jobs: Number of worker processes for partitioned fitting
+                (defaults to the CPU count)
+            merge_threshold: Cosine similarity between cluster centroids above which
+                clusters from different partitions are merged (disabled if None)
+            low_memory: Memory-budget mode: skip normalization of input that is already
+                unit-norm, keep float32 input in float32 and report the peak bytes
+                allocated during the fit
+            copy: Whether the input may not be modified; with low_memory=True and
+                copy=False, cosine normalization happens in place
+            coreset_size: Fit on a coreset of this many embeddings and label the
+                rest with chunked assignment (disabled if None or not smaller than the input)
+            coreset_strategy: How the coreset is sampled: 'kmeans++' (importance
+                sampling that over-represents sparse regions) or 'stratified'
+                (proportional per stratum passed to fit_predict(), e.g. source PDF)
         """
+        if coreset_strategy not in CORESET_STRATEGIES:
+            raise ValueError(f"Unknown coreset_strategy: {coreset_strategy}")
+        
         self.min_cluster_size = min_cluster_size
         self.min_samples = min_samples
         self.metric = metric
         self.method = method.lower()
         self.n_components = n_components
+        self.n_partitions = n_partitions
+        self.n_jobs = n_jobs
+        self.merge_threshold = merge_threshold
+        self.low_memory = low_memory
+        self.copy = copy
+        self.coreset_size = coreset_size
+        self.coreset_strategy = coreset_strategy
         self.clusterer = None
+        self.partitioner = None
+        # Fitted state used by assign() and drift_report()
+        self.centroid_ids_: Optional[np.ndarray] = None
+        self.centroids_: Optional[np.ndarray] = None
+        # Largest member distance per centroid, beyond which partitioned HDBSCAN assigns noise
+        self.centroid_radii_: Optional[np.ndarray] = None
+        self.train_stats_: Optional[Dict[str, Any]] = None
+        # Peak bytes allocated by the last fit (low_memory mode only)
+        self.peak_memory_bytes_: Optional[int] = None
+        # Sample size and timings of the last coreset fit
+        self.coreset_report_: Optional[Dict[str, Any]] = None
     
     def _determine_n_components(self, n_samples: int) -> int:
         """
@@ -58,12 +207,508 @@ class SentenceClusterer:
         else:
             return max(20, n_samples // 500)
     
-    def fit_predict(self, embeddings: np.ndarray) -> np.ndarray:
+    def _prepare_data(self, embeddings: np.ndarray, owned: bool = False) -> Tuple[np.ndarray, str]:
+        """
+        Prepare embeddings for clustering according to the configured metric.
+        
+        Args:
+            embeddings: Numpy array of embeddings with shape [n_sentences, embedding_dim]
+            owned: Whether embeddings is a private copy that may be normalized in place
+            
+        Returns:
+            Tuple of (data to cluster, note describing the preparation for logging)
+        """
+        if self.metric != 'cosine':
+            return embeddings, ""
+        
+        if not self.low_memory:
+            # For cosine metric, normalize embeddings
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            if owned and np.issubdtype(embeddings.dtype, np.floating):
+                embeddings /= norms + 1e-8
+                return embeddings, " (normalized in place for cosine similarity)"
+            return embeddings / (norms + 1e-8), " (normalized for cosine similarity)"
+        
+        # Row norms only allocate one value per sentence, in the input dtype
+        norms = np.sqrt(np.einsum('ij,ij->i', embeddings, embeddings))
+        # All-zero rows (sentences the encoder rejected) stay zero under normalization
+        if np.all((np.abs(norms - 1) < 1e-4) | (norms == 0)):
+            return embeddings, " (already unit-norm, no copy)"
+        
+        norms += 1e-8
+        in_place = (
+            (owned or not self.copy)
+            and embeddings.flags.writeable
+            and np.issubdtype(embeddings.dtype, np.floating)
+        )
+        if in_place:
+            embeddings /= norms[:, None]
+            return embeddings, " (normalized in place for cosine similarity)"
+        return embeddings / norms[:, None], " (normalized for cosine similarity)"
+    
+    def _warm_start_parameters(
+        self,
+        previous: 'SentenceClusterer',
+        n_components: int,
+        n_features: int
+    ) -> Dict[str, np.ndarray]:
+        """
+        Derive EM initial parameters from a previously fitted GMM clustering.
+        
+        When the number of components grows, the heaviest components are split
+        along their principal axis; when it shrinks, the closest pairs of
+        components are merged with moment matching.
+        
+        Args:
+            previous: Fitted single-level GMM clusterer
+            n_components: Number of components of the new fit
+            n_features: Embedding dimension of the new data
+            
+        Returns:
+            Keyword arguments (weights_init, means_init, precisions_init) for GaussianMixture
+        """
+        model = previous.clusterer
+        if not isinstance(model, GaussianMixture) or model.covariance_type != 'full':
+            raise ValueError("Warm start requires a previous single-level GMM clustering")
+        if model.means_.shape[1] != n_features:
+            raise ValueError(
+                f"Warm start model has {model.means_.shape[1]} dimensions, data has {n_features}"
+            )
+        
+        weights = list(model.weights_)
+        means = list(model.means_)
+        covariances = list(model.covariances_)
+        
+        # Split: replace the heaviest component by two children one standard
+        # deviation apart along its principal axis
+        while len(weights) < n_components:
+            i = int(np.argmax(weights))
+            eigenvalues, eigenvectors = np.linalg.eigh(covariances[i])
+            offset = np.sqrt(max(eigenvalues[-1], 0.0)) * eigenvectors[:, -1]
+            weight, mean, covariance = weights[i] / 2, means[i], covariances[i]
+            weights[i], means[i] = weight, mean - offset
+            weights.append(weight)
+            means.append(mean + offset)
+            covariances.append(covariance.copy())
+        
+        # Merge: combine the two components with the closest means
+        while len(weights) > n_components:
+            stacked = np.asarray(means)
+            sq_norms = np.einsum('ij,ij->i', stacked, stacked)
+            distances = sq_norms[:, None] + sq_norms[None, :] - 2 * stacked @ stacked.T
+            np.fill_diagonal(distances, np.inf)
+            i, j = sorted(np.unravel_index(np.argmin(distances), distances.shape))
+            
+            w_i, w_j = weights[i], weights[j]
+            weight = w_i + w_j
+            mean = (w_i * means[i] + w_j * means[j]) / weight
+            d_i, d_j = means[i] - mean, means[j] - mean
+            covariance = (
+                w_i * (covariances[i] + np.outer(d_i, d_i))
+                + w_j * (covariances[j] + np.outer(d_j, d_j))
+            ) / weight
+            weights[i], means[i], covariances[i] = weight, mean, covariance
+            del weights[j], means[j], covariances[j]
+        
+        weights = np.asarray(weights)
+        return {
+            'weights_init': weights / weights.sum(),
+            'means_init': np.asarray(means),
+            'precisions_init': np.linalg.inv(np.asarray(covariances)),
+        }
+    
+    def _fit_labels(
+        self,
+        data: np.ndarray,
+        warm_start: Optional['SentenceClusterer'] = None,
+        n_components: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Fit the configured clustering algorithm on prepared data.
+        
+        Args:
+            data: Prepared embeddings with shape [n_sentences, embedding_dim]
+            warm_start: Previously fitted GMM clusterer used to seed EM (GMM only)
+            n_components: Number of GMM components, overriding self.n_components
+            
+        Returns:
+            Array of cluster labels (shape: [n_sentences])
+        """
+        if self.method == 'gmm':
+            # Gaussian Mixture Model with EM algorithm
+            n_components = n_components or self.n_components
+            if n_components is None:
+                n_components = self._determine_n_components(data.shape[0])
+            n_components = min(n_components, data.shape[0])
+            
+            init_params = {}
+            if warm_start is not None:
+                init_params = self._warm_start_parameters(warm_start, n_components, data.shape[1])
+            
+            logger.info(
+                f"Clustering {data.shape[0]} embeddings with GMM (EM algorithm), "
+                f"n_components={n_components}"
+                + (" (warm-started)" if init_params else "")
+            )
+            
+            # Initialize GMM
+            self.clusterer = GaussianMixture(
+                n_components=n_components,
+                covariance_type='full',  # Full covariance for better fit
+                max_iter=100,
+                # Multiple initializations for better results, unless seeded
+                n_init=1 if init_params else 10,
+                random_state=42,
+                verbose=1 if logger.level <= logging.DEBUG else 0,
+                **init_params
+            )
+            
+        else:  # HDBSCAN
+            # For cosine, use euclidean on normalized vectors
+            if self.metric == 'cosine':
+                actual_metric = 'euclidean'
+            else:
+                actual_metric = self.metric
+            
+            logger.info(
+                f"Clustering {data.shape[0]} embeddings with HDBSCAN, "
+                f"min_cluster_size={self.min_cluster_size}, "
+                f"min_samples={self.min_samples}, "
+                f"metric={self.metric}"
+            )
+            
+            # Initialize HDBSCAN clusterer
+            self.clusterer = hdbscan.HDBSCAN(
+                min_cluster_size=self.min_cluster_size,
+                min_samples=self.min_samples,
+                metric=actual_metric,
+                cluster_selection_method='eom',  # Excess of Mass
+                prediction_data=True  # Needed for approximate_predict in assign()
+            )
+        
+        # Fit and predict
+        return self.clusterer.fit_predict(data)
+    
+    def _partition_params(
+        self,
+        n_samples: int,
+        n_total: int,
+        total_components: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the constructor arguments of the fine clusterer for one partition.
+        
+        Args:
+            n_samples: Number of points in the partition
+            n_total: Number of points over all partitions
+            total_components: Number of clusters over all partitions, overriding
+                self.n_components
+            
+        Returns:
+            Keyword arguments for a non-partitioned SentenceClusterer
+        """
+        total_components = total_components or self.n_components
+        n_components = None
+        if total_components is not None:
+            # Spread the requested number of clusters proportionally to partition size
+            n_components = max(1, int(round(total_components * n_samples / n_total)))
+        
+        return {
+            'min_cluster_size': self.min_cluster_size,
+            'min_samples': self.min_samples,
+            'metric': self.metric,
+            'method': self.method,
+            'n_components': n_components,
+            'low_memory': self.low_memory,
+        }
+    
+    def _fit_partitioned(self, data: np.ndarray, n_components: Optional[int] = None) -> np.ndarray:
+        """
+        Two-level clustering: coarse k-means partitioning, then the fine clusterer
+        on each partition in a process pool.
+        
+        Cluster IDs are remapped to be globally unique, and clusters from different
+        partitions are optionally merged when their centroids are close.
+        
+        Args:
+            data: Prepared embeddings with shape [n_sentences, embedding_dim]
+            n_components: Number of GMM clusters over all partitions, overriding
+                self.n_components
+            
+        Returns:
+            Array of globally unique cluster labels (shape: [n_sentences])
+        """
+        n_samples = data.shape[0]
+        n_partitions = min(self.n_partitions, n_samples)
+        n_jobs = self.n_jobs or os.cpu_count() or 1
+        
+        logger.info(
+            f"Partitioning {n_samples} embeddings into {n_partitions} coarse partitions "
+            f"with k-means ({n_jobs} workers)"
+        )
+        self.partitioner = MiniBatchKMeans(
+            n_clusters=n_partitions,
+            batch_size=4096,
+            n_init=3,
+            random_state=42
+        )
+        partition_labels = self.partitioner.fit_predict(data)
+        
+        # Minimum partition size the fine clusterer can produce a cluster from
+        min_size = self.min_cluster_size if self.method == 'hdbscan' else 2
+        
+        members = [np.flatnonzero(partition_labels == p) for p in range(n_partitions)]
+        # Submit the largest partitions first for better load balancing
+        order = sorted(range(n_partitions), key=lambda p: len(members[p]), reverse=True)
+        n_threads = max(1, (os.cpu_count() or 1) // n_jobs)
+        
+        local_labels: Dict[int, np.ndarray] = {}
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = {}
+            for p in order:
+                idx = members[p]
+                if len(idx) < min_size:
+                    # Too small to cluster: noise for HDBSCAN, a single cluster for GMM
+                    fill = -1 if self.method == 'hdbscan' else 0
+                    local_labels[p] = np.full(len(idx), fill, dtype=np.int64)
+                    continue
+                params = self._partition_params(len(idx), n_samples, n_components)
+                futures[p] = executor.submit(_fit_partition, params, data[idx], n_threads)
+            
+            for p, future in futures.items():
+                local_labels[p] = future.result()
+        
+        # Remap partition-local IDs to globally unique IDs
+        cluster_labels = np.full(n_samples, -1, dtype=np.int64)
+        cluster_partition = []
+        offset = 0
+        for p in range(n_partitions):
+            labels = local_labels[p]
+            assigned = labels >= 0
+            cluster_labels[members[p][assigned]] = labels[assigned] + offset
+            n_local = int(labels.max()) + 1 if assigned.any() else 0
+            cluster_partition.extend([p] * n_local)
+            offset += n_local
+        
+        if self.merge_threshold is not None and offset > 1:
+            cluster_labels = self._merge_boundary_clusters(
+                data, cluster_labels, np.array(cluster_partition)
+            )
+        
+        return cluster_labels
+    
+    def _merge_boundary_clusters(
+        self,
+        data: np.ndarray,
+        cluster_labels: np.ndarray,
+        cluster_partition: np.ndarray,
+        block_size: int = 1024
+    ) -> np.ndarray:
+        """
+        Merge clusters from different partitions whose centroids are similar.
+        
+        Args:
+            data: Prepared embeddings with shape [n_sentences, embedding_dim]
+            cluster_labels: Globally unique cluster labels (-1 for noise)
+            cluster_partition: Partition index of each cluster ID
+            block_size: Number of centroids compared per block
+            
+        Returns:
+            Compacted cluster labels after merging
+        """
+        n_clusters = len(cluster_partition)
+        assigned = cluster_labels >= 0
+        
+        # Cluster centroids, normalized so dot products are cosine similarities
+        centroids = np.zeros((n_clusters, data.shape[1]), dtype=np.float64)
+        ids, cluster_means = _cluster_centroids(data, cluster_labels)
+        centroids[ids] = cluster_means
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-8
+        
+        # Union-find over clusters
+        parent = np.arange(n_clusters)
+        
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        
+        n_merges = 0
+        for start in range(0, n_clusters, block_size):
+            block = centroids[start:start + block_size]
+            similarity = block @ centroids.T
+            rows, cols = np.nonzero(similarity >= self.merge_threshold)
+            rows = rows + start
+            # Only merge across partition boundaries, each pair once
+            keep = (rows < cols) & (cluster_partition[rows] != cluster_partition[cols])
+            for i, j in zip(rows[keep], cols[keep]):
+                root_i, root_j = find(i), find(j)
+                if root_i != root_j:
+                    parent[max(root_i, root_j)] = min(root_i, root_j)
+                    n_merges += 1
+        
+        if n_merges == 0:
+            return cluster_labels
+        
+        roots = np.array([find(i) for i in range(n_clusters)])
+        _, compact = np.unique(roots, return_inverse=True)
+        merged = cluster_labels.copy()
+        merged[assigned] = compact[cluster_labels[assigned]]
+        logger.info(f"Merged {n_merges} cluster pairs across partition boundaries")
+        return merged
+    
+    def _log_statistics(self, cluster_labels: np.ndarray):
+        """
+        Log cluster count, noise count and the largest clusters.
+        
+        Args:
+            cluster_labels: Array of cluster labels
+        """
+        unique_labels, counts = np.unique(cluster_labels, return_counts=True)
+        n_clusters = len(unique_labels[unique_labels != -1])
+        n_noise = np.sum(cluster_labels == -1)
+        
+        logger.info(
+            f"Clustering complete: {n_clusters} clusters found"
+        )
+        if n_noise > 0:
+            logger.info(f"Noise points (outliers): {n_noise}")
+        
+        # Log cluster sizes (top 10)
+        valid_clusters = [(label, count) for label, count in zip(unique_labels, counts) if label != -1]
+        valid_clusters.sort(key=lambda x: x[1], reverse=True)
+        logger.info(f"Top 10 largest clusters:")
+        for label, count in valid_clusters[:10]:
+            logger.info(f"  Cluster {label}: {count} points")
+    
+    def _fit_coreset(
+        self,
+        embeddings: np.ndarray,
+        strata: Optional[np.ndarray] = None,
+        warm_start: Optional['SentenceClusterer'] = None,
+        exclude: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fit on a coreset of the embeddings and assign the remaining ones.
+        
+        The coreset keeps its own fit labels; all other points are labeled with
+        the chunked assign(). Importance sampling over-represents sparse regions,
+        so after a GMM fit on such a coreset the mixture weights are re-estimated
+        from the responsibilities of all points before assignment. The centroids
+        and drift baseline are then computed from all points and their labels,
+        not from the biased sample.
+        
+        Args:
+            embeddings: Numpy array of embeddings with shape [n_sentences, embedding_dim]
+            strata: Stratum code per embedding for the stratified strategy
+            warm_start: Previously fitted GMM clusterer used to seed EM (GMM only)
+            exclude: Row indices kept out of the coreset and the statistics, labeled as noise
+            
+        Returns:
+            Tuple of (prepared coreset data, cluster labels of all embeddings)
+        """
+        keep = None
+        n_samples = embeddings.shape[0]
+        if exclude is not None:
+            keep = np.ones(n_samples, dtype=bool)
+            keep[exclude] = False
+            n_samples = int(keep.sum())
+        started = time.perf_counter()
+        indices = coreset_indices(
+            embeddings, self.coreset_size, strategy=self.coreset_strategy,
+            strata=strata, normalize=self.metric == 'cosine', exclude=exclude
+        )
+        sample_seconds = time.perf_counter() - started
+        logger.info(
+            f"Fitting on a {self.coreset_strategy} coreset of {len(indices)} out of {n_samples} embeddings"
+        )
+        
+        data, _ = self._prepare_data(np.asarray(embeddings[indices]))
+        # The automatic cluster count follows the corpus size, not the coreset size
+        n_components = None
+        if self.method == 'gmm' and self.n_components is None:
+            n_components = self._determine_n_components(n_samples)
+        
+        started = time.perf_counter()
+        if self.n_partitions:
+            sample_labels = self._fit_partitioned(data, n_components=n_components)
+        else:
+            sample_labels = self._fit_labels(data, warm_start=warm_start, n_components=n_components)
+        fit_seconds = time.perf_counter() - started
+        # Provisional state from the coreset, which assign() needs (e.g. partition centroids)
+        self._record_fit_state(data, sample_labels)
+        
+        started = time.perf_counter()
+        if self.coreset_strategy == 'kmeans++' and self.method == 'gmm' and not self.n_partitions:
+            self._reestimate_weights(embeddings, keep=keep)
+        cluster_labels = self.assign(embeddings)
+        if exclude is not None:
+            cluster_labels[exclude] = -1
+        cluster_labels[indices] = sample_labels
+        assign_seconds = time.perf_counter() - started
+        self._record_fit_state_chunked(embeddings, cluster_labels, keep=keep)
+        
+        self.coreset_report_ = {
+            'strategy': self.coreset_strategy,
+            'coreset_size': int(len(indices)),
+            'n_samples': int(n_samples),
+            'sample_seconds': round(sample_seconds, 3),
+            'fit_seconds': round(fit_seconds, 3),
+            'assign_seconds': round(assign_seconds, 3),
+        }
+        logger.info(
+            f"Coreset fit: sampling {sample_seconds:.1f}s, fit {fit_seconds:.1f}s, "
+            f"assignment of {n_samples - len(indices)} embeddings {assign_seconds:.1f}s"
+        )
+        return data, cluster_labels
+    
+    def _reestimate_weights(
+        self,
+        embeddings: np.ndarray,
+        keep: Optional[np.ndarray] = None,
+        chunk_size: int = 65536
+    ):
+        """
+        Replace the GMM mixture weights by the mean responsibilities over all embeddings.
+        
+        Args:
+            embeddings: Numpy array of embeddings with shape [n_sentences, embedding_dim]
+            keep: Boolean mask of the embeddings to use (all if None)
+            chunk_size: Number of embeddings processed at a time
+        """
+        totals = np.zeros(self.clusterer.n_components, dtype=np.float64)
+        for start in range(0, embeddings.shape[0], chunk_size):
+            data, _ = self._prepare_data(embeddings[start:start + chunk_size])
+            responsibilities = self.clusterer.predict_proba(data)
+            if keep is not None:
+                responsibilities = responsibilities[keep[start:start + len(data)]]
+            totals += responsibilities.sum(axis=0)
+        self.clusterer.weights_ = np.maximum(totals / totals.sum(), 1e-12)
+        self.clusterer.weights_ /= self.clusterer.weights_.sum()
+    
+    def fit_predict(
+        self,
+        embeddings: np.ndarray,
+        warm_start: Optional['SentenceClusterer'] = None,
+        strata: Optional[np.ndarray] = None,
+        exclude: Optional[np.ndarray] = None
+    ) -> np.ndarray:
         """
         Fit the clustering model and predict cluster labels.
         
+        With coreset_size set, the model is fitted on a coreset only and the
+        other embeddings are assigned to its clusters (see _fit_coreset()).
+        
         Args:
             embeddings: Numpy array of embeddings with shape [n_sentences, embedding_dim]
+            warm_start: Previously fitted GMM clusterer whose means, weights and
+                covariances seed EM instead of random initialization (GMM only)
+            strata: Stratum code per embedding (e.g. factorized source PDF) for the
+                stratified coreset strategy
+            exclude: Row indices kept out of the fit and labeled as noise (e.g.
+                embeddings the encoder rejected); only the kept rows are copied for
+                a full fit, and none for a coreset fit
             
         Returns:
             Array of cluster labels (shape: [n_sentences])
@@ -76,88 +721,582 @@ class SentenceClusterer:
         if len(embeddings.shape) != 2:
             raise ValueError(f"Expected 2D array, got shape {embeddings.shape}")
         
+        keep = None
+        n_kept = embeddings.shape[0]
+        if exclude is not None and len(exclude):
+            keep = np.ones(embeddings.shape[0], dtype=bool)
+            keep[exclude] = False
+            n_kept = int(keep.sum())
+            if n_kept == 0:
+                raise ValueError("All embeddings are excluded from the fit")
+        else:
+            exclude = None
+        
+        started_tracing = False
+        if self.low_memory:
+            # numpy reports its buffers to tracemalloc, so the traced peak covers
+            # the arrays allocated by the fit (worker processes are not included)
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            baseline_bytes, _ = tracemalloc.get_traced_memory()
+        
         try:
-            # For cosine metric, normalize embeddings
-            if self.metric == 'cosine':
-                norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
-                data_to_cluster = embeddings / (norms + 1e-8)
-                metric_note = " (normalized for cosine similarity)"
-            else:
-                data_to_cluster = embeddings
-                metric_note = ""
-            
-            if self.method == 'gmm':
-                # Gaussian Mixture Model with EM algorithm
-                n_components = self.n_components
-                if n_components is None:
-                    n_components = self._determine_n_components(embeddings.shape[0])
-                
-                logger.info(
-                    f"Clustering {embeddings.shape[0]} embeddings with GMM (EM algorithm), "
-                    f"n_components={n_components}{metric_note}"
-                )
-                
-                # Initialize GMM
-                self.clusterer = GaussianMixture(
-                    n_components=n_components,
-                    covariance_type='full',  # Full covariance for better fit
-                    max_iter=100,
-                    n_init=10,  # Multiple initializations for better results
-                    random_state=42,
-                    verbose=1 if logger.level <= logging.DEBUG else 0
+            if warm_start is not None and (self.method != 'gmm' or self.n_partitions):
+                logger.warning("Warm start is only supported for single-level GMM; ignoring it")
+                warm_start = None
+            
+            if self.coreset_size and n_kept > self.coreset_size:
+                data_to_cluster, cluster_labels = self._fit_coreset(
+                    embeddings, strata, warm_start, exclude=exclude
                 )
+            else:
+                self.coreset_report_ = None
+                if keep is not None:
+                    # Gathering the kept rows is the one copy, so it is prepared in place
+                    data_to_cluster, metric_note = self._prepare_data(np.asarray(embeddings[keep]), owned=True)
+                else:
+                    data_to_cluster, metric_note = self._prepare_data(embeddings)
+                if metric_note:
+                    logger.info(f"Embeddings prepared{metric_note}")
                 
-                # Fit and predict
-                cluster_labels = self.clusterer.fit_predict(data_to_cluster)
-                
-                # GMM doesn't produce noise points, all points are assigned
-                n_noise = 0
-                
-            else:  # HDBSCAN
-                # For cosine, use euclidean on normalized vectors
-                if self.metric == 'cosine':
-                    actual_metric = 'euclidean'
+                if self.n_partitions:
+                    fit_labels = self._fit_partitioned(data_to_cluster)
                 else:
-                    actual_metric = self.metric
+                    fit_labels = self._fit_labels(data_to_cluster, warm_start=warm_start)
                 
+                self._record_fit_state(data_to_cluster, fit_labels)
+                if keep is not None:
+                    cluster_labels = np.full(embeddings.shape[0], -1, dtype=np.int64)
+                    cluster_labels[keep] = fit_labels
+                else:
+                    cluster_labels = fit_labels
+            self._log_statistics(cluster_labels)
+            
+            if self.low_memory:
+                _, peak_bytes = tracemalloc.get_traced_memory()
+                self.peak_memory_bytes_ = max(0, peak_bytes - baseline_bytes)
                 logger.info(
-                    f"Clustering {embeddings.shape[0]} embeddings with HDBSCAN, "
-                    f"min_cluster_size={self.min_cluster_size}, "
-                    f"min_samples={self.min_samples}, "
-                    f"metric={self.metric}{metric_note}"
+                    f"Peak memory allocated by clustering: {self.peak_memory_bytes_ / 2**20:.1f} MiB "
+                    f"(input {embeddings.nbytes / 2**20:.1f} MiB, dtype {data_to_cluster.dtype})"
                 )
-                
-                # Initialize HDBSCAN clusterer
-                self.clusterer = hdbscan.HDBSCAN(
-                    min_cluster_size=self.min_cluster_size,
-                    min_samples=self.min_samples,
-                    metric=actual_metric,
-                    cluster_selection_method='eom'  # Excess of Mass
-                )
-                
-                # Fit and predict
-                cluster_labels = self.clusterer.fit_predict(data_to_cluster)
-                n_noise = np.sum(cluster_labels == -1)
+            return cluster_labels
             
-            # Log clustering statistics
-            unique_labels, counts = np.unique(cluster_labels, return_counts=True)
-            n_clusters = len(unique_labels[unique_labels != -1])
+        except Exception as e:
+            logger.error(f"Failed to perform clustering: {e}")
+            raise
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+    
+    def _centroid_rows(self, labels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Match labels to rows of the centroid matrix.
+        
+        Args:
+            labels: Cluster labels (-1 for noise)
             
-            logger.info(
-                f"Clustering complete: {n_clusters} clusters found"
+        Returns:
+            Tuple of (indices of the points with a known cluster, their centroid rows)
+        """
+        lookup = np.full(int(self.centroid_ids_.max()) + 1 if len(self.centroid_ids_) else 0, -1)
+        lookup[self.centroid_ids_] = np.arange(len(self.centroid_ids_))
+        assigned = np.flatnonzero((labels >= 0) & (labels < len(lookup)))
+        rows = lookup[labels[assigned]]
+        known = rows >= 0
+        return assigned[known], rows[known]
+    
+    def _update_radii(self, radii: np.ndarray, data: np.ndarray, labels: np.ndarray):
+        """
+        Raise each cluster's radius to the largest distance of its members in the data.
+        
+        Args:
+            radii: Radius per centroid row, updated in place
+            data: Prepared embeddings
+            labels: Cluster labels (-1 for noise)
+        """
+        _, rows = self._centroid_rows(labels)
+        np.maximum.at(radii, rows, self._centroid_distances(data, labels))
+    
+    def _centroid_distances(
+        self,
+        data: np.ndarray,
+        labels: np.ndarray,
+        chunk_size: int = 65536
+    ) -> np.ndarray:
+        """
+        Distance of each point to the centroid of its cluster.
+        
+        Args:
+            data: Prepared embeddings
+            labels: Cluster labels (-1 for noise)
+            chunk_size: Number of points processed at a time
+            
+        Returns:
+            Distances for non-noise points
+        """
+        assigned, rows = self._centroid_rows(labels)
+        
+        # Chunked so the difference matrix never covers the whole corpus
+        distances = np.empty(len(assigned), dtype=np.float64)
+        for start in range(0, len(assigned), chunk_size):
+            end = start + chunk_size
+            diff = data[assigned[start:end]] - self.centroids_[rows[start:end]]
+            distances[start:end] = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+        return distances
+    
+    def _cluster_proportions(self, labels: np.ndarray) -> Dict[int, float]:
+        """Fraction of points per cluster label (noise included as -1)."""
+        unique_labels, counts = np.unique(labels, return_counts=True)
+        return {int(label): float(count) / len(labels) for label, count in zip(unique_labels, counts)}
+    
+    def _record_fit_state(self, data: np.ndarray, cluster_labels: np.ndarray):
+        """
+        Store centroids and baseline statistics of the fit for assignment and drift checks.
+        
+        For partitioned HDBSCAN fits, each cluster also gets a radius (the largest
+        distance of its members), and the statistics use the labels assign() gives
+        the training data, so a drift report on that data shows no drift.
+        
+        Args:
+            data: Prepared embeddings the model was fitted on
+            cluster_labels: Labels produced by the fit
+        """
+        self.centroid_ids_, self.centroids_ = _cluster_centroids(data, cluster_labels)
+        self.centroid_radii_ = None
+        if self.n_partitions and self.method == 'hdbscan':
+            self.centroid_radii_ = np.zeros(len(self.centroid_ids_), dtype=np.float64)
+            self._update_radii(self.centroid_radii_, data, cluster_labels)
+            cluster_labels = np.concatenate([
+                self._nearest_centroid(data[start:start + 65536])
+                for start in range(0, data.shape[0], 65536)
+            ])
+        distances = self._centroid_distances(data, cluster_labels)
+        
+        self.train_stats_ = {
+            'n_samples': int(data.shape[0]),
+            'n_features': int(data.shape[1]),
+            'mean_centroid_distance': float(distances.mean()) if len(distances) else 0.0,
+            'noise_rate': float(np.mean(cluster_labels == -1)),
+            'proportions': self._cluster_proportions(cluster_labels),
+        }
+        if self.method == 'gmm' and not self.n_partitions:
+            self.train_stats_['mean_log_likelihood'] = float(self.clusterer.score(data))
+    
+    def _record_fit_state_chunked(
+        self,
+        embeddings: np.ndarray,
+        cluster_labels: np.ndarray,
+        keep: Optional[np.ndarray] = None,
+        chunk_size: int = 65536
+    ):
+        """
+        Store the fit state of _record_fit_state() computed over all embeddings chunk by chunk.
+        
+        Used after a coreset fit, whose sample is not representative of the corpus,
+        without preparing all (possibly memory-mapped) embeddings at once.
+        
+        Args:
+            embeddings: Unprepared embeddings with shape [n_sentences, embedding_dim]
+            cluster_labels: Labels of all embeddings
+            keep: Boolean mask of the embeddings the statistics cover (all if None)
+            chunk_size: Number of embeddings processed at a time
+        """
+        n_total, n_features = embeddings.shape
+        
+        def prepared_chunks():
+            # Excluded rows carry label -1, so only the last pass has to skip them
+            for start in range(0, n_total, chunk_size):
+                data, _ = self._prepare_data(np.asarray(embeddings[start:start + chunk_size]))
+                yield slice(start, start + len(data)), data
+        
+        centroid_ids = np.unique(cluster_labels[cluster_labels >= 0]).astype(np.int64)
+        sums = np.zeros((len(centroid_ids), n_features), dtype=np.float64)
+        counts = np.zeros(len(centroid_ids), dtype=np.int64)
+        dtype = None
+        for rows, data in prepared_chunks():
+            dtype = data.dtype
+            labels = cluster_labels[rows]
+            ids, centroids = _cluster_centroids(data, labels)
+            centroid_rows = np.searchsorted(centroid_ids, ids)
+            chunk_counts = np.bincount(np.searchsorted(ids, labels[labels >= 0]), minlength=len(ids))
+            sums[centroid_rows] += centroids * chunk_counts[:, None]
+            counts[centroid_rows] += chunk_counts
+        self.centroid_ids_ = centroid_ids
+        self.centroids_ = (sums / np.maximum(counts, 1)[:, None]).astype(dtype)
+        self.centroid_radii_ = None
+        
+        if self.n_partitions and self.method == 'hdbscan':
+            # Radii of the final centroids; the statistics then follow the assign() labels
+            radii = np.zeros(len(centroid_ids), dtype=np.float64)
+            for rows, data in prepared_chunks():
+                self._update_radii(radii, data, cluster_labels[rows])
+            self.centroid_radii_ = radii
+            cluster_labels = cluster_labels.copy()
+        
+        # Last pass: distances to the final centroids and the GMM log-likelihood
+        distance_sum, n_distances, log_likelihood = 0.0, 0, 0.0
+        score_likelihood = self.method == 'gmm' and not self.n_partitions
+        for rows, data in prepared_chunks():
+            chunk_keep = keep[rows] if keep is not None else slice(None)
+            if self.centroid_radii_ is not None:
+                labels = self._nearest_centroid(data)
+                if keep is not None:
+                    labels[~chunk_keep] = -1
+                cluster_labels[rows] = labels
+            distances = self._centroid_distances(data, cluster_labels[rows])
+            distance_sum += float(distances.sum())
+            n_distances += len(distances)
+            if score_likelihood:
+                log_likelihood += float(self.clusterer.score_samples(data)[chunk_keep].sum())
+        
+        if keep is not None:
+            cluster_labels = cluster_labels[keep]
+        n_samples = len(cluster_labels)
+        self.train_stats_ = {
+            'n_samples': int(n_samples),
+            'n_features': int(n_features),
+            'mean_centroid_distance': distance_sum / n_distances if n_distances else 0.0,
+            'noise_rate': float(np.mean(cluster_labels == -1)),
+            'proportions': self._cluster_proportions(cluster_labels),
+        }
+        if score_likelihood:
+            self.train_stats_['mean_log_likelihood'] = log_likelihood / n_samples
+    
+    def _check_fitted(self, embeddings: np.ndarray):
+        """Raise if the model is not fitted or the embedding dimension does not match."""
+        if self.train_stats_ is None:
+            raise RuntimeError("Clusterer has not been fitted; call fit_predict() or load() first")
+        if len(embeddings.shape) != 2:
+            raise ValueError(f"Expected 2D array, got shape {embeddings.shape}")
+        if embeddings.shape[1] != self.train_stats_['n_features']:
+            raise ValueError(
+                f"Expected embeddings with {self.train_stats_['n_features']} dimensions, "
+                f"got {embeddings.shape[1]}"
             )
-            if n_noise > 0:
-                logger.info(f"Noise points (outliers): {n_noise}")
+    
+    def _nearest_centroid(self, data: np.ndarray) -> np.ndarray:
+        """
+        Label points with the ID of their nearest cluster centroid.
+        
+        Points farther from it than the cluster radius (partitioned HDBSCAN fits)
+        are labeled as noise.
+        
+        Args:
+            data: Prepared embeddings
             
-            # Log cluster sizes (top 10)
-            valid_clusters = [(label, count) for label, count in zip(unique_labels, counts) if label != -1]
-            valid_clusters.sort(key=lambda x: x[1], reverse=True)
-            logger.info(f"Top 10 largest clusters:")
-            for label, count in valid_clusters[:10]:
-                logger.info(f"  Cluster {label}: {count} points")
+        Returns:
+            Array of cluster labels
+        """
+        if len(self.centroid_ids_) == 0:
+            return np.full(data.shape[0], -1, dtype=np.int64)
+        # argmin ||x - c||^2 == argmax (x.c - ||c||^2 / 2)
+        half_norms = 0.5 * np.einsum('ij,ij->i', self.centroids_, self.centroids_)
+        scores = data @ self.centroids_.T - half_norms
+        nearest = np.argmax(scores, axis=1)
+        labels = self.centroid_ids_[nearest]
+        if self.centroid_radii_ is not None:
+            # ||x - c||^2 == ||x||^2 - 2 (x.c - ||c||^2 / 2); the slack absorbs rounding
+            # so that the member that set a radius stays inside it
+            sq_distances = np.einsum('ij,ij->i', data, data) - 2 * scores[np.arange(len(data)), nearest]
+            cutoff = (self.centroid_radii_[nearest] * (1 + 1e-4) + 1e-6) ** 2
+            labels[sq_distances > cutoff] = -1
+        return labels
+    
+    def _centroid_posteriors(self, data: np.ndarray) -> np.ndarray:
+        """
+        Soft assignment to cluster centroids for partitioned fits.
+        
+        Treats the clusters as isotropic Gaussians with a shared variance estimated
+        from the mean distance to the centroid during the fit.
+        
+        Args:
+            data: Prepared embeddings
             
-            return cluster_labels
+        Returns:
+            Posterior probabilities with shape [n_points, n_clusters]
+        """
+        sigma_sq = max(self.train_stats_['mean_centroid_distance'], 1e-6) ** 2 / data.shape[1]
+        half_norms = 0.5 * np.einsum('ij,ij->i', self.centroids_, self.centroids_)
+        # Up to a per-row constant, -||x - c||^2 / (2 sigma^2) == (x.c - ||c||^2 / 2) / sigma^2
+        logits = (data @ self.centroids_.T - half_norms) / sigma_sq
+        logits -= logits.max(axis=1, keepdims=True)
+        posteriors = np.exp(logits)
+        posteriors /= posteriors.sum(axis=1, keepdims=True)
+        return posteriors
+    
+    def predict_topk(
+        self,
+        embeddings: np.ndarray,
+        k: int = 3,
+        chunk_size: int = 8192
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k soft cluster assignments, computed chunk by chunk.
+        
+        Only a [chunk_size, n_clusters] posterior block exists at any time, never
+        the dense [n_sentences, n_clusters] matrix. Uses GMM responsibilities,
+        HDBSCAN membership vectors, or centroid posteriors for partitioned fits.
+        
+        Args:
+            embeddings: Numpy array of embeddings with shape [n_sentences, embedding_dim]
+            k: Number of clusters kept per sentence
+            chunk_size: Number of embeddings processed at a time
             
-        except Exception as e:
-            logger.error(f"Failed to perform clustering: {e}")
-            raise
+        Returns:
+            Tuple of (cluster IDs, probabilities), both with shape [n_sentences, k],
+            sorted by decreasing probability; unused slots hold -1 and 0
+        """
+        self._check_fitted(embeddings)
+        
+        n_samples = embeddings.shape[0]
+        top_ids = np.full((n_samples, k), -1, dtype=np.int32)
+        top_probs = np.zeros((n_samples, k), dtype=np.float32)
+        
+        for start in range(0, n_samples, chunk_size):
+            data, _ = self._prepare_data(embeddings[start:start + chunk_size])
+            if self.n_partitions:
+                posteriors = self._centroid_posteriors(data)
+                column_ids = self.centroid_ids_
+            elif self.method == 'gmm':
+                posteriors = self.clusterer.predict_proba(data)
+                column_ids = np.arange(posteriors.shape[1])
+            else:
+                posteriors = hdbscan.membership_vector(self.clusterer, data)
+                posteriors = posteriors.reshape(len(data), -1)
+                column_ids = np.arange(posteriors.shape[1])
+            
+            n_keep = min(k, posteriors.shape[1])
+            if n_keep == 0:
+                continue
+            # Unordered top-k per row, then sort only those k columns
+            candidates = np.argpartition(-posteriors, n_keep - 1, axis=1)[:, :n_keep]
+            candidate_probs = np.take_along_axis(posteriors, candidates, axis=1)
+            order = np.argsort(-candidate_probs, axis=1)
+            end = start + len(data)
+            top_ids[start:end, :n_keep] = column_ids[np.take_along_axis(candidates, order, axis=1)]
+            top_probs[start:end, :n_keep] = np.take_along_axis(candidate_probs, order, axis=1)
+        
+        return top_ids, top_probs
+    
+    def assign(self, embeddings: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+        """
+        Assign new embeddings to the clusters of the fitted model without refitting.
+        
+        Uses GMM ``predict`` or HDBSCAN ``approximate_predict`` for single-level fits,
+        and nearest-centroid assignment for partitioned fits (noise beyond the
+        cluster radius for HDBSCAN).
+        
+        Args:
+            embeddings: Numpy array of embeddings with shape [n_sentences, embedding_dim]
+            chunk_size: Number of embeddings labeled at a time
+            
+        Returns:
+            Array of cluster labels (shape: [n_sentences]), -1 for noise
+        """
+        if embeddings.size == 0:
+            logger.warning("Empty embeddings array provided")
+            return np.array([])
+        
+        self._check_fitted(embeddings)
+        
+        labels = []
+        for start in range(0, embeddings.shape[0], chunk_size):
+            data, _ = self._prepare_data(embeddings[start:start + chunk_size])
+            if self.n_partitions:
+                labels.append(self._nearest_centroid(data))
+            elif self.method == 'gmm':
+                labels.append(self.clusterer.predict(data))
+            else:
+                chunk_labels, _ = hdbscan.approximate_predict(self.clusterer, data)
+                labels.append(chunk_labels)
+        
+        cluster_labels = np.concatenate(labels).astype(np.int64)
+        logger.info(f"Assigned {len(cluster_labels)} embeddings to existing clusters")
+        return cluster_labels
+    
+    def drift_report(
+        self,
+        embeddings: np.ndarray,
+        cluster_labels: Optional[np.ndarray] = None,
+        max_distance_ratio: float = 1.25,
+        max_proportion_shift: float = 0.2,
+        max_noise_increase: float = 0.1
+    ) -> Dict[str, Any]:
+        """
+        Compare newly assigned embeddings against the statistics of the fit.
+        
+        Args:
+            embeddings: New embeddings with shape [n_sentences, embedding_dim]
+            cluster_labels: Labels from assign() (computed if None)
+            max_distance_ratio: Refit when the mean distance to the assigned centroid
+                grows by more than this factor
+            max_proportion_shift: Refit when the total variation distance between the
+                training and new cluster proportions exceeds this value
+            max_noise_increase: Refit when the noise rate grows by more than this
+                
+        Returns:
+            Dictionary of drift statistics with a ``refit_recommended`` flag
+        """
+        self._check_fitted(embeddings)
+        if cluster_labels is None:
+            cluster_labels = self.assign(embeddings)
+        
+        data, _ = self._prepare_data(embeddings)
+        distances = self._centroid_distances(data, cluster_labels)
+        mean_distance = float(distances.mean()) if len(distances) else 0.0
+        train_distance = self.train_stats_['mean_centroid_distance']
+        distance_ratio = mean_distance / train_distance if train_distance > 0 else 1.0
+        
+        train_proportions = self.train_stats_['proportions']
+        new_proportions = self._cluster_proportions(cluster_labels)
+        labels = set(train_proportions) | set(new_proportions)
+        proportion_shift = 0.5 * sum(
+            abs(train_proportions.get(label, 0.0) - new_proportions.get(label, 0.0))
+            for label in labels
+        )
+        noise_rate = float(np.mean(cluster_labels == -1))
+        noise_increase = noise_rate - self.train_stats_['noise_rate']
+        
+        report = {
+            'n_samples': int(embeddings.shape[0]),
+            'mean_centroid_distance': mean_distance,
+            'distance_ratio': distance_ratio,
+            'proportion_shift': proportion_shift,
+            'noise_rate': noise_rate,
+            'noise_increase': noise_increase,
+        }
+        if 'mean_log_likelihood' in self.train_stats_:
+            report['log_likelihood_drop'] = (
+                self.train_stats_['mean_log_likelihood'] - float(self.clusterer.score(data))
+            )
+        
+        report['refit_recommended'] = bool(
+            distance_ratio > max_distance_ratio
+            or proportion_shift > max_proportion_shift
+            or noise_increase > max_noise_increase
+        )
+        
+        log = logger.warning if report['refit_recommended'] else logger.info
+        log(
+            f"Cluster drift: distance ratio {distance_ratio:.3f}, "
+            f"proportion shift {proportion_shift:.3f}, noise rate {noise_rate:.3f}"
+            + (" - refit recommended" if report['refit_recommended'] else "")
+        )
+        return report
+    
+    def _params(self) -> Dict[str, Any]:
+        """Constructor arguments of this clusterer."""
+        params = {
+            'min_cluster_size': self.min_cluster_size,
+            'min_samples': self.min_samples,
+            'metric': self.metric,
+            'method': self.method,
+            'n_components': self.n_components,
+            'n_partitions': self.n_partitions,
+            'n_jobs': self.n_jobs,
+            'merge_threshold': self.merge_threshold,
+            'low_memory': self.low_memory,
+            'copy': self.copy,
+        }
+        # Only present when used, so fingerprints of models saved without coresets are unchanged
+        if self.coreset_size:
+            params['coreset_size'] = self.coreset_size
+            params['coreset_strategy'] = self.coreset_strategy
+        return params
+    
+    def fingerprint(self) -> Dict[str, Any]:
+        """
+        Version fingerprint of the fitted model.
+        
+        Returns:
+            Dictionary with the model format, library versions, parameters and a
+            digest of the fitted centroids
+        """
+        digest = hashlib.sha256(json.dumps(self._params(), sort_keys=True).encode())
+        if self.centroids_ is not None:
+            digest.update(np.ascontiguousarray(self.centroid_ids_).tobytes())
+            digest.update(np.ascontiguousarray(self.centroids_).tobytes())
+        if self.centroid_radii_ is not None:
+            digest.update(np.ascontiguousarray(self.centroid_radii_).tobytes())
+        
+        return {
+            'format_version': MODEL_FORMAT_VERSION,
+            'sklearn_version': sklearn.__version__,
+            'hdbscan_version': getattr(hdbscan, '__version__', 'unknown'),
+            'numpy_version': np.__version__,
+            'params': self._params(),
+            'digest': digest.hexdigest(),
+        }
+    
+    def save(self, path: str) -> Path:
+        """
+        Persist the fitted model, its normalization settings and fit statistics.
+        
+        Args:
+            path: Output file path
+            
+        Returns:
+            Path the model was written to
+        """
+        if self.train_stats_ is None:
+            raise RuntimeError("Cannot save a clusterer that has not been fitted")
+        
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        state = {
+            'fingerprint': self.fingerprint(),
+            'clusterer': self.clusterer,
+            'partitioner': self.partitioner,
+            'centroid_ids': self.centroid_ids_,
+            'centroids': self.centroids_,
+            'centroid_radii': self.centroid_radii_,
+            'train_stats': self.train_stats_,
+        }
+        with open(path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        
+        logger.info(f"Saved cluster model to {path}")
+        return path
+    
+    @classmethod
+    def load(cls, path: str) -> 'SentenceClusterer':
+        """
+        Load a clusterer saved with save().
+        
+        Args:
+            path: Path of the saved model
+            
+        Returns:
+            Fitted SentenceClusterer ready for assign()
+        """
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        
+        fingerprint = state['fingerprint']
+        if fingerprint['format_version'] != MODEL_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported cluster model format {fingerprint['format_version']} "
+                f"(expected {MODEL_FORMAT_VERSION}) in {path}"
+            )
+        if fingerprint['sklearn_version'] != sklearn.__version__:
+            logger.warning(
+                f"Cluster model was saved with scikit-learn {fingerprint['sklearn_version']}, "
+                f"running {sklearn.__version__}"
+            )
+        
+        model = cls(**fingerprint['params'])
+        model.clusterer = state['clusterer']
+        model.partitioner = state['partitioner']
+        model.centroid_ids_ = state['centroid_ids']
+        model.centroids_ = state['centroids']
+        # Absent from models saved before radii existed; they assign without a cutoff
+        model.centroid_radii_ = state.get('centroid_radii')
+        model.train_stats_ = state['train_stats']
+        
+        if model.fingerprint()['digest'] != fingerprint['digest']:
+            raise ValueError(f"Cluster model fingerprint mismatch in {path}")
+        
+        logger.info(f"Loaded {model.method} cluster model from {path} ({fingerprint['digest'][:12]})")
+        return model
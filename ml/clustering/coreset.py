@@ -0,0 +1,182 @@
+"""Representative subsamples (coresets) for fitting clusterers on large corpora."""
+
+import logging
+from typing import Any, Dict, Optional
+import numpy as np
+from sklearn.cluster import kmeans_plusplus
+from sklearn.metrics import adjusted_rand_score, normalized_mutual_info_score
+
+logger = logging.getLogger(__name__)
+
+# Coreset sampling strategies
+CORESET_STRATEGIES = ('kmeans++', 'stratified')
+
+
+def stratified_sample(strata: np.ndarray, size: int, seed: int = 42) -> np.ndarray:
+    """
+    Uniform sample within each stratum, allocated proportionally to stratum size.
+    
+    Every stratum keeps at least one row when size allows, so small source PDFs
+    are not dropped from the sample.
+    
+    Args:
+        strata: Stratum code per row (e.g. factorized source PDF)
+        size: Number of rows to sample
+        seed: Random seed
+    
+    Returns:
+        Sorted row indices
+    """
+    n = len(strata)
+    if size >= n:
+        return np.arange(n)
+    
+    rng = np.random.RandomState(seed)
+    codes, counts = np.unique(strata, return_inverse=True, return_counts=True)[1:]
+    # One row per stratum when size allows, the rest by largest-remainder allocation
+    base = 1 if size >= len(counts) else 0
+    weights = counts - base
+    exact = (size - base * len(counts)) * weights / max(weights.sum(), 1)
+    quotas = base + np.floor(exact).astype(np.int64)
+    remainder = size - quotas.sum()
+    if remainder > 0:
+        quotas[np.argsort(-(exact - np.floor(exact)), kind='stable')[:remainder]] += 1
+    quotas = np.minimum(quotas, counts)
+    
+    # Random order within each stratum, then the first quota rows of each
+    order = np.lexsort((rng.random_sample(n), codes))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rank = np.arange(n) - starts[codes[order]]
+    return np.sort(order[rank < quotas[codes[order]]])
+
+
+def importance_sample(
+    embeddings: np.ndarray,
+    size: int,
+    n_seeds: int = 64,
+    pilot_size: int = 20000,
+    normalize: bool = False,
+    seed: int = 42,
+    chunk_size: int = 65536,
+    exclude: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Sample rows with probability mixing uniform and k-means++ (D^2) importance.
+    
+    Seeds are chosen by k-means++ on a uniform pilot sample. Each row is then
+    sampled with probability 1/2n + d^2 / (2 sum d^2), where d is its distance to
+    the nearest seed, so sparse regions and small clusters are represented
+    beyond their share of the corpus.
+    
+    Args:
+        embeddings: Embeddings with shape [n_rows, embedding_dim] (may be memory-mapped)
+        size: Number of rows to sample
+        n_seeds: Number of k-means++ seeds
+        pilot_size: Rows of the uniform pilot sample the seeds are chosen from
+        normalize: Measure distances between unit-normalized rows (cosine metric)
+        seed: Random seed
+        chunk_size: Rows processed at a time
+        exclude: Row indices never sampled
+    
+    Returns:
+        Sorted row indices
+    """
+    candidates = np.ones(embeddings.shape[0], dtype=bool)
+    if exclude is not None:
+        candidates[exclude] = False
+    n = int(candidates.sum())
+    if size >= n:
+        return np.flatnonzero(candidates)
+    
+    def prepared(block: np.ndarray) -> np.ndarray:
+        block = np.asarray(block, dtype=np.float32)
+        if normalize:
+            block = block / (np.linalg.norm(block, axis=1, keepdims=True) + 1e-8)
+        return block
+    
+    rng = np.random.RandomState(seed)
+    pilot_rows = np.flatnonzero(candidates)[rng.choice(n, size=min(pilot_size, n), replace=False)]
+    pilot = prepared(embeddings[np.sort(pilot_rows)])
+    seeds, _ = kmeans_plusplus(pilot, n_clusters=min(n_seeds, len(pilot)), random_state=seed)
+    seed_sq_norms = np.einsum('ij,ij->i', seeds, seeds)
+    
+    sq_distances = np.zeros(embeddings.shape[0], dtype=np.float64)
+    for start in range(0, embeddings.shape[0], chunk_size):
+        block = prepared(embeddings[start:start + chunk_size])
+        # ||x - s||^2 = ||x||^2 - 2 x.s + ||s||^2, minimized over the seeds
+        nearest = (seed_sq_norms - 2 * block @ seeds.T).min(axis=1)
+        sq_distances[start:start + len(block)] = np.maximum(nearest + np.einsum('ij,ij->i', block, block), 0)
+    
+    sq_distances[~candidates] = 0.0
+    total = sq_distances.sum()
+    probabilities = 0.5 / n + (0.5 * sq_distances / total if total > 0 else 0.5 / n)
+    # Weighted sampling without replacement: the size smallest Exp(1) / p keys
+    keys = rng.exponential(size=embeddings.shape[0]) / probabilities
+    keys[~candidates] = np.inf
+    return np.sort(np.argpartition(keys, size - 1)[:size])
+
+
+def coreset_indices(
+    embeddings: np.ndarray,
+    size: int,
+    strategy: str = 'kmeans++',
+    strata: Optional[np.ndarray] = None,
+    normalize: bool = False,
+    seed: int = 42,
+    exclude: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Choose the rows of a coreset.
+    
+    Args:
+        embeddings: Embeddings with shape [n_rows, embedding_dim]
+        size: Coreset size
+        strategy: 'kmeans++' (importance sampling) or 'stratified' (proportional
+            per stratum, uniform if strata is None)
+        strata: Stratum code per row for the stratified strategy (e.g. source PDF)
+        normalize: Measure distances between unit-normalized rows (cosine metric)
+        seed: Random seed
+        exclude: Row indices never sampled (e.g. embeddings the encoder rejected)
+    
+    Returns:
+        Sorted row indices
+    """
+    if strategy not in CORESET_STRATEGIES:
+        raise ValueError(f"Unknown coreset strategy: {strategy}")
+    if strategy == 'kmeans++':
+        return importance_sample(embeddings, size, normalize=normalize, seed=seed, exclude=exclude)
+    if strata is None:
+        logger.warning("No strata given for the stratified coreset; sampling uniformly")
+        strata = np.zeros(embeddings.shape[0], dtype=np.int64)
+    strata = np.asarray(strata)
+    if exclude is None:
+        return stratified_sample(strata, size, seed=seed)
+    candidates = np.setdiff1d(np.arange(len(strata)), exclude)
+    return candidates[stratified_sample(strata[candidates], size, seed=seed)]
+
+
+def label_agreement(labels: np.ndarray, reference: np.ndarray) -> Dict[str, Any]:
+    """
+    Agreement between two labelings of the same rows, e.g. a coreset fit and a full fit.
+    
+    Cluster IDs need not match; both scores are invariant to relabeling.
+    
+    Args:
+        labels: Cluster labels to evaluate (-1 for noise)
+        reference: Reference cluster labels (-1 for noise)
+    
+    Returns:
+        Adjusted Rand index, normalized mutual information, and the cluster and
+        noise counts of both labelings
+    """
+    if len(labels) != len(reference):
+        raise ValueError(f"Got {len(labels)} labels and {len(reference)} reference labels")
+    return {
+        'n_samples': int(len(labels)),
+        'adjusted_rand_index': round(float(adjusted_rand_score(reference, labels)), 4),
+        'normalized_mutual_info': round(float(normalized_mutual_info_score(reference, labels)), 4),
+        'n_clusters': int(len(np.unique(labels[labels >= 0]))),
+        'n_clusters_reference': int(len(np.unique(reference[reference >= 0]))),
+        'noise_rate': round(float(np.mean(labels == -1)), 4),
+        'noise_rate_reference': round(float(np.mean(reference == -1)), 4),
+    }
@@ -0,0 +1,303 @@
+"""Vectorized per-cluster summaries for reviewing weak labels."""
+
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+logger = logging.getLogger(__name__)
+
+# Rows of the embedding matrix processed at a time
+_CHUNK = 65536
+
+
+def _membership(codes: np.ndarray, n_groups: int) -> sparse.csr_matrix:
+    """Sparse [n_groups, n_rows] indicator matrix of group codes (rows with code -1 are left out)."""
+    rows = np.flatnonzero(codes >= 0)
+    return sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (codes[rows], rows)),
+        shape=(n_groups, len(codes))
+    )
+
+
+def _centroid_similarities(
+    codes: np.ndarray,
+    n_clusters: int,
+    embeddings: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Unit-norm cluster centroids and each sentence's cosine similarity to its centroid.
+    
+    Two chunked passes over the (possibly memory-mapped) embeddings: one sparse
+    matrix product for the centroid sums, then one row-wise dot product.
+    
+    Args:
+        codes: Cluster index in [0, n_clusters) per sentence, -1 for noise
+        n_clusters: Number of clusters
+        embeddings: Embeddings with shape [n_sentences, embedding_dim]
+    
+    Returns:
+        Tuple of (centroids [n_clusters, embedding_dim], similarities [n_sentences],
+        NaN for noise)
+    """
+    sums = np.zeros((n_clusters, embeddings.shape[1]), dtype=np.float64)
+    for start in range(0, len(codes), _CHUNK):
+        block = np.asarray(embeddings[start:start + _CHUNK], dtype=np.float32)
+        block = block / np.maximum(np.linalg.norm(block, axis=1, keepdims=True), 1e-12)
+        sums += _membership(codes[start:start + len(block)], n_clusters) @ block
+    centroids = (sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)).astype(np.float32)
+    
+    similarities = np.full(len(codes), np.nan, dtype=np.float32)
+    for start in range(0, len(codes), _CHUNK):
+        block = np.asarray(embeddings[start:start + _CHUNK], dtype=np.float32)
+        block = block / np.maximum(np.linalg.norm(block, axis=1, keepdims=True), 1e-12)
+        block_codes = codes[start:start + len(block)]
+        assigned = block_codes >= 0
+        similarities[start:start + len(block)][assigned] = np.einsum(
+            'ij,ij->i', block[assigned], centroids[block_codes[assigned]]
+        )
+    return centroids, similarities
+
+
+def _distinctive_terms(
+    texts: pd.Series,
+    codes: np.ndarray,
+    n_clusters: int,
+    n_terms: int,
+    ngram_range: Tuple[int, int],
+    min_df: int,
+    max_features: int
+) -> List[List[Dict[str, Any]]]:
+    """
+    Top n-grams of each cluster by class-based TF-IDF.
+    
+    Sentences are counted into a sparse document-term matrix, which a sparse
+    product turns into cluster-term counts. A term scores high for a cluster when
+    it is frequent in the cluster relative to its frequency across all clusters.
+    
+    Args:
+        texts: Sentence texts
+        codes: Cluster index per sentence, -1 for noise
+        n_clusters: Number of clusters
+        n_terms: Terms kept per cluster
+        ngram_range: Range of n-gram lengths
+        min_df: Minimum number of sentences containing a term
+        max_features: Maximum vocabulary size (most frequent terms)
+    
+    Returns:
+        Per cluster, a list of {'term', 'score'} with the highest score first
+    """
+    vectorizer = CountVectorizer(
+        ngram_range=ngram_range,
+        stop_words='english',
+        min_df=min(min_df, max(1, len(texts) // 2)),
+        max_features=max_features,
+        binary=True,
+        dtype=np.float32
+    )
+    try:
+        doc_terms = vectorizer.fit_transform(texts.fillna('').astype(str))
+    except ValueError:
+        logger.warning("No terms left after filtering; skipping distinctive n-grams")
+        return [[] for _ in range(n_clusters)]
+    vocabulary = vectorizer.get_feature_names_out()
+    
+    cluster_terms = (_membership(codes, n_clusters) @ doc_terms).tocsr()
+    term_totals = np.asarray(cluster_terms.sum(axis=0)).ravel()
+    cluster_totals = np.asarray(cluster_terms.sum(axis=1)).ravel()
+    # c-TF-IDF: term frequency within the cluster times log(1 + mean cluster size / term frequency)
+    idf = np.log1p(cluster_totals.mean() / np.maximum(term_totals, 1.0))
+    tf = sparse.diags(1.0 / np.maximum(cluster_totals, 1.0)) @ cluster_terms
+    scores = (tf @ sparse.diags(idf)).tocsr()
+    
+    terms = []
+    for cluster in range(n_clusters):
+        start, end = scores.indptr[cluster], scores.indptr[cluster + 1]
+        row_scores, row_terms = scores.data[start:end], scores.indices[start:end]
+        keep = min(n_terms, len(row_scores))
+        top = np.argpartition(-row_scores, keep - 1)[:keep] if keep else np.array([], dtype=int)
+        top = top[np.argsort(-row_scores[top])]
+        terms.append([
+            {'term': str(vocabulary[row_terms[i]]), 'score': round(float(row_scores[i]), 5)}
+            for i in top
+        ])
+    return terms
+
+
+def _pdf_spread(codes: np.ndarray, pdfs: pd.Series, n_clusters: int, n_top: int) -> List[Dict[str, Any]]:
+    """
+    How the sentences of each cluster spread over source PDFs.
+    
+    Args:
+        codes: Cluster index per sentence, -1 for noise
+        pdfs: Source PDF per sentence
+        n_clusters: Number of clusters
+        n_top: PDFs listed per cluster
+    
+    Returns:
+        Per cluster: number of PDFs, normalized entropy of the PDF distribution
+        (0 = one PDF, 1 = spread evenly over its PDFs), share of the largest PDF
+        and the n_top largest PDFs
+    """
+    pdf_codes, pdf_names = pd.factorize(pdfs.fillna(''), sort=False)
+    assigned = codes >= 0
+    pairs, counts = np.unique(
+        codes[assigned].astype(np.int64) * len(pdf_names) + pdf_codes[assigned],
+        return_counts=True
+    )
+    pair_clusters, pair_pdfs = pairs // len(pdf_names), pairs % len(pdf_names)
+    
+    sizes = np.bincount(pair_clusters, weights=counts, minlength=n_clusters)
+    shares = counts / sizes[pair_clusters]
+    entropy = -np.bincount(pair_clusters, weights=shares * np.log(shares), minlength=n_clusters)
+    n_pdfs = np.bincount(pair_clusters, minlength=n_clusters)
+    max_entropy = np.log(np.maximum(n_pdfs, 2))
+    
+    # Pairs sorted by cluster, then by decreasing count
+    order = np.lexsort((-counts, pair_clusters))
+    starts = np.searchsorted(pair_clusters[order], np.arange(n_clusters))
+    spread = []
+    for cluster in range(n_clusters):
+        top = order[starts[cluster]:starts[cluster] + min(n_top, n_pdfs[cluster])]
+        spread.append({
+            'n_pdfs': int(n_pdfs[cluster]),
+            'pdf_entropy': round(float(entropy[cluster] / max_entropy[cluster]), 4) if n_pdfs[cluster] > 1 else 0.0,
+            'top_pdf_share': round(float(shares[top[0]]), 4) if len(top) else 0.0,
+            'top_pdfs': [{'source_pdf': str(pdf_names[pair_pdfs[i]]), 'count': int(counts[i])} for i in top],
+        })
+    return spread
+
+
+def summarize_clusters(
+    sentences_df: pd.DataFrame,
+    embeddings: np.ndarray,
+    cluster_labels: Optional[np.ndarray] = None,
+    n_representatives: int = 5,
+    n_terms: int = 10,
+    n_top_pdfs: int = 3,
+    ngram_range: Tuple[int, int] = (1, 2),
+    min_df: int = 2,
+    max_features: int = 200_000
+) -> Dict[str, Any]:
+    """
+    Summarize every cluster for weak-label review.
+    
+    Everything is computed with chunked matrix operations over the embeddings
+    and one sparse document-term matrix, so the cost grows linearly with the
+    number of sentences.
+    
+    Args:
+        sentences_df: Sentences with sentence_id, sentence_text and source_pdf
+            (and cluster_id unless cluster_labels is given)
+        embeddings: Embeddings with shape [n_sentences, embedding_dim] (may be memory-mapped)
+        cluster_labels: Cluster label per sentence, -1 for noise (defaults to
+            the cluster_id column)
+        n_representatives: Sentences nearest to the centroid listed per cluster
+        n_terms: Distinctive n-grams listed per cluster
+        n_top_pdfs: Largest source PDFs listed per cluster
+        ngram_range: Range of n-gram lengths for the distinctive terms
+        min_df: Minimum number of sentences containing an n-gram
+        max_features: Maximum n-gram vocabulary size
+    
+    Returns:
+        Summary with corpus totals and one entry per cluster, largest first:
+        cluster_id, size, share, cohesion (mean cosine similarity to the
+        centroid), representatives, terms and source-PDF spread
+    """
+    started = time.perf_counter()
+    labels = np.asarray(sentences_df['cluster_id'] if cluster_labels is None else cluster_labels)
+    if len(labels) != embeddings.shape[0] or len(labels) != len(sentences_df):
+        raise ValueError(
+            f"Got {len(sentences_df)} sentences, {len(labels)} labels and {embeddings.shape[0]} embeddings"
+        )
+    
+    cluster_ids, inverse = np.unique(labels, return_inverse=True)
+    has_noise = len(cluster_ids) > 0 and cluster_ids[0] == -1
+    # Cluster index per sentence in [0, n_clusters), -1 for noise
+    codes = inverse.astype(np.int64) - (1 if has_noise else 0)
+    if has_noise:
+        cluster_ids = cluster_ids[1:]
+    n_clusters = len(cluster_ids)
+    
+    sizes = np.bincount(codes[codes >= 0], minlength=n_clusters)
+    centroids, similarities = _centroid_similarities(codes, n_clusters, embeddings)
+    cohesion = np.bincount(
+        codes[codes >= 0], weights=similarities[codes >= 0], minlength=n_clusters
+    ) / np.maximum(sizes, 1)
+    
+    # Sentences sorted by cluster, most central first; the first rows of each cluster represent it
+    assigned = np.flatnonzero(codes >= 0)
+    order = assigned[np.lexsort((-similarities[assigned], codes[assigned]))]
+    starts = np.searchsorted(codes[order], np.arange(n_clusters))
+    
+    terms = _distinctive_terms(
+        sentences_df['sentence_text'], codes, n_clusters, n_terms, ngram_range, min_df, max_features
+    )
+    spread = _pdf_spread(codes, sentences_df['source_pdf'], n_clusters, n_top_pdfs)
+    
+    texts = sentences_df['sentence_text'].to_numpy()
+    sentence_ids = sentences_df['sentence_id'].to_numpy()
+    clusters = []
+    for cluster in np.argsort(-sizes, kind='stable'):
+        representatives = []
+        seen = set()
+        # Skip repeated texts so duplicates do not crowd out the other representatives
+        for row in order[starts[cluster]:starts[cluster] + sizes[cluster]]:
+            if texts[row] in seen:
+                continue
+            seen.add(texts[row])
+            representatives.append({
+                'sentence_id': int(sentence_ids[row]),
+                'sentence_text': str(texts[row]),
+                'similarity': round(float(similarities[row]), 4),
+            })
+            if len(representatives) == n_representatives:
+                break
+        clusters.append({
+            'cluster_id': int(cluster_ids[cluster]),
+            'size': int(sizes[cluster]),
+            'share': round(float(sizes[cluster] / len(labels)), 5),
+            'cohesion': round(float(cohesion[cluster]), 4),
+            'representatives': representatives,
+            'terms': terms[cluster],
+            **spread[cluster],
+        })
+    
+    summary = {
+        'n_sentences': int(len(labels)),
+        'n_clusters': int(n_clusters),
+        'n_noise': int((codes < 0).sum()),
+        'mean_cohesion': round(float(np.nanmean(similarities)), 4) if n_clusters else None,
+        'clusters': clusters,
+    }
+    logger.info(
+        f"Summarized {n_clusters} clusters of {len(labels)} sentences "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    return summary
+
+
+def save_cluster_summary(path: Path, summary: Dict[str, Any]) -> Path:
+    """
+    Write a cluster summary as JSON.
+    
+    Args:
+        path: Output file path
+        summary: Output of summarize_clusters()
+    
+    Returns:
+        Path the summary was written to
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=1, ensure_ascii=False)
+    tmp_path.replace(path)
+    logger.info(f"Saved summary of {summary['n_clusters']} clusters to {path}")
+    return path
@@ -0,0 +1,212 @@
+"""Parallel clustering parameter sweeps over one shared embedding matrix."""
+
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from sklearn.metrics import calinski_harabasz_score, davies_bouldin_score, silhouette_score
+from threadpoolctl import threadpool_limits
+
+from clustering.clusterer import SentenceClusterer
+
+logger = logging.getLogger(__name__)
+
+# Parameters that affect each method; the others are dropped so equivalent configurations run once
+METHOD_PARAMS = {
+    'gmm': ('n_components', 'metric'),
+    'hdbscan': ('min_cluster_size', 'min_samples', 'metric'),
+}
+
+# Worker-process state: the attached shared memory block and the array view onto it
+_shared_block: Optional[shared_memory.SharedMemory] = None
+_shared_embeddings: Optional[np.ndarray] = None
+
+
+def parameter_grid(
+    methods: Sequence[str] = ('gmm',),
+    n_components: Sequence[Optional[int]] = (None,),
+    min_cluster_size: Sequence[int] = (10,),
+    min_samples: Sequence[int] = (5,),
+    metrics: Sequence[str] = ('cosine',)
+) -> List[Dict[str, Any]]:
+    """
+    Expand parameter lists into the distinct clustering configurations.
+    
+    Args:
+        methods: Clustering methods ('gmm', 'hdbscan')
+        n_components: GMM component counts (None for the sample-size heuristic of
+            SentenceClusterer._determine_n_components())
+        min_cluster_size: HDBSCAN minimum cluster sizes
+        min_samples: HDBSCAN minimum samples
+        metrics: Distance metrics ('euclidean', 'cosine')
+    
+    Returns:
+        SentenceClusterer keyword arguments, one dictionary per configuration
+    """
+    values = {
+        'n_components': list(n_components),
+        'min_cluster_size': list(min_cluster_size),
+        'min_samples': list(min_samples),
+        'metric': list(metrics),
+    }
+    
+    configs = []
+    seen = set()
+    for method in methods:
+        if method not in METHOD_PARAMS:
+            raise ValueError(f"Unknown clustering method: {method}")
+        names = METHOD_PARAMS[method]
+        for combination in itertools.product(*(values[name] for name in names)):
+            config = {'method': method, **dict(zip(names, combination))}
+            key = tuple(sorted(config.items(), key=lambda item: item[0]))
+            if key not in seen:
+                seen.add(key)
+                configs.append(config)
+    return configs
+
+
+def _attach_shared(name: str, shape: tuple, dtype: str):
+    """Attach a worker process to the shared embedding matrix (process pool initializer)."""
+    global _shared_block, _shared_embeddings
+    # Workers share the parent's resource tracker; the parent owns and unlinks the block
+    _shared_block = shared_memory.SharedMemory(name=name)
+    _shared_embeddings = np.ndarray(shape, dtype=np.dtype(dtype), buffer=_shared_block.buf)
+    _shared_embeddings.flags.writeable = False
+    logging.getLogger('clustering').setLevel(logging.WARNING)
+
+
+def _quality_scores(data: np.ndarray, labels: np.ndarray, metric: str, silhouette_sample: int) -> Dict[str, float]:
+    """
+    Internal quality scores of a clustering, computed over non-noise points.
+    
+    Args:
+        data: Embeddings with shape [n_sentences, embedding_dim]
+        labels: Cluster labels (-1 for noise)
+        metric: Distance metric used for the silhouette score
+        silhouette_sample: Maximum number of points sampled for the silhouette score
+    
+    Returns:
+        Dictionary with 'silhouette', 'davies_bouldin' and 'calinski_harabasz'
+        (NaN when fewer than two clusters remain)
+    """
+    assigned = labels >= 0
+    if len(np.unique(labels[assigned])) < 2:
+        return {'silhouette': np.nan, 'davies_bouldin': np.nan, 'calinski_harabasz': np.nan}
+    
+    points = data[assigned]
+    point_labels = labels[assigned]
+    return {
+        'silhouette': float(silhouette_score(
+            points, point_labels, metric=metric,
+            sample_size=min(silhouette_sample, len(points)), random_state=0
+        )),
+        'davies_bouldin': float(davies_bouldin_score(points, point_labels)),
+        'calinski_harabasz': float(calinski_harabasz_score(points, point_labels)),
+    }
+
+
+def _run_config(config: Dict[str, Any], n_threads: int, silhouette_sample: int) -> Dict[str, Any]:
+    """
+    Fit one configuration on the shared embeddings (runs in a worker process).
+    
+    Args:
+        config: SentenceClusterer keyword arguments
+        n_threads: Number of BLAS/OpenMP threads the worker may use
+        silhouette_sample: Maximum number of points sampled for the silhouette score
+    
+    Returns:
+        Result row with the configuration, runtime, cluster count, noise rate,
+        peak clustering memory and quality scores
+    """
+    data = _shared_embeddings
+    row: Dict[str, Any] = dict(config)
+    started = time.perf_counter()
+    try:
+        with threadpool_limits(limits=n_threads):
+            clusterer = SentenceClusterer(**config, low_memory=True)
+            labels = clusterer.fit_predict(data)
+            row['runtime_seconds'] = time.perf_counter() - started
+            row['n_clusters'] = int(len(np.unique(labels[labels >= 0])))
+            row['noise_rate'] = float(np.mean(labels == -1))
+            row['peak_memory_bytes'] = clusterer.peak_memory_bytes_
+            row.update(_quality_scores(data, labels, config.get('metric', 'euclidean'), silhouette_sample))
+        row['status'] = 'ok'
+    except Exception as e:
+        row['runtime_seconds'] = time.perf_counter() - started
+        row['status'] = f"failed: {type(e).__name__}: {e}"
+    return row
+
+
+def run_sweep(
+    embeddings: np.ndarray,
+    configs: List[Dict[str, Any]],
+    n_jobs: Optional[int] = None,
+    silhouette_sample: int = 10000
+) -> pd.DataFrame:
+    """
+    Fit every configuration in parallel on one shared copy of the embeddings.
+    
+    The embeddings are copied once into a shared memory block that all workers
+    map read-only, so memory does not grow with the number of workers.
+    
+    Args:
+        embeddings: Embeddings with shape [n_sentences, embedding_dim]
+        configs: Configurations, e.g. from parameter_grid()
+        n_jobs: Worker processes (CPU count if None)
+        silhouette_sample: Maximum number of points sampled for the silhouette score
+    
+    Returns:
+        DataFrame with one row per configuration, best silhouette score first
+    """
+    if not configs:
+        raise ValueError("No configurations to sweep")
+    
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(configs))
+    n_threads = max(1, (os.cpu_count() or 1) // n_jobs)
+    
+    logger.info(
+        f"Sweeping {len(configs)} configurations over {embeddings.shape[0]} embeddings "
+        f"({n_jobs} workers, {n_threads} threads each)"
+    )
+    
+    block = shared_memory.SharedMemory(create=True, size=max(embeddings.nbytes, 1))
+    try:
+        shared = np.ndarray(embeddings.shape, dtype=embeddings.dtype, buffer=block.buf)
+        shared[:] = embeddings
+        del shared
+        
+        rows = []
+        with ProcessPoolExecutor(
+            max_workers=n_jobs,
+            initializer=_attach_shared,
+            initargs=(block.name, embeddings.shape, embeddings.dtype.str)
+        ) as executor:
+            futures = [executor.submit(_run_config, config, n_threads, silhouette_sample) for config in configs]
+            for future in as_completed(futures):
+                row = future.result()
+                rows.append(row)
+                params = ', '.join(f"{name}={row[name]}" for name in METHOD_PARAMS[row['method']])
+                logger.info(
+                    f"[{len(rows)}/{len(configs)}] {row['method']} ({params}): "
+                    f"{row['status']} in {row['runtime_seconds']:.1f}s"
+                )
+    finally:
+        block.close()
+        block.unlink()
+    
+    columns = [
+        'method', 'metric', 'n_components', 'min_cluster_size', 'min_samples',
+        'n_clusters', 'noise_rate', 'silhouette', 'davies_bouldin', 'calinski_harabasz',
+        'runtime_seconds', 'peak_memory_bytes', 'status'
+    ]
+    results = pd.DataFrame(rows).reindex(columns=columns)
+    for column in ('n_components', 'min_cluster_size', 'min_samples', 'n_clusters', 'peak_memory_bytes'):
+        # Nullable integers: parameters that do not apply to a method stay empty
+        results[column] = results[column].astype('Int64')
+    return results.sort_values('silhouette', ascending=False, na_position='last').reset_index(drop=True)
@@ -0,0 +1,138 @@
+"""Local PDF source for ingesting PDFs from directories or glob patterns."""
+
+import glob
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Filenames written by PDFScraper for arXiv PDFs, including its conflict suffix (arxiv_<id>_1.pdf)
+ARXIV_FILENAME = re.compile(r'^arxiv_(\d{4}\.\d{4,5}(?:v\d+)?)(?:_\d+)?\.pdf$', re.IGNORECASE)
+
+
+def source_url_for(path: Path) -> str:
+    """
+    Recover the source URL of a local PDF from its filename.
+    
+    Args:
+        path: PDF path
+    
+    Returns:
+        The arXiv PDF URL for files named like arxiv_2106.02076.pdf, otherwise
+        the file:// URI of the PDF
+    """
+    match = ARXIV_FILENAME.match(path.name)
+    if match:
+        return f"https://arxiv.org/pdf/{match.group(1)}.pdf"
+    return path.resolve().as_uri()
+
+
+class LocalPDFSource:
+    """Discovers PDFs in local directories or glob patterns; a drop-in replacement for PDFScraper."""
+    
+    def __init__(self, sources: Sequence[str], recursive: bool = False):
+        """
+        Initialize the local PDF source.
+        
+        Args:
+            sources: Directories, PDF files or glob patterns (e.g. 'data/raw_pdfs/arxiv_21*.pdf')
+            recursive: Also search subdirectories of directory sources
+        """
+        self.sources = [str(source) for source in sources]
+        self.recursive = recursive
+    
+    def _iter_directory(self, directory: Path) -> Iterator[Path]:
+        """Yield the PDFs of a directory in sorted order, one directory at a time."""
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith('.pdf'):
+                    yield Path(root) / name
+            if not self.recursive:
+                break
+    
+    def iter_paths(self) -> Iterator[Path]:
+        """
+        Discover PDF paths lazily, in a deterministic order.
+        
+        Sources are visited in the given order and the files of each source in
+        sorted order. A file matched by several sources is yielded once.
+        
+        Yields:
+            Path of each PDF
+        """
+        seen = set()
+        for source in self.sources:
+            path = Path(source)
+            if path.is_dir():
+                candidates = self._iter_directory(path)
+            elif path.is_file():
+                candidates = iter([path])
+            elif glob.has_magic(source):
+                candidates = (
+                    Path(match) for match in sorted(glob.iglob(source, recursive=True))
+                    if match.lower().endswith('.pdf') and os.path.isfile(match)
+                )
+            else:
+                logger.warning(f"Local PDF source not found: {source}")
+                continue
+            
+            for candidate in candidates:
+                resolved = candidate.resolve()
+                if resolved in seen:
+                    continue
+                seen.add(resolved)
+                yield candidate
+    
+    def iter_scrape(
+        self,
+        target_url: Optional[str] = None,
+        url_filter: Optional[Callable[[str], bool]] = None
+    ) -> Iterator[Dict[str, str]]:
+        """
+        Yield metadata of each local PDF as soon as it is discovered.
+        
+        Args:
+            target_url: Ignored; accepted for compatibility with PDFScraper
+            url_filter: Only yield PDFs whose source URL passes this filter (all if None)
+        
+        Yields:
+            Metadata about each PDF in the format of PDFScraper:
+            {'url': str, 'local_path': str, 'download_timestamp': str}
+        """
+        logger.info(f"Discovering local PDFs in {', '.join(self.sources)}")
+        n_found = 0
+        
+        for path in self.iter_paths():
+            url = source_url_for(path)
+            if url_filter is not None and not url_filter(url):
+                continue
+            n_found += 1
+            yield {
+                'url': url,
+                'local_path': str(path),
+                'download_timestamp': path.stat().st_mtime
+            }
+        
+        logger.info(f"Found {n_found} local PDF files")
+    
+    def scrape(
+        self,
+        target_url: Optional[str] = None,
+        url_filter: Optional[Callable[[str], bool]] = None
+    ) -> List[Dict[str, str]]:
+        """
+        List metadata of all local PDFs.
+        
+        Args:
+            target_url: Ignored; accepted for compatibility with PDFScraper
+            url_filter: Only list PDFs whose source URL passes this filter (all if None)
+        
+        Returns:
+            List of dictionaries with metadata about the PDFs:
+            [{'url': str, 'local_path': str, 'download_timestamp': str}]
+        """
+        return list(self.iter_scrape(target_url, url_filter))
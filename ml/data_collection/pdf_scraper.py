@@ -5,7 +5,7 @@ import hashlib
 import logging
 import re
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, Iterator, List, Dict, Optional
 from urllib.parse import urljoin, urlparse
 import requests
 from bs4 import BeautifulSoup
@@ -219,30 +219,56 @@ class PDFScraper:
             logger.error(f"Failed to save PDF from {url}: {e}")
             return None
     
-    def scrape(self, target_url: str) -> List[Dict[str, str]]:
+    def iter_scrape(
+        self,
+        target_url: str,
+        url_filter: Optional[Callable[[str], bool]] = None
+    ) -> Iterator[Dict[str, str]]:
         """
-        Scrape PDFs from a target URL.
+        Scrape PDFs from a target URL, yielding each PDF as soon as it is downloaded.
         
         Args:
             target_url: URL to crawl for PDFs
+            url_filter: Only download PDF URLs for which this returns True (all if None)
             
-        Returns:
-            List of dictionaries with metadata about downloaded PDFs:
-            [{'url': str, 'local_path': str, 'download_timestamp': str}]
+        Yields:
+            Metadata about each downloaded PDF:
+            {'url': str, 'local_path': str, 'download_timestamp': str}
         """
         logger.info(f"Starting PDF scraping from {target_url}")
         
         pdf_urls = self._discover_pdf_urls(target_url)
-        downloaded_files = []
+        if url_filter is not None:
+            pdf_urls = [url for url in pdf_urls if url_filter(url)]
+            logger.info(f"{len(pdf_urls)} PDF URLs selected for download")
+        n_downloaded = 0
         
         for url in pdf_urls:
             filepath = self._download_pdf(url)
             if filepath:
-                downloaded_files.append({
+                n_downloaded += 1
+                yield {
                     'url': url,
                     'local_path': str(filepath),
                     'download_timestamp': filepath.stat().st_mtime
-                })
+                }
+        
+        logger.info(f"Downloaded {n_downloaded} PDF files")
+    
+    def scrape(
+        self,
+        target_url: str,
+        url_filter: Optional[Callable[[str], bool]] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Scrape PDFs from a target URL.
         
-        logger.info(f"Downloaded {len(downloaded_files)} PDF files")
-        return downloaded_files
+        Args:
+            target_url: URL to crawl for PDFs
+            url_filter: Only download PDF URLs for which this returns True (all if None)
+            
+        Returns:
+            List of dictionaries with metadata about downloaded PDFs:
+            [{'url': str, 'local_path': str, 'download_timestamp': str}]
+        """
+        return list(self.iter_scrape(target_url, url_filter))
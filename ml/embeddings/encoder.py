@@ -1,28 +1,146 @@
 """Sentence embedding encoder module."""
 
+import argparse
+import json
 import logging
-from typing import List
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
 import numpy as np
+import torch
 from sentence_transformers import SentenceTransformer
 
 logger = logging.getLogger(__name__)
 
+# How sentences longer than max_seq_length are encoded
+LONG_POLICIES = ('truncate', 'window', 'reject')
+
+# Token lengths above this are counted in the last histogram bin
+_MAX_TRACKED_LENGTH = 8192
+
+# Sentences tokenized per tokenizer call when measuring lengths
+_TOKENIZE_BATCH = 4096
+
+# Most sentences whose token lengths determine a max_seq_length='auto' cap
+_AUTO_SAMPLE_SIZE = 100_000
+
+# Encoder settings saved next to the cluster model, so later runs encode like the first
+ENCODER_SETTINGS_NAME = "encoder.json"
+
+
+def parse_max_seq_length(value: str) -> Union[int, str]:
+    """
+    Parse a --max-seq-length command line value.
+    
+    Args:
+        value: Number of tokens or 'auto'
+    
+    Returns:
+        The integer cap or 'auto'
+    """
+    if value == 'auto':
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number of tokens or 'auto', got {value!r}")
+
+
+def save_encoder_settings(path: str, settings: Dict[str, Any]) -> Path:
+    """
+    Save the encoder settings a corpus was encoded with.
+    
+    Args:
+        path: Output JSON file (ENCODER_SETTINGS_NAME next to the cluster model)
+        settings: Output of SentenceEncoder.settings()
+    
+    Returns:
+        Path of the settings file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(settings, f, indent=2)
+    logger.info(f"Saved encoder settings to {path}")
+    return path
+
+
+def load_encoder_settings(path: str) -> Dict[str, Any]:
+    """
+    Load the encoder settings saved by save_encoder_settings().
+    
+    Args:
+        path: Settings JSON file
+    
+    Returns:
+        SentenceEncoder keyword arguments (empty if the file does not exist)
+    """
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
 
 class SentenceEncoder:
     """Generates semantic embeddings for sentences."""
     
-    def __init__(self, model_name: str = "sentence-transformers/all-mpnet-base-v2", batch_size: int = 32):
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-mpnet-base-v2",
+        batch_size: int = 32,
+        max_seq_length: Optional[Union[int, str]] = None,
+        long_policy: str = 'truncate',
+        length_quantile: float = 0.99,
+        max_windows: int = 8,
+        num_threads: Optional[int] = None
+    ):
         """
         Initialize the sentence encoder.
         
         Args:
             model_name: Name of the sentence transformer model
             batch_size: Batch size for encoding
+            max_seq_length: Longest sequence encoded in one pass, in tokens including
+                special tokens. None keeps the model's limit; 'auto' lowers it to the
+                length_quantile of a corpus (rounded up to a multiple of 16), never
+                above the model's limit, once resolve_max_seq_length() is called on it
+            long_policy: What happens to sentences longer than max_seq_length:
+                'truncate' encodes the first max_seq_length tokens, 'window' encodes
+                consecutive windows of max_seq_length tokens and mean-pools them
+                (weighted by window length), 'reject' returns a zero vector
+            length_quantile: Quantile of the token lengths used by max_seq_length='auto'
+            max_windows: Most windows encoded per sentence with long_policy='window';
+                longer sentences are covered by evenly spaced windows
+            num_threads: Threads torch uses for encoding on the CPU (torch's default if None);
+                the setting applies to the whole process
         """
+        if long_policy not in LONG_POLICIES:
+            raise ValueError(f"Unknown long_policy: {long_policy}")
+        if isinstance(max_seq_length, str) and max_seq_length != 'auto':
+            raise ValueError(f"max_seq_length must be an integer, None or 'auto', got {max_seq_length!r}")
+        
         self.model_name = model_name
         self.batch_size = batch_size
+        self.max_seq_length = max_seq_length
+        self.long_policy = long_policy
+        self.length_quantile = length_quantile
+        self.max_windows = max_windows
+        self.num_threads = num_threads
+        if num_threads:
+            self.set_num_threads(num_threads)
         self.model = None
         self._load_model()
+        
+        self.model_max_seq_length = int(getattr(self.model, 'max_seq_length', None) or 512)
+        self.tokenizer = getattr(self.model, 'tokenizer', None)
+        self.n_special_tokens = (
+            self.tokenizer.num_special_tokens_to_add(pair=False) if self.tokenizer is not None else 0
+        )
+        if self.tokenizer is None and (max_seq_length is not None or long_policy != 'truncate'):
+            logger.warning(f"Model {self.model_name} exposes no tokenizer; sequence lengths are not managed")
+        if isinstance(max_seq_length, int):
+            self._set_max_seq_length(max_seq_length)
+        self.reset_length_stats()
     
     def _load_model(self):
         """Load the sentence transformer model."""
@@ -34,15 +152,228 @@ class SentenceEncoder:
             logger.error(f"Failed to load model {self.model_name}: {e}")
             raise
     
-    def encode(self, sentences: List[str]) -> np.ndarray:
+    def set_num_threads(self, num_threads: int):
+        """
+        Set the number of threads torch uses for encoding on the CPU.
+        
+        Args:
+            num_threads: Number of intra-op threads (applies to the whole process)
+        """
+        torch.set_num_threads(num_threads)
+        self.num_threads = num_threads
+    
+    def _set_max_seq_length(self, max_seq_length: int):
+        """Apply a sequence length cap, which may not exceed the model's own limit."""
+        if max_seq_length <= self.n_special_tokens:
+            raise ValueError(f"max_seq_length must exceed the {self.n_special_tokens} special tokens")
+        if max_seq_length > self.model_max_seq_length:
+            logger.warning(
+                f"max_seq_length {max_seq_length} exceeds the model limit; using {self.model_max_seq_length}"
+            )
+            max_seq_length = self.model_max_seq_length
+        self.max_seq_length = max_seq_length
+        self.model.max_seq_length = max_seq_length
+    
+    def resolve_max_seq_length(self, sentences: List[str], seed: int = 0) -> Optional[int]:
+        """
+        Replace max_seq_length='auto' by a cap derived from the token lengths of a corpus.
+        
+        The cap is resolved once for the whole corpus, so every sentence of it is
+        encoded under the same cap. Later runs and the inference service load the
+        resolved cap (see save_encoder_settings()) instead of resolving it again.
+        
+        Args:
+            sentences: All sentences of the corpus (a uniform sample of up to
+                100,000 is measured)
+            seed: Random seed of the sample
+        
+        Returns:
+            The resolved cap in tokens (None if the model exposes no tokenizer)
+        """
+        if self.max_seq_length != 'auto':
+            return self.max_seq_length
+        if self.tokenizer is None or not sentences:
+            self.max_seq_length = None
+            return None
+        
+        if len(sentences) > _AUTO_SAMPLE_SIZE:
+            sample = np.random.RandomState(seed).choice(len(sentences), _AUTO_SAMPLE_SIZE, replace=False)
+            sentences = [sentences[i] for i in np.sort(sample)]
+        quantile = np.quantile(self.token_lengths(sentences), self.length_quantile) + self.n_special_tokens
+        self._set_max_seq_length(min(self.model_max_seq_length, max(32, int(np.ceil(quantile / 16)) * 16)))
+        logger.info(
+            f"Capping sequences at {self.max_seq_length} tokens "
+            f"({self.length_quantile:.0%} of {len(sentences)} measured sentences fit)"
+        )
+        return self.max_seq_length
+    
+    def settings(self) -> Dict[str, Any]:
+        """
+        Settings that determine the embeddings, for save_encoder_settings().
+        
+        Returns:
+            model_name, max_seq_length (resolved; None for the model's limit) and long_policy
+        """
+        if self.max_seq_length == 'auto':
+            raise RuntimeError("max_seq_length='auto' has not been resolved")
+        return {
+            'model_name': self.model_name,
+            'max_seq_length': self.max_seq_length,
+            'long_policy': self.long_policy,
+        }
+    
+    def reset_length_stats(self):
+        """Clear the token length statistics accumulated by encode()."""
+        self._length_counts = np.zeros(_MAX_TRACKED_LENGTH + 1, dtype=np.int64)
+        self._stats = {
+            'n_long': 0,
+            'n_rejected': 0,
+            'n_windows': 0,
+            # Sums of sequence lengths (linear cost) and squared lengths (attention cost)
+            'baseline_tokens': 0,
+            'baseline_attention': 0,
+            'encoded_tokens': 0,
+            'encoded_attention': 0,
+        }
+    
+    def token_lengths(self, sentences: List[str]) -> np.ndarray:
+        """
+        Count the tokens of each sentence, without special tokens or truncation.
+        
+        Args:
+            sentences: List of sentence strings
+        
+        Returns:
+            Token counts with shape [n_sentences]
+        """
+        lengths = np.empty(len(sentences), dtype=np.int64)
+        for start in range(0, len(sentences), _TOKENIZE_BATCH):
+            batch = sentences[start:start + _TOKENIZE_BATCH]
+            input_ids = self.tokenizer(
+                batch,
+                add_special_tokens=False,
+                truncation=False,
+                return_attention_mask=False,
+                return_token_type_ids=False,
+                verbose=False
+            )['input_ids']
+            lengths[start:start + len(batch)] = [len(ids) for ids in input_ids]
+        return lengths
+    
+    def _windows(self, sentence: str, budget: int) -> List[str]:
+        """
+        Split a long sentence into consecutive windows of at most budget tokens.
+        
+        Windows are cut at token boundaries and taken from the original text
+        through the tokenizer's character offsets when it provides them.
+        
+        Args:
+            sentence: Sentence longer than budget tokens
+            budget: Tokens per window, excluding special tokens
+        
+        Returns:
+            Window texts (at most max_windows)
+        """
+        use_offsets = getattr(self.tokenizer, 'is_fast', False)
+        encoding = self.tokenizer(
+            sentence,
+            add_special_tokens=False,
+            truncation=False,
+            return_offsets_mapping=use_offsets,
+            verbose=False
+        )
+        n_tokens = len(encoding['input_ids'])
+        starts = np.arange(0, n_tokens, budget)
+        if len(starts) > self.max_windows:
+            starts = starts[np.linspace(0, len(starts) - 1, self.max_windows).round().astype(int)]
+        
+        windows = []
+        for start in starts:
+            end = min(start + budget, n_tokens)
+            if use_offsets:
+                offsets = encoding['offset_mapping']
+                window = sentence[offsets[start][0]:offsets[end - 1][1]]
+            else:
+                window = self.tokenizer.decode(encoding['input_ids'][start:end], skip_special_tokens=True)
+            if window.strip():
+                windows.append(window)
+        return windows
+    
+    def _track_lengths(self, lengths: np.ndarray, budget: int, encoded_lengths: np.ndarray):
+        """
+        Accumulate the length histogram and the compute of this call.
+        
+        Args:
+            lengths: Token count of each sentence
+            budget: Tokens per sequence after the cap, excluding special tokens
+            encoded_lengths: Length of every sequence actually encoded, excluding special tokens
+        """
+        self._length_counts += np.bincount(
+            np.minimum(lengths, _MAX_TRACKED_LENGTH), minlength=_MAX_TRACKED_LENGTH + 1
+        )
+        # The baseline is what the model computes under its own limit, with silent truncation
+        baseline = np.minimum(lengths, self.model_max_seq_length - self.n_special_tokens) + self.n_special_tokens
+        encoded = encoded_lengths + self.n_special_tokens
+        self._stats['n_long'] += int((lengths > budget).sum())
+        self._stats['baseline_tokens'] += int(baseline.sum())
+        self._stats['baseline_attention'] += int((baseline ** 2).sum())
+        self._stats['encoded_tokens'] += int(encoded.sum())
+        self._stats['encoded_attention'] += int((encoded ** 2).sum())
+    
+    def length_report(self) -> Dict[str, Any]:
+        """
+        Summarize the token lengths and the compute of all encode() calls since the last reset.
+        
+        Returns:
+            Report with the length distribution (excluding special tokens), the
+            number of sentences over the cap and how they were handled, and the
+            tokens and attention cost (sum of squared sequence lengths) compared to
+            encoding every sentence under the model's own limit
+        """
+        counts = self._length_counts
+        n_sentences = int(counts.sum())
+        report: Dict[str, Any] = {
+            'n_sentences': n_sentences,
+            'max_seq_length': self.max_seq_length or self.model_max_seq_length,
+            'model_max_seq_length': self.model_max_seq_length,
+            'long_policy': self.long_policy,
+            'n_long': self._stats['n_long'],
+            'n_rejected': self._stats['n_rejected'],
+            'n_windows': self._stats['n_windows'],
+        }
+        if n_sentences == 0:
+            return report
+        
+        cumulative = np.cumsum(counts)
+        lengths = np.arange(len(counts))
+        report['token_lengths'] = {
+            'mean': round(float((counts * lengths).sum() / n_sentences), 1),
+            **{
+                f"p{q}": int(np.searchsorted(cumulative, q / 100 * n_sentences))
+                for q in (50, 90, 99)
+            },
+            'max': int(np.flatnonzero(counts)[-1]),
+        }
+        report['tokens_saved'] = round(1 - self._stats['encoded_tokens'] / max(1, self._stats['baseline_tokens']), 4)
+        report['attention_cost_saved'] = round(
+            1 - self._stats['encoded_attention'] / max(1, self._stats['baseline_attention']), 4
+        )
+        return report
+    
+    def encode(self, sentences: List[str], show_progress_bar: bool = True) -> np.ndarray:
         """
         Generate embeddings for a list of sentences.
         
+        Token lengths are measured first, and sentences longer than
+        max_seq_length are handled according to long_policy (see __init__).
+        
         Args:
             sentences: List of sentence strings
-            
+            show_progress_bar: Whether to display a progress bar
+        
         Returns:
-            Numpy array of embeddings with shape [n_sentences, embedding_dim]
+            Numpy array of embeddings with shape [n_sentences, embedding_dim];
+            rejected sentences have all-zero rows
         """
         if not sentences:
             logger.warning("Empty sentence list provided")
@@ -50,22 +381,96 @@ class SentenceEncoder:
         
         if self.model is None:
             raise RuntimeError("Model not loaded")
+        if self.max_seq_length == 'auto' and self.tokenizer is not None:
+            raise RuntimeError(
+                "max_seq_length='auto' must be resolved on the whole corpus with "
+                "resolve_max_seq_length() before encoding"
+            )
         
         try:
-            logger.info(f"Encoding {len(sentences)} sentences in batches of {self.batch_size}")
+            if self.tokenizer is None:
+                return self._encode_texts(sentences, show_progress_bar)
             
-            # Encode sentences in batches
-            embeddings = self.model.encode(
-                sentences,
-                batch_size=self.batch_size,
-                show_progress_bar=True,
-                convert_to_numpy=True,
-                normalize_embeddings=True  # Normalize for better clustering
-            )
+            lengths = self.token_lengths(sentences)
+            budget = (self.max_seq_length or self.model_max_seq_length) - self.n_special_tokens
+            long = np.flatnonzero(lengths > budget)
             
-            logger.info(f"Generated embeddings with shape {embeddings.shape}")
-            return embeddings
+            if len(long) == 0 or self.long_policy == 'truncate':
+                self._track_lengths(lengths, budget, np.minimum(lengths, budget))
+                return self._encode_texts(sentences, show_progress_bar)
             
+            if self.long_policy == 'reject':
+                keep = np.flatnonzero(lengths <= budget)
+                self._track_lengths(lengths, budget, lengths[keep])
+                self._stats['n_rejected'] += len(long)
+                logger.info(f"Rejecting {len(long)} sentences longer than {budget} tokens")
+                kept = self._encode_texts([sentences[i] for i in keep], show_progress_bar)
+                embeddings = np.zeros((len(sentences), self._embedding_dim(kept)), dtype=np.float32)
+                if len(keep):
+                    embeddings[keep] = kept
+                return embeddings
+            
+            # Window policy: long sentences are replaced by their windows, encoded in the same call
+            texts = list(sentences)
+            window_owner, window_weight = [], []
+            for i in long:
+                windows = self._windows(sentences[i], budget)
+                texts.extend(windows)
+                window_owner.extend([i] * len(windows))
+                window_weight.extend(min(budget, length) for length in self.token_lengths(windows))
+            self._stats['n_windows'] += len(window_owner)
+            short = np.flatnonzero(lengths <= budget)
+            self._track_lengths(lengths, budget, np.concatenate([lengths[short], window_weight]))
+            logger.info(f"Encoding {len(long)} long sentences as {len(window_owner)} windows")
+            
+            # The long sentences themselves are not encoded, only their windows
+            order = np.concatenate([short, len(sentences) + np.arange(len(window_owner))]).astype(int)
+            encoded = self._encode_texts([texts[i] for i in order], show_progress_bar)
+            embeddings = np.zeros((len(sentences), encoded.shape[1]), dtype=encoded.dtype)
+            embeddings[short] = encoded[:len(short)]
+            np.add.at(
+                embeddings,
+                np.asarray(window_owner, dtype=int),
+                encoded[len(short):] * np.asarray(window_weight, dtype=encoded.dtype)[:, None]
+            )
+            pooled = embeddings[long]
+            embeddings[long] = pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+            return embeddings
+        
         except Exception as e:
             logger.error(f"Failed to encode sentences: {e}")
             raise
+    
+    def _embedding_dim(self, embeddings: np.ndarray) -> int:
+        """Embedding dimension, from encoded rows or the model if none were encoded."""
+        if embeddings.ndim == 2:
+            return embeddings.shape[1]
+        return int(self.model.get_sentence_embedding_dimension())
+    
+    def _encode_texts(self, texts: List[str], show_progress_bar: bool) -> np.ndarray:
+        """
+        Encode texts with the model under the current sequence length cap.
+        
+        Args:
+            texts: Texts to encode
+            show_progress_bar: Whether to display a progress bar
+        
+        Returns:
+            Unit-norm embeddings with shape [n_texts, embedding_dim]
+        """
+        if not texts:
+            return np.array([])
+        
+        logger.info(f"Encoding {len(texts)} sentences in batches of {self.batch_size}")
+        
+        # Encode sentences in batches
+        embeddings = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            show_progress_bar=show_progress_bar,
+            convert_to_numpy=True,
+            normalize_embeddings=True  # Normalize for better clustering
+        )
+        
+        logger.info(f"Generated embeddings with shape {embeddings.shape}")
+        return embeddings
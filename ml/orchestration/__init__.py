@@ -0,0 +1 @@
+"""Orchestration module for checkpointed pipeline stage execution."""
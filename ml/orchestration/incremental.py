@@ -0,0 +1,111 @@
+"""Ingestion ledger and stable sentence IDs for incremental corpus updates."""
+
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def _content_id(pdf: str, n: int, text: str) -> int:
+    """Hash of the source PDF, occurrence number and text of a sentence."""
+    digest = hashlib.blake2b(f"{pdf}\x00{n}\x00{text}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') >> 1
+
+
+def content_sentence_ids(
+    sentences_df: pd.DataFrame,
+    earlier_ids: Optional[Dict[str, List[np.ndarray]]] = None
+) -> np.ndarray:
+    """
+    Derive stable sentence IDs from sentence content.
+    
+    The ID hashes the source PDF, the sentence text and the occurrence number of
+    that text within the PDF, so IDs do not change between runs, do not shift when
+    other sentences are added, and stay distinct for repeated sentences.
+    
+    Args:
+        sentences_df: DataFrame with sentence_text and source_pdf columns
+        earlier_ids: IDs already assigned to earlier rows of the same corpus, by
+            source PDF (e.g. earlier batches of a stream). Occurrence numbers
+            continue after those rows, so batches get the IDs of a single call
+            on the whole corpus; the new IDs are added to it
+        
+    Returns:
+        Positive 63-bit integer IDs with shape [n_sentences]
+    """
+    occurrence = sentences_df.groupby(['source_pdf', 'sentence_text'], sort=False).cumcount()
+    ids = np.empty(len(sentences_df), dtype=np.int64)
+    taken: Dict[str, set] = {}
+    for i, (pdf, text, n) in enumerate(zip(sentences_df['source_pdf'], sentences_df['sentence_text'], occurrence)):
+        if earlier_ids is not None and pdf in earlier_ids:
+            # Skip the occurrence numbers used by earlier rows of this PDF
+            if pdf not in taken:
+                taken[pdf] = set(np.concatenate(earlier_ids[pdf]).tolist())
+            sentence_id = _content_id(pdf, n, text)
+            while sentence_id in taken[pdf]:
+                n += 1
+                sentence_id = _content_id(pdf, n, text)
+            taken[pdf].add(sentence_id)
+            ids[i] = sentence_id
+        else:
+            ids[i] = _content_id(pdf, n, text)
+    
+    if earlier_ids is not None:
+        for pdf, positions in sentences_df.groupby('source_pdf', sort=False).indices.items():
+            earlier_ids.setdefault(pdf, []).append(ids[positions])
+    return ids
+
+
+class IngestionLedger:
+    """Tracks which source PDFs (by content digest) have already been ingested."""
+    
+    def __init__(self, path: str):
+        """
+        Initialize the ledger, loading previous entries if the file exists.
+        
+        Args:
+            path: JSON file backing the ledger
+        """
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path) as f:
+                self.entries = json.load(f)
+    
+    def __contains__(self, pdf_digest: str) -> bool:
+        return pdf_digest in self.entries
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def record(self, pdf_digest: str, source_pdf: str, source_url: str, n_sentences: int):
+        """
+        Mark a PDF as ingested.
+        
+        Args:
+            pdf_digest: Content digest of the PDF file
+            source_pdf: PDF file name
+            source_url: URL the PDF came from
+            n_sentences: Number of sentences it contributed
+        """
+        self.entries[pdf_digest] = {
+            'source_pdf': source_pdf,
+            'source_url': source_url,
+            'n_sentences': n_sentences,
+            'ingested_at': time.time(),
+        }
+    
+    def save(self):
+        """Atomically write the ledger."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        tmp_path.replace(self.path)
+        logger.info(f"Ingestion ledger now tracks {len(self.entries)} PDFs ({self.path})")
@@ -0,0 +1,213 @@
+"""Stable PDF-to-shard assignment and the deterministic merge of shard outputs."""
+
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urlparse
+import numpy as np
+import pandas as pd
+
+from orchestration.incremental import content_sentence_ids
+from storage.columnar import read_sentences, write_sentences
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "shard.json"
+
+# Rows copied per block when gathering merged embeddings from the shard files
+_MERGE_BLOCK = 65536
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """
+    Parse a shard specification of the form 'INDEX/COUNT' (e.g. '0/4').
+    
+    Args:
+        spec: Shard specification with a zero-based shard index
+    
+    Returns:
+        Tuple of (shard_index, n_shards)
+    """
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard specification '{spec}'; expected INDEX/COUNT, e.g. 0/4")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard specification '{spec}'; need 0 <= INDEX < COUNT")
+    return index, count
+
+
+def shard_key(url: str) -> str:
+    """
+    Key a PDF is sharded by: its source URL, or the file name for file:// URLs.
+    
+    Local PDFs named after their arXiv ID map to the same arXiv URL as their
+    download, and other local PDFs are keyed by name rather than absolute path,
+    so the assignment does not depend on where the corpus is stored.
+    
+    Args:
+        url: Source URL of the PDF
+    
+    Returns:
+        Shard key
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == 'file':
+        return Path(parsed.path).name
+    return url
+
+
+def shard_of(url: str, n_shards: int) -> int:
+    """
+    Assign a PDF to a shard by a stable hash of its shard key.
+    
+    Args:
+        url: Source URL of the PDF
+        n_shards: Number of shards
+    
+    Returns:
+        Shard index in [0, n_shards)
+    """
+    digest = hashlib.blake2b(shard_key(url).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % n_shards
+
+
+def shard_dir(output_dir: Path, shard_index: int, n_shards: int) -> Path:
+    """Output directory of one shard below the run's output directory."""
+    return Path(output_dir) / "shards" / f"shard-{shard_index:03d}-of-{n_shards:03d}"
+
+
+def write_shard_manifest(directory: Path, manifest: Dict[str, Any]):
+    """
+    Write a shard's manifest atomically; its presence marks the shard as complete.
+    
+    Args:
+        directory: Shard output directory
+        manifest: Shard metadata (shard_index, n_shards, file names and counts)
+    """
+    path = Path(directory) / MANIFEST_NAME
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({**manifest, 'completed': time.strftime('%Y-%m-%dT%H:%M:%S')}, f, indent=2)
+    tmp_path.replace(path)
+
+
+def read_shard_manifests(output_dir: Path, n_shards: int) -> List[Dict[str, Any]]:
+    """
+    Read the manifests of all shards of a run, in shard order.
+    
+    Args:
+        output_dir: Output directory of the run
+        n_shards: Number of shards
+    
+    Returns:
+        One manifest per shard, with its 'directory' added
+    
+    Raises:
+        RuntimeError: If a shard has not completed or belongs to a different sharding
+    """
+    manifests = []
+    missing = []
+    for index in range(n_shards):
+        directory = shard_dir(output_dir, index, n_shards)
+        path = directory / MANIFEST_NAME
+        if not path.exists():
+            missing.append(index)
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest['shard_index'] != index or manifest['n_shards'] != n_shards:
+            raise RuntimeError(f"Shard manifest {path} does not belong to shard {index}/{n_shards}")
+        manifest['directory'] = directory
+        manifests.append(manifest)
+    
+    if missing:
+        raise RuntimeError(f"Shards not complete: {', '.join(str(index) for index in missing)} (of {n_shards})")
+    return manifests
+
+
+def merge_shards(
+    manifests: List[Dict[str, Any]],
+    sentences_path: Path,
+    embeddings_path: Path,
+    id_scheme: str = 'sequential'
+) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Merge shard sentences and embeddings into one corpus with globally unique IDs.
+    
+    Rows are ordered by source PDF (keeping each PDF's sentence order), which
+    does not depend on the number of shards or the order they finished in, so
+    the same corpus always merges to the same tables. Embeddings are gathered
+    block by block from memory-mapped shard files.
+    
+    Args:
+        manifests: Shard manifests from read_shard_manifests()
+        sentences_path: Output path of the merged sentence table
+        embeddings_path: Output path of the merged embeddings (.npy)
+        id_scheme: 'sequential' (1..n in merged order) or 'content'
+            (stable hashes of source PDF and text)
+    
+    Returns:
+        Tuple of (merged sentence table, memory-mapped merged embeddings)
+    """
+    frames = []
+    shard_embeddings = []
+    for manifest in manifests:
+        if manifest['n_sentences'] == 0:
+            logger.info(f"Shard {manifest['shard_index']} has no sentences")
+            continue
+        directory = manifest['directory']
+        df, _ = read_sentences(directory / manifest['sentences'])
+        embeddings = np.load(directory / manifest['embeddings'], mmap_mode='r')
+        if len(df) != embeddings.shape[0]:
+            raise RuntimeError(
+                f"Shard {manifest['shard_index']} has {len(df)} sentences but {embeddings.shape[0]} embeddings"
+            )
+        df = df.drop(columns=['sentence_id'])
+        df['_shard'] = len(shard_embeddings)
+        df['_row'] = np.arange(len(df))
+        frames.append(df)
+        shard_embeddings.append(embeddings)
+    
+    if not frames:
+        raise RuntimeError("No shard produced any sentences")
+    dims = {embeddings.shape[1] for embeddings in shard_embeddings}
+    if len(dims) > 1:
+        raise RuntimeError(f"Shards have different embedding dimensions: {sorted(dims)}")
+    
+    # A PDF lives in exactly one shard, so a stable sort by PDF keeps its sentence order
+    merged = pd.concat(frames, ignore_index=True)
+    merged = merged.sort_values(['source_pdf', 'source_url', '_shard', '_row'], kind='mergesort').reset_index(drop=True)
+    if id_scheme == 'content':
+        merged.insert(0, 'sentence_id', content_sentence_ids(merged))
+    else:
+        merged.insert(0, 'sentence_id', range(1, len(merged) + 1))
+    if merged['sentence_id'].duplicated().any():
+        raise RuntimeError("Merged sentence IDs are not unique")
+    
+    tmp_path = embeddings_path.with_name(embeddings_path.stem + '.tmp.npy')
+    combined = np.lib.format.open_memmap(
+        tmp_path, mode='w+', dtype=shard_embeddings[0].dtype,
+        shape=(len(merged), dims.pop())
+    )
+    shards = merged['_shard'].to_numpy()
+    rows = merged['_row'].to_numpy()
+    for start in range(0, len(merged), _MERGE_BLOCK):
+        end = min(start + _MERGE_BLOCK, len(merged))
+        for shard in np.unique(shards[start:end]):
+            positions = start + np.flatnonzero(shards[start:end] == shard)
+            combined[positions] = shard_embeddings[shard][rows[positions]]
+    combined.flush()
+    del combined
+    tmp_path.replace(embeddings_path)
+    
+    merged = merged[['sentence_id', 'sentence_text', 'source_pdf', 'source_url']]
+    write_sentences(merged, sentences_path)
+    logger.info(
+        f"Merged {len(merged)} sentences from {len(manifests)} shards into "
+        f"{sentences_path} and {embeddings_path}"
+    )
+    return merged, np.load(embeddings_path, mmap_mode='r')
@@ -0,0 +1,314 @@
+"""Dependency graph of pipeline stages with persisted, fingerprinted artifacts."""
+
+import hashlib
+import inspect
+import json
+import logging
+import pickle
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+
+def file_digest(path: Path) -> str:
+    """
+    SHA-256 content digest of a file, read in blocks.
+    
+    Args:
+        path: File to hash
+        
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class StageFailed(Exception):
+    """Raised when a stage fails; the stage is recorded as failed in the manifest."""
+    
+    def __init__(self, stage: str, error: Exception):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class Stage:
+    """A named unit of work whose output is persisted as a checkpoint artifact."""
+    
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        deps: Sequence[str] = (),
+        params: Optional[Dict[str, Any]] = None,
+        code: Sequence[Any] = (),
+        outputs: Sequence[Path] = ()
+    ):
+        """
+        Initialize a stage.
+        
+        Args:
+            name: Unique stage name
+            func: Callable receiving the outputs of ``deps`` as positional arguments
+            deps: Names of the stages whose outputs this stage consumes
+            params: JSON-serializable parameters that affect the output
+            code: Classes, functions or modules whose source defines the code version
+            outputs: Side-effect files the stage writes; the stage is stale if any is missing
+        """
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.params = params or {}
+        self.code = list(code)
+        self.outputs = [Path(path) for path in outputs]
+    
+    def code_version(self) -> str:
+        """
+        Hash the source code of the stage function and its declared code objects.
+        
+        Returns:
+            Hex digest of the source code
+        """
+        digest = hashlib.sha256()
+        for obj in [self.func] + self.code:
+            try:
+                digest.update(inspect.getsource(obj).encode())
+            except (OSError, TypeError):
+                # Builtins and dynamically created objects have no source
+                digest.update(repr(obj).encode())
+        return digest.hexdigest()
+
+
+class StageGraph:
+    """Runs stages in dependency order, skipping those whose checkpoint is up to date.
+    
+    A stage's fingerprint covers its parameters, code version and the content
+    digests of its dependencies' artifacts, so a rerun resumes from the first
+    stage that is stale, failed or forced.
+    """
+    
+    def __init__(self, checkpoint_dir: str):
+        """
+        Initialize the stage graph.
+        
+        Args:
+            checkpoint_dir: Directory for stage artifacts and the manifest
+        """
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.checkpoint_dir / MANIFEST_NAME
+        self.stages: Dict[str, Stage] = {}
+        self.manifest = self._load_manifest()
+    
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """Load the manifest of previous runs, or start an empty one."""
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint manifest {self.manifest_path}: {e}")
+            return {}
+    
+    def _write_manifest(self):
+        """Atomically write the manifest so a crash never leaves it truncated."""
+        tmp_path = self.manifest_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        tmp_path.replace(self.manifest_path)
+    
+    def add_stage(self, stage: Stage):
+        """
+        Register a stage; its dependencies must already be registered.
+        
+        Args:
+            stage: Stage to add
+        """
+        if stage.name in self.stages:
+            raise ValueError(f"Duplicate stage name: {stage.name}")
+        missing = [dep for dep in stage.deps if dep not in self.stages]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {missing}")
+        self.stages[stage.name] = stage
+    
+    def _closure(self, targets: Iterable[str]) -> List[str]:
+        """
+        Targets plus all of their ancestors, in registration (topological) order.
+        
+        Args:
+            targets: Names of the stages to run
+            
+        Returns:
+            Ordered list of stage names to consider
+        """
+        needed = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage: {name}")
+            if name not in needed:
+                needed.add(name)
+                pending.extend(self.stages[name].deps)
+        return [name for name in self.stages if name in needed]
+    
+    def _fingerprint(self, stage: Stage) -> str:
+        """
+        Fingerprint a stage from its parameters, code and dependency artifacts.
+        
+        Args:
+            stage: Stage to fingerprint (dependencies must have manifest entries)
+            
+        Returns:
+            Hex digest identifying the stage's expected output
+        """
+        payload = {
+            'name': stage.name,
+            'params': stage.params,
+            'code': stage.code_version(),
+            'deps': {dep: self.manifest[dep]['digest'] for dep in stage.deps},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    
+    def _artifact_path(self, name: str, value: Any) -> Path:
+        """Artifact file for a stage output; arrays are stored as .npy."""
+        suffix = '.npy' if isinstance(value, np.ndarray) else '.pkl'
+        return self.checkpoint_dir / f"{name}{suffix}"
+    
+    def _save_artifact(self, name: str, value: Any) -> Path:
+        """Persist a stage output and return its path."""
+        path = self._artifact_path(name, value)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            if isinstance(value, np.ndarray):
+                np.save(f, value, allow_pickle=False)
+            else:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+        return path
+    
+    def _load_artifact(self, name: str) -> Any:
+        """Load a stage output from its checkpoint artifact."""
+        path = Path(self.manifest[name]['artifact'])
+        if path.suffix == '.npy':
+            return np.load(path, allow_pickle=False)
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    
+    def output(self, name: str) -> Any:
+        """
+        Load the checkpointed output of a completed stage.
+        
+        Args:
+            name: Stage name
+            
+        Returns:
+            The stage's output
+        """
+        entry = self.manifest.get(name)
+        if not entry or entry.get('status') != 'complete':
+            raise KeyError(f"Stage '{name}' has no completed checkpoint")
+        return self._load_artifact(name)
+    
+    def is_up_to_date(self, name: str) -> bool:
+        """
+        Whether a stage's checkpoint matches its current fingerprint.
+        
+        Args:
+            name: Stage name (its dependencies must be up to date)
+            
+        Returns:
+            True if the stage can be skipped
+        """
+        stage = self.stages[name]
+        entry = self.manifest.get(name)
+        if not entry or entry.get('status') != 'complete':
+            return False
+        if any('digest' not in self.manifest.get(dep, {}) for dep in stage.deps):
+            return False
+        if entry.get('fingerprint') != self._fingerprint(stage):
+            return False
+        if not Path(entry['artifact']).exists():
+            return False
+        return all(path.exists() for path in stage.outputs)
+    
+    def run(
+        self,
+        targets: Optional[Iterable[str]] = None,
+        force: Iterable[str] = (),
+        profiler: Optional[Any] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the targets, re-running only stale, failed or forced stages.
+        
+        Args:
+            targets: Stages to bring up to date (all stages if None); their stale
+                ancestors are run as well
+            force: Stages to re-run even if up to date
+            profiler: RunProfiler measuring each stage that runs (optional)
+            
+        Returns:
+            Dictionary mapping each target name to its output
+        """
+        targets = list(targets) if targets is not None else list(self.stages)
+        force = set(force)
+        outputs: Dict[str, Any] = {}
+        
+        def output_of(name: str) -> Any:
+            if name not in outputs:
+                outputs[name] = self._load_artifact(name)
+            return outputs[name]
+        
+        for name in self._closure(targets):
+            stage = self.stages[name]
+            if name not in force and self.is_up_to_date(name):
+                logger.info(f"Stage '{name}' is up to date, skipping")
+                if profiler is not None:
+                    profiler.skip(name)
+                continue
+            
+            fingerprint = self._fingerprint(stage)
+            started = time.time()
+            self.manifest[name] = {'status': 'running', 'fingerprint': fingerprint, 'started': started}
+            self._write_manifest()
+            
+            try:
+                with profiler.stage(name) if profiler is not None else nullcontext() as record:
+                    result = stage.func(*[output_of(dep) for dep in stage.deps])
+                    artifact = self._save_artifact(name, result)
+                    if record is not None:
+                        record.add_outputs([artifact, *stage.outputs])
+            except Exception as e:
+                self.manifest[name].update({
+                    'status': 'failed',
+                    'error': f"{type(e).__name__}: {e}",
+                    'finished': time.time(),
+                })
+                self._write_manifest()
+                raise StageFailed(name, e) from e
+            
+            outputs[name] = result
+            self.manifest[name] = {
+                'status': 'complete',
+                'fingerprint': fingerprint,
+                'artifact': str(artifact),
+                'digest': file_digest(artifact),
+                'started': started,
+                'finished': time.time(),
+                'duration': time.time() - started,
+            }
+            self._write_manifest()
+            logger.info(f"Stage '{name}' completed in {time.time() - started:.1f}s")
+        
+        return {name: output_of(name) for name in targets}
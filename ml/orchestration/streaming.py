@@ -0,0 +1,297 @@
+"""Overlapped producer-consumer execution of download, extraction, splitting and encoding."""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import numpy as np
+
+from data_collection.text_extractor import TextExtractor
+from preprocessing.sentence_splitter import SentenceSplitter
+
+logger = logging.getLogger(__name__)
+
+# End-of-stream marker passed through the queues
+_END = object()
+
+# Per-process components of the extraction workers
+_worker_extractor: Optional[TextExtractor] = None
+_worker_splitter: Optional[SentenceSplitter] = None
+
+
+def _init_worker(min_tokens: int):
+    """Create the extractor and splitter once per worker process."""
+    global _worker_extractor, _worker_splitter
+    _worker_extractor = TextExtractor()
+    _worker_splitter = SentenceSplitter(min_tokens=min_tokens)
+
+
+def _extract_and_split(pdf_path: str, pdf_url: str) -> Optional[List[Dict[str, str]]]:
+    """
+    Extract text from one PDF and split it into sentences (runs in a worker process).
+    
+    Args:
+        pdf_path: Local path of the PDF
+        pdf_url: Source URL of the PDF
+        
+    Returns:
+        Sentence dictionaries, or None if no text could be extracted
+    """
+    text = _worker_extractor.extract_text(pdf_path)
+    if not text:
+        return None
+    return _worker_splitter.split(text, source_pdf=Path(pdf_path).name, source_url=pdf_url)
+
+
+class StreamingRunner:
+    """Runs download, extraction/splitting and encoding concurrently over bounded queues.
+    
+    PDFs flow to extraction as they are downloaded, and sentences flow to the
+    encoder in batches while extraction continues. Documents are released to the
+    encoder in download order, so results do not depend on which worker finishes
+    first. Downloads run at most ``queue_size + n_extract_workers`` PDFs ahead of
+    the oldest unreleased document, which bounds the buffered documents.
+    """
+    
+    def __init__(
+        self,
+        encoder: Any,
+        min_tokens: int = 5,
+        n_extract_workers: Optional[int] = None,
+        queue_size: int = 8,
+        encode_batch_size: int = 256
+    ):
+        """
+        Initialize the streaming runner.
+        
+        Args:
+            encoder: Object with an ``encode(sentences, show_progress_bar)`` method
+            min_tokens: Minimum tokens per sentence for the splitter
+            n_extract_workers: Extraction worker processes (defaults to CPU count - 1)
+            queue_size: Capacity of each inter-stage queue
+            encode_batch_size: Number of sentences passed to each encode call
+        """
+        self.encoder = encoder
+        self.min_tokens = min_tokens
+        self.n_extract_workers = n_extract_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.queue_size = queue_size
+        self.encode_batch_size = encode_batch_size
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+        self._window: Optional[threading.Semaphore] = None
+    
+    def _put(self, target: queue.Queue, item: Any) -> bool:
+        """Put an item, waiting for space unless the run is being aborted."""
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _fail(self, error: BaseException):
+        """Record a fatal error and abort all stages."""
+        self._errors.append(error)
+        self._stop.set()
+    
+    def _acquire_slot(self) -> bool:
+        """Wait until the download may run further ahead, unless the run is being aborted."""
+        while not self._stop.is_set():
+            if self._window.acquire(timeout=0.1):
+                return True
+        return False
+    
+    def _download(self, pdf_source: Iterable[Dict[str, Any]], pdf_queue: queue.Queue, busy: Dict[str, float]):
+        """Producer: feed PDF metadata into the extraction queue as it arrives."""
+        try:
+            iterator = iter(pdf_source)
+            index = 0
+            while self._acquire_slot():
+                started = time.perf_counter()
+                pdf_info = next(iterator, _END)
+                busy['download'] += time.perf_counter() - started
+                if pdf_info is _END:
+                    break
+                if not self._put(pdf_queue, (index, pdf_info)):
+                    return
+                index += 1
+        except Exception as e:
+            self._fail(e)
+        finally:
+            for _ in range(self.n_extract_workers):
+                self._put(pdf_queue, _END)
+    
+    def _extract(
+        self,
+        executor: ProcessPoolExecutor,
+        pdf_queue: queue.Queue,
+        doc_queue: queue.Queue,
+        busy: Dict[str, float],
+        lock: threading.Lock
+    ):
+        """Worker: extract and split one PDF at a time in the process pool."""
+        while not self._stop.is_set():
+            try:
+                item = pdf_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _END:
+                self._put(doc_queue, _END)
+                return
+            
+            index, pdf_info = item
+            started = time.perf_counter()
+            try:
+                sentences = executor.submit(
+                    _extract_and_split, pdf_info['local_path'], pdf_info['url']
+                ).result()
+            except Exception as e:
+                self._fail(e)
+                return
+            with lock:
+                busy['extract'] += time.perf_counter() - started
+            
+            if not self._put(doc_queue, (index, pdf_info, sentences)):
+                return
+    
+    def run(
+        self,
+        pdf_source: Iterable[Dict[str, Any]],
+        on_batch: Optional[Callable[[List[Dict[str, str]], np.ndarray], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Stream PDFs through extraction, splitting and encoding.
+        
+        Args:
+            pdf_source: Iterable of PDF metadata ({'url', 'local_path', ...}),
+                e.g. PDFScraper.iter_scrape()
+            on_batch: Called with every encoded batch of sentences and its
+                embeddings, in download order (e.g. to write them out as they
+                stream in). If None, all batches are collected and returned
+                
+        Returns:
+            Dictionary with 'sentences' (in PDF order) and the matching 'embeddings'
+            (empty if on_batch is given), 'n_sentences', 'failed' PDF names, 'n_pdfs'
+            and per-stage 'busy_seconds'
+        """
+        self._stop.clear()
+        self._errors = []
+        self._window = threading.Semaphore(self.queue_size + self.n_extract_workers)
+        pdf_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        doc_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        busy = {'download': 0.0, 'extract': 0.0, 'encode': 0.0}
+        lock = threading.Lock()
+        
+        collected: List[Dict[str, str]] = []
+        embedding_parts: List[np.ndarray] = []
+        # Documents that finished before an earlier download, by download index
+        waiting: Dict[int, Optional[List[Dict[str, str]]]] = {}
+        next_index = 0
+        pending: List[Dict[str, str]] = []
+        failed_pdfs: List[str] = []
+        n_pdfs = 0
+        n_sentences = 0
+        started = time.perf_counter()
+        
+        def encode_pending(flush: bool):
+            nonlocal n_sentences
+            while pending and (flush or len(pending) >= self.encode_batch_size):
+                batch = pending[:self.encode_batch_size]
+                del pending[:self.encode_batch_size]
+                encode_started = time.perf_counter()
+                embeddings = self.encoder.encode(
+                    [sentence['sentence_text'] for sentence in batch], show_progress_bar=False
+                )
+                busy['encode'] += time.perf_counter() - encode_started
+                n_sentences += len(batch)
+                if on_batch is not None:
+                    on_batch(batch, embeddings)
+                else:
+                    collected.extend(batch)
+                    embedding_parts.append(embeddings)
+        
+        def release_in_order():
+            nonlocal next_index
+            while next_index in waiting:
+                pending.extend(waiting.pop(next_index) or [])
+                next_index += 1
+                self._window.release()
+            encode_pending(flush=False)
+        
+        logger.info(
+            f"Streaming pipeline: {self.n_extract_workers} extraction workers, "
+            f"queue size {self.queue_size}, encode batches of {self.encode_batch_size}"
+        )
+        
+        with ProcessPoolExecutor(
+            max_workers=self.n_extract_workers,
+            initializer=_init_worker,
+            initargs=(self.min_tokens,)
+        ) as executor:
+            threads = [threading.Thread(
+                target=self._download, args=(pdf_source, pdf_queue, busy), daemon=True
+            )]
+            threads += [
+                threading.Thread(
+                    target=self._extract,
+                    args=(executor, pdf_queue, doc_queue, busy, lock),
+                    daemon=True
+                )
+                for _ in range(self.n_extract_workers)
+            ]
+            for thread in threads:
+                thread.start()
+            
+            # Consumer: batch sentences into the encoder as documents arrive, in download order
+            try:
+                finished_workers = 0
+                while finished_workers < self.n_extract_workers and not self._stop.is_set():
+                    try:
+                        item = doc_queue.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    if item is _END:
+                        finished_workers += 1
+                        continue
+                    
+                    index, pdf_info, sentences = item
+                    n_pdfs += 1
+                    pdf_name = Path(pdf_info['local_path']).name
+                    if not sentences:
+                        logger.warning(f"Failed to extract text from {pdf_name}")
+                        failed_pdfs.append(pdf_name)
+                    else:
+                        logger.info(f"Extracted {len(sentences)} sentences from {pdf_name}")
+                    waiting[index] = sentences
+                    release_in_order()
+                
+                if self._errors:
+                    raise self._errors[0]
+                encode_pending(flush=True)
+            except BaseException:
+                self._stop.set()
+                raise
+            finally:
+                for thread in threads:
+                    thread.join(timeout=5)
+        
+        wall = time.perf_counter() - started
+        logger.info(
+            f"Streaming complete in {wall:.1f}s "
+            f"(busy: download {busy['download']:.1f}s, extract {busy['extract']:.1f}s "
+            f"across workers, encode {busy['encode']:.1f}s)"
+        )
+        
+        return {
+            'sentences': collected,
+            'embeddings': np.concatenate(embedding_parts) if embedding_parts else np.array([]),
+            'n_sentences': n_sentences,
+            'failed': failed_pdfs,
+            'n_pdfs': n_pdfs,
+            'busy_seconds': busy,
+        }
@@ -1,15 +1,47 @@
 """Main pipeline for data collection, preprocessing, and weak labeling."""
 
+import argparse
 import logging
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+import numpy as np
 import pandas as pd
 
+from data_collection.local_source import LocalPDFSource
 from data_collection.pdf_scraper import PDFScraper
 from data_collection.text_extractor import TextExtractor
 from preprocessing.sentence_splitter import SentenceSplitter
-from embeddings.encoder import SentenceEncoder
-from clustering.clusterer import SentenceClusterer
+from embeddings import encoder as sentence_encoder
+from embeddings.encoder import (
+    ENCODER_SETTINGS_NAME, LONG_POLICIES, SentenceEncoder, load_encoder_settings, parse_max_seq_length,
+    save_encoder_settings
+)
+from clustering import clusterer as cluster_model
+from clustering.clusterer import SentenceClusterer, load_soft_assignments, save_soft_assignments
+from clustering import coreset as cluster_coreset
+from clustering.coreset import CORESET_STRATEGIES
+from clustering import report as cluster_report
+from clustering.report import save_cluster_summary, summarize_clusters
+from orchestration import incremental
+from orchestration.incremental import IngestionLedger, content_sentence_ids
+from orchestration.sharding import (
+    merge_shards, parse_shard, read_shard_manifests, shard_dir, shard_of, write_shard_manifest
+)
+from orchestration.stage_graph import Stage, StageFailed, StageGraph, file_digest
+from orchestration.streaming import StreamingRunner
+from search import index as search_index
+from search.index import INDEX_KINDS, build_index
+from storage import columnar
+from storage.columnar import (
+    FORMATS, SentenceTableWriter, append_sentences, read_sentences, table_path, write_sentences
+)
+from storage import sentence_store as sqlite_store
+from storage.sentence_store import append_sentence_store, write_sentence_store
+from telemetry.profiler import PROFILE_MODES, RunProfiler
+from tuning.autotune import DEFAULT_TUNING_DIR, autotune, load_profile, log_settings
 
 # Configure logging
 logging.basicConfig(
@@ -23,14 +55,79 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _zero_rows(embeddings: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+    """Indices of all-zero embeddings, which the encoder returns for rejected sentences."""
+    return np.concatenate([
+        start + np.flatnonzero(~np.any(embeddings[start:start + chunk_size], axis=1))
+        for start in range(0, embeddings.shape[0], chunk_size)
+    ] or [np.array([], dtype=np.int64)])
+
+
+def _rejected_rows(embeddings: np.ndarray) -> np.ndarray:
+    """Indices of the sentences the encoder rejected; raises if it rejected every sentence."""
+    rejected = _zero_rows(embeddings)
+    if len(rejected) and len(rejected) == len(embeddings):
+        raise RuntimeError(
+            f"The encoder rejected all {len(embeddings)} sentences; "
+            f"raise --max-seq-length or use --long-sentences truncate or window"
+        )
+    return rejected
+
+
+def _spilled_embeddings(spill_path: Path, embeddings_path: Path, embedding_dim: int) -> np.ndarray:
+    """
+    Turn raw float32 embeddings spilled batch by batch into a memory-mapped .npy file.
+    
+    Args:
+        spill_path: Raw float32 rows written during streaming (removed afterwards)
+        embeddings_path: Output .npy file
+        embedding_dim: Embedding dimension
+        
+    Returns:
+        Memory-mapped embeddings with shape [n_sentences, embedding_dim]
+    """
+    spilled = np.memmap(spill_path, dtype=np.float32, mode='r').reshape(-1, embedding_dim)
+    tmp_path = embeddings_path.with_name(embeddings_path.stem + '.tmp.npy')
+    combined = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=spilled.shape)
+    for start in range(0, spilled.shape[0], 65536):
+        combined[start:start + 65536] = spilled[start:start + 65536]
+    combined.flush()
+    del combined, spilled
+    tmp_path.replace(embeddings_path)
+    spill_path.unlink()
+    return np.load(embeddings_path, mmap_mode='r')
+
+
 class DataPipeline:
     """End-to-end pipeline for collecting and labeling training data."""
     
+    # Stage names in execution order
+    STAGES = ['scrape', 'extract', 'split', 'raw_dataset', 'encode', 'cluster', 'index', 'report', 'store']
+    
     def __init__(
         self,
         target_url: str,
         output_dir: str = "data/output",
-        pdf_dir: str = "data/raw_pdfs"
+        pdf_dir: str = "data/raw_pdfs",
+        topk_soft: int = 0,
+        checkpoint_dir: Optional[str] = None,
+        id_scheme: str = 'sequential',
+        output_format: str = 'csv',
+        store_embeddings: bool = False,
+        profile_stage: Optional[str] = None,
+        profile_mode: str = 'cprofile',
+        encoder: Optional[SentenceEncoder] = None,
+        local_sources: Optional[List[str]] = None,
+        recursive: bool = False,
+        shard: Optional[Tuple[int, int]] = None,
+        n_partitions: Optional[int] = None,
+        index_kind: str = 'auto',
+        max_seq_length: Optional[Union[int, str]] = None,
+        long_policy: str = 'truncate',
+        coreset_size: Optional[int] = None,
+        coreset_strategy: str = 'kmeans++',
+        tuning: Optional[Dict[str, Any]] = None,
+        sentence_store: bool = True
     ):
         """
         Initialize the data pipeline.
@@ -39,130 +136,1311 @@ class DataPipeline:
             target_url: URL to scrape for PDFs
             output_dir: Directory for output CSV files
             pdf_dir: Directory for downloaded PDFs
+            topk_soft: Number of soft cluster assignments stored per sentence in
+                sentences_topk.npz (disabled if 0)
+            checkpoint_dir: Directory for stage checkpoints
+                (defaults to <output_dir>/.checkpoints)
+            id_scheme: How sentence IDs are assigned: 'sequential' (1..n) or
+                'content' (stable hashes of source PDF and text)
+            output_format: Sentence table format: 'csv', 'parquet' or 'arrow'
+            store_embeddings: Store embeddings as a column of the clustered table
+                (Parquet/Arrow only)
+            profile_stage: Stage to run under a function-level profiler (disabled if None)
+            profile_mode: Profiler for profile_stage: 'cprofile' or 'sampling'
+            encoder: Pre-built encoder with the SentenceEncoder interface, used instead
+                of loading SentenceEncoder(**encoder_config)
+            local_sources: Local directories, PDF files or glob patterns to ingest
+                instead of scraping target_url
+            recursive: Also search subdirectories of local_sources directories
+            shard: (shard_index, n_shards) to process only the PDFs hashed to one
+                shard, with outputs in <output_dir>/shards/shard-III-of-NNN
+                (all PDFs if None)
+            n_partitions: Number of coarse partitions for partitioned clustering
+                (single global clustering if None)
+            index_kind: Nearest-neighbor search index built from the embeddings:
+                'auto', 'exact', 'ivf' or 'none'
+            max_seq_length: Encoder sequence length cap in tokens, or 'auto' to
+                derive it from the corpus (the model's limit if None). The staged
+                run resolves 'auto' on the whole corpus and saves the cap to
+                encoder.json; shard, streaming and incremental runs load it
+            long_policy: How the encoder handles sentences over max_seq_length:
+                'truncate', 'window' (mean-pooled windows) or 'reject' (labeled as noise)
+            coreset_size: Fit the clusterer on a coreset of this many sentences and
+                assign the rest (disabled if None)
+            coreset_strategy: Coreset sampling: 'kmeans++' (importance sampling) or
+                'stratified' (proportional per source PDF)
+            tuning: Tuned settings of this machine ('settings' of a tuning profile, see
+                tuning.autotune) for the encoder batch size, torch threads and worker
+                pool sizes (built-in defaults if None)
+            sentence_store: Also write the labeled sentences to an indexed SQLite
+                store (sentences.sqlite) for ID, PDF, cluster and keyword lookups
         """
+        if id_scheme not in ('sequential', 'content'):
+            raise ValueError(f"Unknown id_scheme: {id_scheme}")
+        if index_kind not in INDEX_KINDS + ('none',):
+            raise ValueError(f"Unknown index_kind: {index_kind}")
+        
         self.target_url = target_url
+        self.local_sources = list(local_sources) if local_sources else None
+        self.topk_soft = topk_soft
+        self.id_scheme = id_scheme
+        self.output_format = output_format
+        self.store_embeddings = store_embeddings
+        self.profile_stage = profile_stage
+        self.profile_mode = profile_mode
+        self.index_kind = index_kind
+        self.sentence_store = sentence_store
+        self.shard = tuple(shard) if shard else None
         self.output_dir = Path(output_dir)
+        # Shared by the shards of a corpus, next to the merged cluster model
+        self.encoder_settings_path = self.output_dir / ENCODER_SETTINGS_NAME
+        if self.shard:
+            self.output_dir = shard_dir(self.output_dir, *self.shard)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else self.output_dir / ".checkpoints"
         
         # Initialize components
-        self.pdf_scraper = PDFScraper(output_dir=pdf_dir)
+        if self.local_sources:
+            self.pdf_scraper = LocalPDFSource(self.local_sources, recursive=recursive)
+        else:
+            self.pdf_scraper = PDFScraper(output_dir=pdf_dir)
         self.text_extractor = TextExtractor()
         self.sentence_splitter = SentenceSplitter(min_tokens=5)
-        self.encoder = SentenceEncoder()
+        # The encoder model is only loaded when the encode stage actually runs
+        self.encoder_config: Dict[str, Any] = {}
+        # Only non-default settings are added, so existing encode checkpoints stay valid
+        if max_seq_length is not None:
+            self.encoder_config['max_seq_length'] = max_seq_length
+        if long_policy != 'truncate':
+            self.encoder_config['long_policy'] = long_policy
+        self._encoder: Optional[SentenceEncoder] = encoder
+        if encoder is not None:
+            # Only describes an injected encoder, so its checkpoints are not mixed with the model's
+            self.encoder_config = {'model_name': getattr(encoder, 'model_name', type(encoder).__name__)}
         self.clusterer = SentenceClusterer(
             method='gmm',        # Use GMM/EM algorithm
             n_components=None,    # Auto-determine number of clusters
-            metric='cosine'       # Better for normalized embeddings
+            metric='cosine',      # Better for normalized embeddings
+            n_partitions=n_partitions,
+            low_memory=True,      # Encoder output is already unit-norm float32
+            coreset_size=coreset_size,
+            coreset_strategy=coreset_strategy
         )
+        self._apply_tuning(tuning or {})
+        
+        self.raw_output_path = table_path(self.output_dir, "sentences_raw", output_format)
+        self.clustered_output_path = table_path(self.output_dir, "sentences_clustered", output_format)
+        self.model_path = self.output_dir / "cluster_model.pkl"
+        self.topk_output_path = self.output_dir / "sentences_topk.npz"
+        self.embeddings_path = self.output_dir / "embeddings.npy"
+        self.ledger_path = self.output_dir / "ingested.json"
+        self.report_path = self.output_dir / "run_report.json"
+        self.index_dir = self.output_dir / "search_index"
+        self.summary_path = self.output_dir / "cluster_summary.json"
+        self.store_path = self.output_dir / "sentences.sqlite"
+        
+        # Replaced by a fresh profiler at the start of every run
+        self.profiler = RunProfiler('pipeline')
     
-    def run(self):
-        """Run the complete pipeline."""
-        logger.info("=" * 80)
-        logger.info("Starting INCLUSIFY Data Collection and Weak Labeling Pipeline")
-        logger.info("=" * 80)
+    @property
+    def encoder(self) -> SentenceEncoder:
+        """Sentence encoder, loaded on first use."""
+        if self._encoder is None:
+            self._encoder = SentenceEncoder(**self.encoder_config, **self.encoder_runtime)
+            tuned_model = self.tuning.get('model_name')
+            if tuned_model and tuned_model != self._encoder.model_name:
+                logger.warning(f"Encoder batch size was tuned for {tuned_model}, not {self._encoder.model_name}")
+        return self._encoder
+    
+    def _apply_tuning(self, settings: Dict[str, Any]):
+        """
+        Use tuned settings for the encoder and the worker pools.
         
-        # Step 1: Scrape PDFs
-        logger.info("\n[Step 1/6] Scraping PDFs from target URL...")
-        pdf_metadata = self.pdf_scraper.scrape(self.target_url)
+        Args:
+            settings: 'settings' of a tuning profile (empty for the built-in defaults)
+        """
+        self.tuning = dict(settings)
+        # Batch size and threads do not change the embeddings, so they are kept out of
+        # encoder_config and the encode fingerprint
+        self.encoder_runtime: Dict[str, Any] = {}
+        if settings.get('encoder_batch_size'):
+            self.encoder_runtime['batch_size'] = settings['encoder_batch_size']
+        if settings.get('torch_threads'):
+            self.encoder_runtime['num_threads'] = settings['torch_threads']
+        self.clusterer.n_jobs = settings.get('cluster_jobs')
+    
+    def _resolve_max_seq_length(self, sentence_texts: List[str]):
+        """
+        Resolve max_seq_length='auto' on the whole corpus and save the cap.
         
-        if not pdf_metadata:
-            logger.error("No PDFs were downloaded. Exiting.")
+        Args:
+            sentence_texts: All sentences of the corpus
+        """
+        if self.encoder_config.get('max_seq_length') != 'auto':
             return
+        self.encoder.resolve_max_seq_length(sentence_texts)
+        save_encoder_settings(self.encoder_settings_path, self.encoder.settings())
+        self.profiler.add_outputs([self.encoder_settings_path])
+    
+    def _load_max_seq_length(self):
+        """
+        Replace max_seq_length='auto' by the cap resolved for this corpus by an earlier run.
         
-        logger.info(f"Successfully downloaded {len(pdf_metadata)} PDF files")
+        Shard, streaming and incremental runs do not see the whole corpus before
+        encoding, so they use the cap saved by the run that did. Embeddings that
+        are clustered together are then always encoded under the same cap.
         
-        # Step 2: Extract text from PDFs
+        Raises:
+            RuntimeError: If no cap was saved for this corpus
+        """
+        if self.encoder_config.get('max_seq_length') != 'auto':
+            return
+        saved = load_encoder_settings(self.encoder_settings_path)
+        if 'max_seq_length' not in saved:
+            raise RuntimeError(
+                f"--max-seq-length auto is resolved on the whole corpus by a staged run, but "
+                f"{self.encoder_settings_path} does not exist; run the staged pipeline first or "
+                f"pass a number of tokens"
+            )
+        cap = saved['max_seq_length']
+        logger.info(f"Using the sequence length cap resolved for this corpus: {cap or 'model limit'}")
+        if cap is None:
+            del self.encoder_config['max_seq_length']
+        else:
+            self.encoder_config['max_seq_length'] = cap
+    
+    def autotune(self, tuning_dir: str = DEFAULT_TUNING_DIR) -> Dict[str, Any]:
+        """
+        Calibrate the encoder and the extractor on this machine, save its tuning profile
+        and use the tuned settings.
+        
+        The encoder is calibrated on synthetic sentences, and extraction on up to 64
+        of the local PDFs (synthetic PDFs when scraping).
+        
+        Args:
+            tuning_dir: Directory of the per-machine tuning profiles
+            
+        Returns:
+            The tuned settings
+        """
+        if self.encoder_config.get('max_seq_length') == 'auto':
+            # Calibrated separately, so that the 'auto' cap is derived from the corpus
+            encoder = SentenceEncoder(**{**self.encoder_config, 'max_seq_length': None})
+        else:
+            encoder = self.encoder
+        pdf_paths = None
+        if self.local_sources:
+            pdf_paths = [str(path) for path in islice(self.pdf_scraper.iter_paths(), 64)]
+        
+        settings = autotune(encoder, pdf_paths=pdf_paths, tuning_dir=tuning_dir)['settings']
+        self._apply_tuning(settings)
+        return settings
+    
+    def _new_profiler(self, mode: str) -> RunProfiler:
+        """
+        Create the telemetry profiler for one run; its report goes to run_report.json.
+        
+        Args:
+            mode: Run mode recorded in the report ('staged', 'streaming', 'incremental',
+                'shard' or 'merge')
+            
+        Returns:
+            RunProfiler for the run
+        """
+        self.profiler = RunProfiler(
+            'pipeline',
+            report_path=self.report_path,
+            profile_stage=self.profile_stage,
+            profile_mode=self.profile_mode,
+            params={
+                'mode': mode,
+                'target_url': self.target_url,
+                'local_sources': self.local_sources,
+                'shard': self.shard,
+                'output_format': self.output_format,
+                'id_scheme': self.id_scheme,
+                'clusterer': self.clusterer._params(),
+                'tuning': self.tuning or None,
+            }
+        )
+        return self.profiler
+    
+    def _scrape(self) -> List[Dict[str, Any]]:
+        """
+        Step 1: Download PDFs from the target URL, or discover the local PDFs.
+        
+        Returns:
+            PDF metadata as returned by PDFScraper.scrape()
+        """
+        if self.local_sources:
+            logger.info("\n[Step 1/6] Discovering local PDFs...")
+        else:
+            logger.info("\n[Step 1/6] Scraping PDFs from target URL...")
+        if self.shard:
+            shard_index, n_shards = self.shard
+            logger.info(f"Selecting the PDFs of shard {shard_index}/{n_shards}")
+            pdf_metadata = self.pdf_scraper.scrape(
+                self.target_url,
+                url_filter=lambda url: shard_of(url, n_shards) == shard_index
+            )
+        else:
+            pdf_metadata = self.pdf_scraper.scrape(self.target_url)
+        
+        if not pdf_metadata:
+            raise RuntimeError("No local PDFs were found" if self.local_sources else "No PDFs were downloaded")
+        
+        logger.info(f"Successfully obtained {len(pdf_metadata)} PDF files")
+        self.profiler.add_items(len(pdf_metadata))
+        return pdf_metadata
+    
+    def _extract(self, pdf_metadata: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Step 2: Extract and clean text from every PDF.
+        
+        Args:
+            pdf_metadata: Output of the scrape stage
+            
+        Returns:
+            Dictionary with 'documents' ({'pdf_name', 'source_url', 'pdf_digest', 'text'} per PDF),
+            'failed' (names of PDFs without text) and 'n_pdfs'
+        """
         logger.info("\n[Step 2/6] Extracting text from PDFs...")
-        all_sentences = []
+        documents = []
         failed_pdfs = []
         
         for pdf_info in pdf_metadata:
             pdf_path = pdf_info['local_path']
-            pdf_url = pdf_info['url']
             pdf_name = Path(pdf_path).name
             
             logger.info(f"Processing: {pdf_name}")
             
-            text = self.text_extractor.extract_text(pdf_path)
+            with self.profiler.item(pdf_name) as timing:
+                text = self.text_extractor.extract_text(pdf_path)
+                timing['chars'] = len(text) if text else 0
             
             if not text:
                 logger.warning(f"Failed to extract text from {pdf_name}")
                 failed_pdfs.append(pdf_name)
                 continue
             
-            # Step 3: Split into sentences
+            documents.append({
+                'pdf_name': pdf_name,
+                'source_url': pdf_info['url'],
+                'pdf_digest': file_digest(Path(pdf_path)),
+                'text': text
+            })
+        
+        if failed_pdfs:
+            logger.warning(f"Failed to process {len(failed_pdfs)} PDFs: {failed_pdfs}")
+        
+        self.profiler.add_items(len(pdf_metadata))
+        return {'documents': documents, 'failed': failed_pdfs, 'n_pdfs': len(pdf_metadata)}
+    
+    def _split(self, extracted: Dict[str, Any]) -> List[Dict[str, str]]:
+        """
+        Step 3: Split extracted text into filtered sentences.
+        
+        Args:
+            extracted: Output of the extract stage
+            
+        Returns:
+            Sentence dictionaries as returned by SentenceSplitter.split()
+        """
+        logger.info("\n[Step 3/6] Splitting text into sentences...")
+        all_sentences = []
+        
+        for document in extracted['documents']:
             sentences = self.sentence_splitter.split(
-                text,
-                source_pdf=pdf_name,
-                source_url=pdf_url
+                document['text'],
+                source_pdf=document['pdf_name'],
+                source_url=document['source_url']
             )
             
             all_sentences.extend(sentences)
-            logger.info(f"Extracted {len(sentences)} sentences from {pdf_name}")
+            logger.info(f"Extracted {len(sentences)} sentences from {document['pdf_name']}")
         
         if not all_sentences:
-            logger.error("No sentences were extracted from any PDF. Exiting.")
-            return
+            raise RuntimeError("No sentences were extracted from any PDF")
         
         logger.info(f"\nTotal sentences extracted: {len(all_sentences)}")
-        if failed_pdfs:
-            logger.warning(f"Failed to process {len(failed_pdfs)} PDFs: {failed_pdfs}")
+        self.profiler.add_items(len(all_sentences))
+        return all_sentences
+    
+    def _sentences_frame(
+        self,
+        all_sentences: List[Dict[str, str]],
+        first_id: int = 1,
+        earlier_ids: Optional[Dict[str, List[np.ndarray]]] = None
+    ) -> pd.DataFrame:
+        """
+        Build the sentence table and assign sentence IDs.
         
-        # Step 4: Create raw sentences CSV
-        logger.info("\n[Step 4/6] Creating sentences_raw.csv...")
+        Args:
+            all_sentences: Sentence dictionaries from the splitter
+            first_id: First sequential ID, for batches that continue a table
+            earlier_ids: Content IDs of the earlier batches by source PDF, for
+                batches that continue a table (see content_sentence_ids)
+            
+        Returns:
+            DataFrame with sentence_id, sentence_text, source_pdf, source_url
+        """
         sentences_df = pd.DataFrame(all_sentences)
-        sentences_df.insert(0, 'sentence_id', range(1, len(sentences_df) + 1))
+        if self.id_scheme == 'content':
+            sentences_df.insert(0, 'sentence_id', content_sentence_ids(sentences_df, earlier_ids))
+        else:
+            sentences_df.insert(0, 'sentence_id', range(first_id, first_id + len(sentences_df)))
         
         # Reorder columns: sentence_id, sentence_text, source_pdf, source_url
-        sentences_df = sentences_df[['sentence_id', 'sentence_text', 'source_pdf', 'source_url']]
+        return sentences_df[['sentence_id', 'sentence_text', 'source_pdf', 'source_url']]
+    
+    def _build_raw_dataset(self, all_sentences: List[Dict[str, str]]) -> pd.DataFrame:
+        """
+        Step 4: Assign sentence IDs and write the raw sentence table.
         
-        raw_output_path = self.output_dir / "sentences_raw.csv"
-        sentences_df.to_csv(raw_output_path, index=False)
-        logger.info(f"Saved {len(sentences_df)} sentences to {raw_output_path}")
+        Args:
+            all_sentences: Output of the split stage
+            
+        Returns:
+            DataFrame with sentence_id, sentence_text, source_pdf, source_url
+        """
+        logger.info(f"\n[Step 4/6] Creating {self.raw_output_path.name}...")
+        sentences_df = self._sentences_frame(all_sentences)
+        write_sentences(sentences_df, self.raw_output_path)
+        logger.info(f"Saved {len(sentences_df)} sentences to {self.raw_output_path}")
+        self.profiler.add_items(len(sentences_df))
+        self.profiler.add_outputs([self.raw_output_path])
+        return sentences_df
+    
+    def _encode(self, sentences_df: pd.DataFrame) -> np.ndarray:
+        """
+        Step 5: Generate sentence embeddings.
         
-        # Step 5: Generate embeddings
+        Args:
+            sentences_df: Output of the raw_dataset stage
+            
+        Returns:
+            Embeddings with shape [n_sentences, embedding_dim]
+        """
         logger.info("\n[Step 5/6] Generating sentence embeddings...")
         sentence_texts = sentences_df['sentence_text'].tolist()
+        self.profiler.add_items(len(sentence_texts))
+        self._resolve_max_seq_length(sentence_texts)
         embeddings = self.encoder.encode(sentence_texts)
+        self._record_length_report()
+        return embeddings
+    
+    def _record_length_report(self):
+        """Log the encoder's token length report and add it to the current stage's telemetry."""
+        if not hasattr(self._encoder, 'length_report'):
+            return
+        report = self._encoder.length_report()
+        self._encoder.reset_length_stats()
+        if not report['n_sentences']:
+            return
+        
+        lengths = report['token_lengths']
+        logger.info(
+            f"Token lengths: p50 {lengths['p50']}, p90 {lengths['p90']}, p99 {lengths['p99']}, "
+            f"max {lengths['max']}; {report['n_long']} sentences over the {report['max_seq_length']}-token cap "
+            f"({report['long_policy']})"
+        )
+        logger.info(
+            f"Encoder compute vs. the model's {report['model_max_seq_length']}-token limit: "
+            f"{report['tokens_saved']:.1%} fewer tokens, {report['attention_cost_saved']:.1%} less attention"
+        )
+        if self.profiler.current is not None:
+            self.profiler.current.extra['token_lengths'] = report
+    
+    def _cluster(self, sentences_df: pd.DataFrame, embeddings: np.ndarray) -> np.ndarray:
+        """
+        Step 6: Cluster the embeddings and write the labeled outputs.
         
-        # Step 6: Perform clustering
+        Args:
+            sentences_df: Output of the raw_dataset stage
+            embeddings: Output of the encode stage
+            
+        Returns:
+            Array of cluster labels
+        """
         logger.info("\n[Step 6/6] Performing semantic clustering...")
-        cluster_labels = self.clusterer.fit_predict(embeddings)
+        # Source PDFs are the strata of a stratified coreset
+        strata = pd.factorize(sentences_df['source_pdf'])[0]
+        rejected = _rejected_rows(embeddings)
+        if len(rejected):
+            # Sentences rejected by the encoder are labeled as noise and kept out of the fit
+            logger.info(f"{len(rejected)} sentences rejected by the encoder are labeled as noise")
+        cluster_labels = self.clusterer.fit_predict(embeddings, strata=strata, exclude=rejected)
+        self.clusterer.save(self.model_path)
+        if self.clusterer.coreset_report_ and self.profiler.current is not None:
+            self.profiler.current.extra['coreset'] = self.clusterer.coreset_report_
         
         # Create clustered sentences CSV
-        logger.info("\nCreating sentences_clustered.csv...")
+        logger.info(f"\nCreating {self.clustered_output_path.name}...")
         clustered_df = sentences_df.copy()
         clustered_df['cluster_id'] = cluster_labels
         
         # Reorder columns: sentence_id, sentence_text, cluster_id, source_pdf, source_url
         clustered_df = clustered_df[['sentence_id', 'sentence_text', 'cluster_id', 'source_pdf', 'source_url']]
         
-        clustered_output_path = self.output_dir / "sentences_clustered.csv"
-        clustered_df.to_csv(clustered_output_path, index=False)
-        logger.info(f"Saved {len(clustered_df)} labeled sentences to {clustered_output_path}")
+        write_sentences(
+            clustered_df,
+            self.clustered_output_path,
+            embeddings=embeddings if self.store_embeddings else None
+        )
+        logger.info(f"Saved {len(clustered_df)} labeled sentences to {self.clustered_output_path}")
+        
+        if self.topk_soft:
+            topk_ids, topk_probs = self.clusterer.predict_topk(embeddings, k=self.topk_soft)
+            topk_ids[rejected], topk_probs[rejected] = -1, 0.0
+            save_soft_assignments(
+                self.topk_output_path,
+                clustered_df['sentence_id'].to_numpy(),
+                topk_ids,
+                topk_probs
+            )
+        
+        self.profiler.add_items(len(cluster_labels))
+        self.profiler.add_outputs([self.clustered_output_path, self.model_path])
+        if self.topk_soft:
+            self.profiler.add_outputs([self.topk_output_path])
+        return cluster_labels
+    
+    def _build_index(self, sentences_df: pd.DataFrame, embeddings: np.ndarray) -> Dict[str, Any]:
+        """
+        Build the persistent nearest-neighbor index of the sentence embeddings.
+        
+        Args:
+            sentences_df: Sentence table with the sentence_id of each embedding row
+            embeddings: Embeddings with shape [n_sentences, embedding_dim]
+            
+        Returns:
+            Index metadata (kind 'none' if indexing is disabled)
+        """
+        if self.index_kind == 'none':
+            return {'kind': 'none'}
+        
+        logger.info(f"\nBuilding the sentence search index in {self.index_dir}...")
+        # Sentences rejected by the encoder have all-zero embeddings and are not searchable
+        index = build_index(
+            embeddings, sentences_df['sentence_id'].to_numpy(), self.index_dir,
+            kind=self.index_kind, exclude=_rejected_rows(embeddings)
+        )
+        self.profiler.add_items(len(index))
+        self.profiler.add_outputs([self.index_dir / "index.json", self.index_dir / "vectors.npy"])
+        return index.metadata
+    
+    def _report(
+        self,
+        sentences_df: pd.DataFrame,
+        embeddings: np.ndarray,
+        cluster_labels: np.ndarray
+    ) -> Dict[str, Any]:
+        """
+        Summarize each cluster for reviewing the weak labels.
+        
+        Args:
+            sentences_df: Sentence table aligned with the embeddings
+            embeddings: Embeddings with shape [n_sentences, embedding_dim]
+            cluster_labels: Cluster label per sentence
+            
+        Returns:
+            Corpus totals of the summary written to cluster_summary.json
+        """
+        logger.info(f"\nWriting the cluster summary to {self.summary_path}...")
+        summary = summarize_clusters(sentences_df, embeddings, cluster_labels=cluster_labels)
+        save_cluster_summary(self.summary_path, summary)
+        self.profiler.add_items(len(cluster_labels))
+        self.profiler.add_outputs([self.summary_path])
+        return {key: value for key, value in summary.items() if key != 'clusters'}
+    
+    def _build_store(self, sentences_df: pd.DataFrame, cluster_labels: np.ndarray) -> Dict[str, Any]:
+        """
+        Write the labeled sentences to the indexed SQLite sentence store.
+        
+        Args:
+            sentences_df: Sentence table aligned with the cluster labels
+            cluster_labels: Cluster label per sentence
+            
+        Returns:
+            Number of sentences stored (0 if the store is disabled)
+        """
+        if not self.sentence_store:
+            return {'n_sentences': 0}
+        
+        logger.info(f"\nWriting the sentence store to {self.store_path}...")
+        store_df = sentences_df[['sentence_id', 'sentence_text', 'source_pdf', 'source_url']].assign(
+            cluster_id=np.asarray(cluster_labels)
+        )
+        write_sentence_store(self.store_path, store_df)
+        self.profiler.add_items(len(store_df))
+        self.profiler.add_outputs([self.store_path])
+        return {'n_sentences': len(store_df)}
+    
+    def build_graph(self) -> StageGraph:
+        """
+        Build the checkpointed stage graph of the pipeline.
+        
+        Returns:
+            StageGraph with the nine pipeline stages
+        """
+        cluster_outputs = [self.clustered_output_path, self.model_path]
+        if self.topk_soft:
+            cluster_outputs.append(self.topk_output_path)
+        
+        graph = StageGraph(self.checkpoint_dir)
+        if self.local_sources:
+            scrape_params = {'local_sources': self.local_sources, 'recursive': self.pdf_scraper.recursive}
+        else:
+            scrape_params = {'target_url': self.target_url}
+        if self.shard:
+            scrape_params['shard'] = list(self.shard)
+        graph.add_stage(Stage(
+            'scrape', self._scrape,
+            params=scrape_params,
+            code=[type(self.pdf_scraper)]
+        ))
+        graph.add_stage(Stage(
+            'extract', self._extract, deps=['scrape'],
+            code=[TextExtractor]
+        ))
+        graph.add_stage(Stage(
+            'split', self._split, deps=['extract'],
+            params={'min_tokens': self.sentence_splitter.min_tokens},
+            code=[SentenceSplitter]
+        ))
+        graph.add_stage(Stage(
+            'raw_dataset', self._build_raw_dataset, deps=['split'],
+            params={'id_scheme': self.id_scheme, 'output_format': self.output_format},
+            code=[self._sentences_frame, incremental, columnar],
+            outputs=[self.raw_output_path]
+        ))
+        graph.add_stage(Stage(
+            'encode', self._encode, deps=['raw_dataset'],
+            params=self.encoder_config,
+            code=[sentence_encoder],
+            outputs=[self.encoder_settings_path] if self.encoder_config.get('max_seq_length') == 'auto' else []
+        ))
+        graph.add_stage(Stage(
+            'cluster', self._cluster, deps=['raw_dataset', 'encode'],
+            params={
+                **self.clusterer._params(),
+                # The worker count does not change the labels, so tuning keeps checkpoints valid
+                'n_jobs': None,
+                'topk_soft': self.topk_soft,
+                'output_format': self.output_format,
+                'store_embeddings': self.store_embeddings,
+            },
+            code=[_zero_rows, _rejected_rows, cluster_model, cluster_coreset, columnar],
+            outputs=cluster_outputs
+        ))
+        graph.add_stage(Stage(
+            'index', self._build_index, deps=['raw_dataset', 'encode'],
+            params={'index_kind': self.index_kind},
+            code=[_zero_rows, _rejected_rows, search_index],
+            outputs=[] if self.index_kind == 'none' else [self.index_dir / "index.json"]
+        ))
+        graph.add_stage(Stage(
+            'report', self._report, deps=['raw_dataset', 'encode', 'cluster'],
+            code=[cluster_report],
+            outputs=[self.summary_path]
+        ))
+        graph.add_stage(Stage(
+            'store', self._build_store, deps=['raw_dataset', 'cluster'],
+            params={'sentence_store': self.sentence_store},
+            code=[sqlite_store],
+            outputs=[self.store_path] if self.sentence_store else []
+        ))
+        return graph
+    
+    def run(self, stages: Optional[List[str]] = None, force: Optional[List[str]] = None):
+        """
+        Run the pipeline, resuming from the first stale or failed stage.
+        
+        Args:
+            stages: Stages to bring up to date, together with their stale
+                upstream stages (all stages if None)
+            force: Stages to re-run even if their checkpoint is up to date
+        """
+        logger.info("=" * 80)
+        logger.info("Starting INCLUSIFY Data Collection and Weak Labeling Pipeline")
+        logger.info("=" * 80)
+        
+        force = list(force or [])
+        if self.local_sources and 'scrape' not in force:
+            # Discovery is cheap and must see added or changed files; unchanged
+            # results keep the downstream checkpoints valid
+            force.append('scrape')
+        
+        graph = self.build_graph()
+        with self._new_profiler('staged') as profiler:
+            try:
+                graph.run(targets=stages, force=force, profiler=profiler)
+            except StageFailed as e:
+                logger.error(f"{e}. Exiting; the next run resumes from stage '{e.stage}'.")
+                return
+        
+        if stages is not None and 'cluster' not in stages:
+            logger.info(f"Stages complete: {', '.join(stages)}")
+            return
+        
+        # Summary statistics from the (possibly cached) stage artifacts
+        extracted = graph.output('extract')
+        self._log_summary(
+            n_pdfs=extracted['n_pdfs'],
+            n_failed=len(extracted['failed']),
+            n_sentences=len(graph.output('split')),
+            cluster_labels=graph.output('cluster')
+        )
+    
+    def run_streaming(
+        self,
+        n_extract_workers: Optional[int] = None,
+        queue_size: int = 8,
+        encode_batch_size: Optional[int] = None
+    ):
+        """
+        Run the pipeline with download, extraction, splitting and encoding overlapped.
+        
+        Stages are connected by bounded queues instead of running one after the
+        other, so wall-clock time approaches that of the slowest stage. Encoded
+        batches are written to the raw sentence table in row groups and their
+        embeddings spilled to disk as they arrive, so neither is held in memory
+        while streaming. Streaming runs bypass the stage checkpoints.
+        
+        Args:
+            n_extract_workers: Extraction worker processes (defaults to the tuned
+                count, or CPU count - 1)
+            queue_size: Capacity of each inter-stage queue
+            encode_batch_size: Number of sentences passed to each encode call
+                (defaults to the tuned count, or 256)
+        """
+        logger.info("=" * 80)
+        logger.info("Starting INCLUSIFY Data Collection and Weak Labeling Pipeline (streaming)")
+        logger.info("=" * 80)
+        
+        try:
+            self._load_max_seq_length()
+        except RuntimeError as e:
+            logger.error(f"{e}. Exiting.")
+            return
+        
+        with self._new_profiler('streaming') as profiler:
+            logger.info("\n[Steps 1-3, 5] Streaming download, extraction, splitting and encoding...")
+            runner = StreamingRunner(
+                encoder=self.encoder,
+                min_tokens=self.sentence_splitter.min_tokens,
+                n_extract_workers=n_extract_workers or self.tuning.get('extract_workers'),
+                queue_size=queue_size,
+                encode_batch_size=encode_batch_size or self.tuning.get('encode_batch_size', 256)
+            )
+            spill_path = self.embeddings_path.with_name(self.embeddings_path.stem + '.tmp.f32')
+            earlier_ids: Dict[str, List[np.ndarray]] = {}
+            n_written = 0
+            embedding_dim = None
+            
+            with profiler.stage('stream') as record:
+                columns = ['sentence_id', 'sentence_text', 'source_pdf', 'source_url']
+                with SentenceTableWriter(self.raw_output_path, columns) as writer, open(spill_path, 'wb') as spill:
+                    def write_batch(sentences: List[Dict[str, str]], embeddings: np.ndarray):
+                        nonlocal n_written, embedding_dim
+                        writer.write(self._sentences_frame(sentences, n_written + 1, earlier_ids))
+                        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+                        spill.write(embeddings.tobytes())
+                        n_written += len(sentences)
+                        embedding_dim = embeddings.shape[1]
+                    
+                    result = runner.run(self.pdf_scraper.iter_scrape(self.target_url), on_batch=write_batch)
+                record.add_items(result['n_sentences'])
+                record.add_outputs([self.raw_output_path])
+                record.extra['n_pdfs'] = result['n_pdfs']
+                record.extra['busy_seconds'] = result['busy_seconds']
+                self._record_length_report()
+            
+            if result['n_pdfs'] == 0:
+                spill_path.unlink()
+                logger.error("No PDFs were downloaded. Exiting.")
+                return
+            if not result['n_sentences']:
+                spill_path.unlink()
+                logger.error("No sentences were extracted from any PDF. Exiting.")
+                return
+            if result['failed']:
+                logger.warning(f"Failed to process {len(result['failed'])} PDFs: {result['failed']}")
+            
+            with profiler.stage('raw_dataset') as record:
+                logger.info(f"Saved {result['n_sentences']} sentences to {self.raw_output_path}")
+                embeddings = _spilled_embeddings(spill_path, self.embeddings_path, embedding_dim)
+                sentences_df, _ = read_sentences(self.raw_output_path)
+                record.add_outputs([self.embeddings_path])
+            with profiler.stage('cluster'):
+                cluster_labels = self._cluster(sentences_df, embeddings)
+            with profiler.stage('index'):
+                self._build_index(sentences_df, embeddings)
+            with profiler.stage('report'):
+                self._report(sentences_df, embeddings, cluster_labels)
+            with profiler.stage('store'):
+                self._build_store(sentences_df, cluster_labels)
+        
+        self._log_summary(
+            n_pdfs=result['n_pdfs'],
+            n_failed=len(result['failed']),
+            n_sentences=len(sentences_df),
+            cluster_labels=cluster_labels
+        )
+    
+    def run_incremental(self):
+        """
+        Process only PDFs that were not ingested by a previous incremental run.
+        
+        New sentences get stable content-derived IDs, are encoded, assigned to the
+        existing clusters with the saved cluster model, and appended to the
+        stored outputs. Without previous incremental state, the corpus is built
+        and clustered from scratch.
+        """
+        logger.info("=" * 80)
+        logger.info("Starting INCLUSIFY Data Collection and Weak Labeling Pipeline (incremental)")
+        logger.info("=" * 80)
+        
+        if self.id_scheme != 'content':
+            logger.info("Incremental runs use content-derived sentence IDs")
+            self.id_scheme = 'content'
+        
+        ledger = IngestionLedger(self.ledger_path)
+        state_paths = [self.raw_output_path, self.clustered_output_path, self.embeddings_path, self.model_path]
+        has_state = len(ledger) > 0 and all(path.exists() for path in state_paths)
+        if not has_state:
+            logger.info("No previous incremental state found; building the corpus from scratch")
+        else:
+            try:
+                self._load_max_seq_length()
+            except RuntimeError as e:
+                logger.error(f"{e}. Exiting.")
+                return
+        
+        with self._new_profiler('incremental') as profiler:
+            try:
+                with profiler.stage('scrape'):
+                    pdf_metadata = self._scrape()
+            except RuntimeError as e:
+                logger.error(f"{e}. Exiting.")
+                return
+            
+            # Skip PDFs whose content was already ingested (also catches re-downloads)
+            new_pdfs = []
+            seen = set()
+            for pdf_info in pdf_metadata:
+                pdf_digest = file_digest(Path(pdf_info['local_path']))
+                if (has_state and pdf_digest in ledger) or pdf_digest in seen:
+                    continue
+                seen.add(pdf_digest)
+                new_pdfs.append(pdf_info)
+            
+            logger.info(f"{len(new_pdfs)} new PDFs out of {len(pdf_metadata)}")
+            if not new_pdfs:
+                logger.info("Corpus is up to date. Nothing to do.")
+                return
+            
+            with profiler.stage('extract'):
+                extracted = self._extract(new_pdfs)
+            try:
+                with profiler.stage('split'):
+                    all_sentences = self._split(extracted)
+            except RuntimeError as e:
+                logger.error(f"{e}. Exiting.")
+                return
+            
+            new_df = self._sentences_frame(all_sentences)
+            if has_state:
+                existing_ids, _ = read_sentences(self.raw_output_path, columns=['sentence_id'])
+                existing_ids = existing_ids['sentence_id']
+                new_df = new_df[~new_df['sentence_id'].isin(existing_ids)].reset_index(drop=True)
+            
+            logger.info(f"\n[Step 5/6] Generating embeddings for {len(new_df)} new sentences...")
+            with profiler.stage('encode') as record:
+                if not has_state:
+                    self._resolve_max_seq_length(new_df['sentence_text'].tolist())
+                new_embeddings = self.encoder.encode(new_df['sentence_text'].tolist())
+                record.add_items(len(new_df))
+                self._record_length_report()
+            
+            if has_state:
+                with profiler.stage('assign'):
+                    new_labels = self._append_incremental(new_df, new_embeddings)
+            else:
+                with profiler.stage('cluster') as record:
+                    write_sentences(new_df, self.raw_output_path)
+                    new_labels = self._cluster(new_df, new_embeddings)
+                    np.save(self.embeddings_path, new_embeddings)
+                    record.add_outputs([self.raw_output_path, self.embeddings_path])
+            
+            if self.index_kind != 'none':
+                # The index covers the whole corpus, so it is rebuilt from the stored embeddings
+                with profiler.stage('index'):
+                    all_ids, _ = read_sentences(self.raw_output_path, columns=['sentence_id'])
+                    self._build_index(all_ids, np.load(self.embeddings_path, mmap_mode='r'))
+            
+            # Cluster sizes and centroids change with every append, so the summary covers the whole corpus
+            with profiler.stage('report'):
+                clustered_df, _ = read_sentences(self.clustered_output_path)
+                self._report(
+                    clustered_df,
+                    np.load(self.embeddings_path, mmap_mode='r'),
+                    clustered_df['cluster_id'].to_numpy()
+                )
+            
+            if self.sentence_store:
+                with profiler.stage('store') as record:
+                    if has_state and self.store_path.exists():
+                        append_sentence_store(self.store_path, new_df.assign(cluster_id=new_labels))
+                        record.add_items(len(new_df))
+                        record.add_outputs([self.store_path])
+                    else:
+                        # First run, or the store was enabled after the corpus was built
+                        clustered_df, _ = read_sentences(self.clustered_output_path)
+                        self._build_store(clustered_df, clustered_df['cluster_id'].to_numpy())
+            
+            sentence_counts = new_df['source_pdf'].value_counts()
+            for document in extracted['documents']:
+                ledger.record(
+                    document['pdf_digest'],
+                    document['pdf_name'],
+                    document['source_url'],
+                    int(sentence_counts.get(document['pdf_name'], 0))
+                )
+            ledger.save()
+            
+            logger.info(
+                f"Incremental run complete: {len(extracted['documents'])} PDFs and "
+                f"{len(new_df)} sentences added"
+            )
+    
+    def _append_incremental(self, new_df: pd.DataFrame, new_embeddings: np.ndarray) -> np.ndarray:
+        """
+        Assign new sentences to the existing clusters and append them to the outputs.
+        
+        Args:
+            new_df: New sentences with stable IDs
+            new_embeddings: Their embeddings
+            
+        Returns:
+            Cluster labels of the new sentences
+        """
+        if len(new_df) == 0:
+            return np.empty(0, dtype=np.int64)
+        
+        logger.info("\n[Step 6/6] Assigning new sentences to existing clusters...")
+        clusterer = SentenceClusterer.load(self.model_path)
+        rejected = _zero_rows(new_embeddings)
+        cluster_labels = clusterer.assign(new_embeddings)
+        cluster_labels[rejected] = -1
+        drift = clusterer.drift_report(new_embeddings, cluster_labels)
+        if drift['refit_recommended']:
+            logger.warning(
+                "New sentences drift from the existing clusters; "
+                "re-run the full pipeline or recluster.py to refit"
+            )
+        
+        # Append embeddings through a memory-mapped copy so old rows are never loaded at once
+        old_embeddings = np.load(self.embeddings_path, mmap_mode='r')
+        n_old = old_embeddings.shape[0]
+        tmp_path = self.embeddings_path.with_name(self.embeddings_path.stem + '.tmp.npy')
+        combined = np.lib.format.open_memmap(
+            tmp_path, mode='w+', dtype=old_embeddings.dtype,
+            shape=(n_old + len(new_embeddings), old_embeddings.shape[1])
+        )
+        for start in range(0, n_old, 65536):
+            end = min(start + 65536, n_old)
+            combined[start:end] = old_embeddings[start:end]
+        combined[n_old:] = new_embeddings
+        combined.flush()
+        del combined, old_embeddings
+        
+        append_sentences(new_df, self.raw_output_path)
+        clustered_df = new_df.copy()
+        clustered_df['cluster_id'] = cluster_labels
+        clustered_df = clustered_df[['sentence_id', 'sentence_text', 'cluster_id', 'source_pdf', 'source_url']]
+        append_sentences(
+            clustered_df,
+            self.clustered_output_path,
+            embeddings=new_embeddings if self.store_embeddings else None
+        )
+        tmp_path.replace(self.embeddings_path)
+        
+        if self.topk_soft:
+            topk_ids, topk_probs = clusterer.predict_topk(new_embeddings, k=self.topk_soft)
+            topk_ids[rejected], topk_probs[rejected] = -1, 0.0
+            sentence_ids = clustered_df['sentence_id'].to_numpy()
+            if self.topk_output_path.exists():
+                previous = load_soft_assignments(self.topk_output_path)
+                sentence_ids = np.concatenate([previous['sentence_id'], sentence_ids])
+                topk_ids = np.concatenate([previous['cluster_ids'], topk_ids])
+                topk_probs = np.concatenate([previous['probabilities'], topk_probs])
+            save_soft_assignments(self.topk_output_path, sentence_ids, topk_ids, topk_probs)
+        
+        self.profiler.add_items(len(new_df))
+        self.profiler.add_outputs([self.raw_output_path, self.clustered_output_path, self.embeddings_path])
+        if self.topk_soft:
+            self.profiler.add_outputs([self.topk_output_path])
+        logger.info(f"Appended {len(new_df)} sentences to {self.raw_output_path} and {self.clustered_output_path}")
+        return cluster_labels
+    
+    def run_shard(self, force: Optional[List[str]] = None):
+        """
+        Run extraction, splitting and encoding for this pipeline's shard.
+        
+        The shard's sentences and embeddings are written to its output directory
+        together with a shard.json manifest marking it complete for run_merge().
+        Shards resume from their own stage checkpoints like full runs.
+        
+        Args:
+            force: Stages to re-run even if their checkpoint is up to date
+        """
+        if self.shard is None:
+            raise ValueError("run_shard() requires a pipeline created with shard=(shard_index, n_shards)")
+        shard_index, n_shards = self.shard
+        
+        logger.info("=" * 80)
+        logger.info(f"Starting INCLUSIFY Data Collection Pipeline (shard {shard_index}/{n_shards})")
+        logger.info("=" * 80)
+        
+        force = list(force or [])
+        if self.local_sources and 'scrape' not in force:
+            force.append('scrape')
+        try:
+            self._load_max_seq_length()
+        except RuntimeError as e:
+            logger.error(f"{e}. Exiting.")
+            return
+        
+        manifest = {
+            'shard_index': shard_index,
+            'n_shards': n_shards,
+            'sentences': self.raw_output_path.name,
+            'embeddings': self.embeddings_path.name,
+        }
+        graph = self.build_graph()
+        with self._new_profiler('shard') as profiler:
+            try:
+                graph.run(targets=['raw_dataset', 'encode'], force=force, profiler=profiler)
+            except StageFailed as e:
+                if e.stage in ('scrape', 'split') and isinstance(e.error, RuntimeError):
+                    # Small corpora can leave a shard without PDFs or sentences
+                    logger.warning(f"Shard {shard_index}/{n_shards} is empty: {e.error}")
+                    extracted = graph.output('extract') if e.stage == 'split' else None
+                    write_shard_manifest(self.output_dir, {
+                        **manifest,
+                        'n_pdfs': extracted['n_pdfs'] if extracted else 0,
+                        'n_failed': len(extracted['failed']) if extracted else 0,
+                        'n_sentences': 0,
+                    })
+                    return
+                logger.error(f"{e}. Exiting; the next run resumes from stage '{e.stage}'.")
+                return
+            
+            with profiler.stage('export') as record:
+                embeddings = graph.output('encode')
+                np.save(self.embeddings_path, embeddings)
+                record.add_items(len(embeddings))
+                record.add_outputs([self.embeddings_path])
+        
+        extracted = graph.output('extract')
+        write_shard_manifest(self.output_dir, {
+            **manifest,
+            'n_pdfs': extracted['n_pdfs'],
+            'n_failed': len(extracted['failed']),
+            'n_sentences': len(embeddings),
+        })
+        logger.info(
+            f"Shard {shard_index}/{n_shards} complete: {extracted['n_pdfs']} PDFs, "
+            f"{len(embeddings)} sentences in {self.output_dir}"
+        )
+    
+    def run_merge(self, n_shards: int):
+        """
+        Merge the outputs of all shards and cluster the merged corpus.
+        
+        Sentences are ordered by source PDF and given globally unique IDs
+        (see merge_shards()), then clustered globally, or per partition when the
+        pipeline was created with n_partitions.
+        
+        Args:
+            n_shards: Number of shards the corpus was split into
+        """
+        logger.info("=" * 80)
+        logger.info(f"Starting INCLUSIFY Weak Labeling Pipeline (merge of {n_shards} shards)")
+        logger.info("=" * 80)
+        
+        try:
+            manifests = read_shard_manifests(self.output_dir, n_shards)
+        except RuntimeError as e:
+            logger.error(f"{e}. Run the missing shards first.")
+            return
+        
+        with self._new_profiler('merge') as profiler:
+            logger.info("\n[Step 4/6] Merging shard sentences and embeddings...")
+            with profiler.stage('merge') as record:
+                try:
+                    sentences_df, embeddings = merge_shards(
+                        manifests, self.raw_output_path, self.embeddings_path, id_scheme=self.id_scheme
+                    )
+                except RuntimeError as e:
+                    logger.error(f"{e}. Exiting.")
+                    return
+                record.add_items(len(sentences_df))
+                record.add_outputs([self.raw_output_path, self.embeddings_path])
+            with profiler.stage('cluster'):
+                cluster_labels = self._cluster(sentences_df, embeddings)
+            with profiler.stage('index'):
+                self._build_index(sentences_df, embeddings)
+            with profiler.stage('report'):
+                self._report(sentences_df, embeddings, cluster_labels)
+            with profiler.stage('store'):
+                self._build_store(sentences_df, cluster_labels)
+        
+        self._log_summary(
+            n_pdfs=sum(manifest['n_pdfs'] for manifest in manifests),
+            n_failed=sum(manifest['n_failed'] for manifest in manifests),
+            n_sentences=len(sentences_df),
+            cluster_labels=cluster_labels
+        )
+    
+    def _log_summary(self, n_pdfs: int, n_failed: int, n_sentences: int, cluster_labels: np.ndarray):
+        """
+        Log the pipeline summary statistics.
+        
+        Args:
+            n_pdfs: Number of PDFs obtained
+            n_failed: Number of PDFs without extractable text
+            n_sentences: Number of sentences in the dataset
+            cluster_labels: Cluster label per sentence
+        """
+        output_paths = [self.raw_output_path, self.clustered_output_path, self.model_path, self.summary_path]
+        if self.topk_soft:
+            output_paths.append(self.topk_output_path)
+        if self.index_kind != 'none':
+            output_paths.append(self.index_dir)
+        if self.sentence_store:
+            output_paths.append(self.store_path)
         
-        # Summary statistics
         logger.info("\n" + "=" * 80)
         logger.info("Pipeline Summary")
         logger.info("=" * 80)
-        logger.info(f"PDFs processed: {len(pdf_metadata) - len(failed_pdfs)}/{len(pdf_metadata)}")
-        logger.info(f"Total sentences: {len(all_sentences)}")
+        logger.info(f"PDFs processed: {n_pdfs - n_failed}/{n_pdfs}")
+        logger.info(f"Total sentences: {n_sentences}")
         logger.info(f"Unique clusters: {len(set(cluster_labels)) - (1 if -1 in cluster_labels else 0)}")
         logger.info(f"Noise points (outliers): {sum(cluster_labels == -1)}")
         logger.info(f"\nOutput files:")
-        logger.info(f"  - {raw_output_path}")
-        logger.info(f"  - {clustered_output_path}")
+        for path in output_paths:
+            logger.info(f"  - {path}")
         logger.info("=" * 80)
 
 
+def _run_shard(pipeline_kwargs: Dict[str, Any], shard_index: int, n_shards: int, force: List[str]) -> int:
+    """Run one shard in a worker process (see run_sharded())."""
+    DataPipeline(**pipeline_kwargs, shard=(shard_index, n_shards)).run_shard(force=force)
+    return shard_index
+
+
+def run_sharded(
+    pipeline_kwargs: Dict[str, Any],
+    n_shards: int,
+    max_workers: Optional[int] = None,
+    force: Optional[List[str]] = None
+):
+    """
+    Run every shard in its own local process, then merge and cluster.
+    
+    Args:
+        pipeline_kwargs: DataPipeline keyword arguments shared by the shards and the merge
+        n_shards: Number of shards
+        max_workers: Shard processes run at once (defaults to n_shards)
+        force: Stages each shard re-runs even if its checkpoint is up to date
+    """
+    max_workers = min(max_workers or n_shards, n_shards)
+    logger.info(f"Running {n_shards} shards in {max_workers} processes")
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_run_shard, pipeline_kwargs, shard_index, n_shards, list(force or []))
+            for shard_index in range(n_shards)
+        ]
+        for future in futures:
+            future.result()
+    
+    DataPipeline(**pipeline_kwargs).run_merge(n_shards)
+
+
 def main():
     """Main entry point for the pipeline."""
     # TODO: Replace with actual target URL
     # For now, using a placeholder - user should update this
     TARGET_URL = "https://arxiv.org/search/?searchtype=all&query=LGBTQ&abstracts=show&size=100&order="
     
-    if len(sys.argv) > 1:
-        TARGET_URL = sys.argv[1]
+    parser = argparse.ArgumentParser(
+        description="INCLUSIFY data collection and weak labeling pipeline"
+    )
+    parser.add_argument(
+        'target_url',
+        nargs='?',
+        default=None,
+        help='URL to scrape for PDFs'
+    )
+    parser.add_argument(
+        '--local',
+        action='append',
+        default=None,
+        metavar='PATH',
+        help='Ingest PDFs from a local directory, file or glob instead of scraping; may be repeated'
+    )
+    parser.add_argument(
+        '--recursive',
+        action='store_true',
+        help='Also search subdirectories of --local directories'
+    )
+    parser.add_argument(
+        '--stage',
+        action='append',
+        choices=DataPipeline.STAGES,
+        default=None,
+        help='Run only this stage (and any stale upstream stages); may be repeated'
+    )
+    parser.add_argument(
+        '--force',
+        action='append',
+        choices=DataPipeline.STAGES,
+        default=[],
+        help='Re-run this stage even if its checkpoint is up to date; may be repeated'
+    )
+    parser.add_argument(
+        '--streaming',
+        action='store_true',
+        help='Overlap download, extraction and encoding with bounded queues (no checkpoints)'
+    )
+    parser.add_argument(
+        '--format',
+        choices=list(FORMATS),
+        default='csv',
+        help='Output format of the sentence tables (default: csv)'
+    )
+    parser.add_argument(
+        '--store-embeddings',
+        action='store_true',
+        help='Store embeddings as a column of the clustered table (parquet/arrow only)'
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Process only PDFs not ingested by a previous incremental run and append them'
+    )
+    parser.add_argument(
+        '--profile-stage',
+        default=None,
+        help='Run this stage under a function-level profiler (e.g. encode, cluster, stream)'
+    )
+    parser.add_argument(
+        '--profile-mode',
+        choices=list(PROFILE_MODES),
+        default='cprofile',
+        help='Profiler for --profile-stage: cprofile (exact) or sampling (low overhead) (default: cprofile)'
+    )
+    parser.add_argument(
+        '--extract-workers',
+        type=int,
+        default=None,
+        help='Extraction worker processes in streaming mode (default: tuned, or CPU count - 1)'
+    )
+    parser.add_argument(
+        '--shard',
+        default=None,
+        metavar='INDEX/COUNT',
+        help='Extract, split and encode only the PDFs of one shard (e.g. 0/4) for a later --merge-shards'
+    )
+    parser.add_argument(
+        '--merge-shards',
+        type=int,
+        default=None,
+        metavar='COUNT',
+        help='Merge the outputs of COUNT completed shards and cluster the merged corpus'
+    )
+    parser.add_argument(
+        '--shards',
+        type=int,
+        default=None,
+        metavar='COUNT',
+        help='Run COUNT shards as local processes, then merge and cluster'
+    )
+    parser.add_argument(
+        '--shard-workers',
+        type=int,
+        default=None,
+        help='Shard processes run at once with --shards (default: tuned, or COUNT)'
+    )
+    parser.add_argument(
+        '--index',
+        choices=list(INDEX_KINDS) + ['none'],
+        default='auto',
+        help='Nearest-neighbor search index of the embeddings: exact, ivf (approximate), '
+             'auto (exact for small corpora) or none (default: auto)'
+    )
+    parser.add_argument(
+        '--max-seq-length',
+        type=parse_max_seq_length,
+        default=None,
+        metavar='TOKENS',
+        help="Encoder sequence length cap in tokens, or 'auto' to cap at the 99th percentile "
+             "of the corpus, resolved by the staged run and saved to encoder.json (default: the model's limit)"
+    )
+    parser.add_argument(
+        '--long-sentences',
+        choices=list(LONG_POLICIES),
+        default='truncate',
+        help='Encoding of sentences over --max-seq-length: truncate, window (mean-pooled '
+             'windows) or reject (labeled as noise) (default: truncate)'
+    )
+    parser.add_argument(
+        '--coreset-size',
+        type=int,
+        default=None,
+        help='Fit the clusterer on a coreset of this many sentences and assign the rest (default: disabled)'
+    )
+    parser.add_argument(
+        '--coreset-strategy',
+        choices=list(CORESET_STRATEGIES),
+        default='kmeans++',
+        help='Coreset sampling: kmeans++ (importance sampling) or stratified (per source PDF) (default: kmeans++)'
+    )
+    parser.add_argument(
+        '--partitions',
+        type=int,
+        default=None,
+        help='Cluster in this many coarse partitions instead of one global fit'
+    )
+    parser.add_argument(
+        '--no-sentence-store',
+        action='store_true',
+        help='Do not write the indexed SQLite sentence store (sentences.sqlite)'
+    )
+    parser.add_argument(
+        '--autotune',
+        action='store_true',
+        help="Calibrate batch sizes, torch threads and worker counts on this machine and save "
+             "its tuning profile before running"
+    )
+    parser.add_argument(
+        '--no-tuning',
+        action='store_true',
+        help="Ignore this machine's saved tuning profile and use the built-in defaults"
+    )
+    parser.add_argument(
+        '--tuning-dir',
+        default=DEFAULT_TUNING_DIR,
+        help=f'Directory of the per-machine tuning profiles (default: {DEFAULT_TUNING_DIR})'
+    )
+    args = parser.parse_args()
+    
+    if args.local:
+        logger.info(f"Ingesting local PDFs from: {', '.join(args.local)}")
+    elif args.target_url:
+        TARGET_URL = args.target_url
         logger.info(f"Using target URL from command line: {TARGET_URL}")
     else:
         logger.warning(
@@ -170,8 +1448,59 @@ def main():
             "Please provide a target URL as a command-line argument or update TARGET_URL in pipeline.py"
         )
     
-    pipeline = DataPipeline(target_url=TARGET_URL)
-    pipeline.run()
+    pipeline_kwargs = dict(
+        target_url=TARGET_URL,
+        output_format=args.format,
+        store_embeddings=args.store_embeddings,
+        profile_stage=args.profile_stage,
+        profile_mode=args.profile_mode,
+        local_sources=args.local,
+        recursive=args.recursive,
+        n_partitions=args.partitions,
+        index_kind=args.index,
+        max_seq_length=args.max_seq_length,
+        long_policy=args.long_sentences,
+        coreset_size=args.coreset_size,
+        coreset_strategy=args.coreset_strategy,
+        sentence_store=not args.no_sentence_store
+    )
+    
+    pipeline = None
+    if args.autotune:
+        pipeline = DataPipeline(**pipeline_kwargs)
+        pipeline_kwargs['tuning'] = pipeline.autotune(args.tuning_dir)
+    elif not args.no_tuning:
+        profile = load_profile(args.tuning_dir)
+        if profile is not None:
+            pipeline_kwargs['tuning'] = profile['settings']
+            log_settings(profile['settings'])
+    tuning = pipeline_kwargs.get('tuning') or {}
+    
+    if args.shards:
+        run_sharded(
+            pipeline_kwargs,
+            args.shards,
+            max_workers=args.shard_workers or tuning.get('shard_workers'),
+            force=args.force
+        )
+        return
+    if args.shard:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+        DataPipeline(**pipeline_kwargs, shard=shard).run_shard(force=args.force)
+        return
+    
+    pipeline = pipeline or DataPipeline(**pipeline_kwargs)
+    if args.merge_shards:
+        pipeline.run_merge(args.merge_shards)
+    elif args.incremental:
+        pipeline.run_incremental()
+    elif args.streaming:
+        pipeline.run_streaming(n_extract_workers=args.extract_workers)
+    else:
+        pipeline.run(stages=args.stage, force=args.force)
 
 
 if __name__ == "__main__":
@@ -1,19 +1,26 @@
 """Re-cluster existing sentences with updated parameters.
 
-This script loads sentences from sentences_raw.csv, regenerates embeddings,
-and performs clustering with the current parameters, then outputs
-sentences_clustered.csv. Useful for experimenting with different clustering
-parameters without re-running the entire pipeline.
+This script loads sentences from sentences_raw.csv (or a Parquet/Arrow table),
+regenerates embeddings unless the table stores them, and performs clustering
+with the current parameters, then outputs sentences_clustered.csv. Useful for
+experimenting with different clustering parameters without re-running the
+entire pipeline.
 """
 
 import logging
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
 import pandas as pd
 
 from embeddings.encoder import SentenceEncoder
-from clustering.clusterer import SentenceClusterer
+from clustering.clusterer import SentenceClusterer, save_soft_assignments
+from clustering.coreset import CORESET_STRATEGIES, label_agreement
+from clustering.report import save_cluster_summary, summarize_clusters
+from clustering.sweep import parameter_grid, run_sweep
+from storage.columnar import read_sentences, write_sentences
+from telemetry.profiler import PROFILE_MODES, RunProfiler
+from tuning.autotune import DEFAULT_TUNING_DIR, load_profile, log_settings
 
 # Configure logging
 logging.basicConfig(
@@ -34,63 +41,225 @@ def recluster(
     min_cluster_size: int = 5,
     min_samples: int = 3,
     n_components: Optional[int] = None,
-    metric: str = 'cosine'
+    metric: str = 'cosine',
+    n_partitions: Optional[int] = None,
+    n_jobs: Optional[int] = None,
+    merge_threshold: Optional[float] = None,
+    model_path: Optional[str] = "data/output/cluster_model.pkl",
+    assign_model: Optional[str] = None,
+    warm_start: Optional[str] = None,
+    low_memory: bool = False,
+    topk: int = 0,
+    store_embeddings: bool = False,
+    report_path: Optional[str] = None,
+    profile_stage: Optional[str] = None,
+    profile_mode: str = 'cprofile',
+    sweep: Optional[Dict[str, List[Any]]] = None,
+    coreset_size: Optional[int] = None,
+    coreset_strategy: str = 'kmeans++',
+    coreset_check: bool = False,
+    tuning: Optional[Dict[str, Any]] = None
 ):
     """
-    Re-cluster sentences from an existing CSV file.
+    Re-cluster sentences from an existing sentence table.
     
     Args:
-        input_csv: Path to sentences_raw.csv
-        output_csv: Path to output sentences_clustered.csv
+        input_csv: Path to sentences_raw (.csv, .parquet or .arrow); embeddings stored
+            in the table are reused instead of re-encoding
+        output_csv: Path to output sentences_clustered (format from the extension)
         method: Clustering method ('hdbscan' or 'gmm' for EM/GMM)
         min_cluster_size: Minimum cluster size for HDBSCAN
         min_samples: Minimum samples for HDBSCAN
         n_components: Number of clusters for GMM (auto if None)
         metric: Distance metric ('euclidean' or 'cosine')
+        n_partitions: Number of coarse partitions for hierarchical clustering (disabled if None)
+        n_jobs: Worker processes for partitioned clustering (CPU count if None)
+        merge_threshold: Centroid cosine similarity for merging clusters across partitions
+        model_path: Where to save the fitted cluster model (not saved if None)
+        assign_model: Path of a saved cluster model; when given, sentences are assigned
+            to its clusters instead of refitting
+        warm_start: Path of a saved GMM cluster model used to seed EM
+        low_memory: Avoid copies and float64 upcasts during clustering and report peak memory
+        topk: Number of soft cluster assignments stored per sentence next to the
+            output CSV (disabled if 0)
+        store_embeddings: Store embeddings as a column of the output table (Parquet/Arrow only)
+        report_path: Where to write the JSON telemetry report
+            (defaults to <output stem>_run_report.json next to the output)
+        profile_stage: Stage to run under a function-level profiler: 'load', 'encode',
+            'sweep', 'assign', 'cluster', 'full_fit', 'write', 'topk' or 'summary'
+            (disabled if None)
+        profile_mode: Profiler for profile_stage: 'cprofile' or 'sampling'
+        sweep: Parameter lists for a sweep, as keyword arguments of
+            clustering.sweep.parameter_grid() (e.g. {'methods': ['gmm'], 'n_components': [10, 20]}).
+            When given, every configuration is fitted in parallel (n_jobs workers) and a
+            comparison table is written to <output stem>_sweep.csv instead of labels
+        coreset_size: Fit on a coreset of this many sentences and assign the rest
+            (disabled if None)
+        coreset_strategy: Coreset sampling: 'kmeans++' (importance sampling) or
+            'stratified' (proportional per source PDF)
+        coreset_check: Also fit on all sentences and report the agreement (adjusted
+            Rand index, NMI) and speedup of the coreset fit
+        tuning: Tuned settings of this machine ('settings' of a tuning profile) for the
+            encoder batch size, torch threads and n_jobs (built-in defaults if None)
     """
+    tuning = tuning or {}
+    n_jobs = n_jobs or tuning.get('cluster_jobs')
     logger.info("=" * 80)
     logger.info("Re-clustering Sentences")
     logger.info("=" * 80)
     
-    # Load sentences
-    logger.info(f"\n[Step 1/3] Loading sentences from {input_csv}...")
-    input_path = Path(input_csv)
-    if not input_path.exists():
-        logger.error(f"Input file not found: {input_csv}")
-        return
-    
-    sentences_df = pd.read_csv(input_csv)
-    logger.info(f"Loaded {len(sentences_df)} sentences")
-    
-    # Generate embeddings
-    logger.info("\n[Step 2/3] Generating sentence embeddings...")
-    encoder = SentenceEncoder()
-    sentence_texts = sentences_df['sentence_text'].tolist()
-    embeddings = encoder.encode(sentence_texts)
-    
-    # Perform clustering
-    logger.info("\n[Step 3/3] Performing semantic clustering...")
-    clusterer = SentenceClusterer(
-        method=method,
-        min_cluster_size=min_cluster_size,
-        min_samples=min_samples,
-        n_components=n_components,
-        metric=metric
-    )
-    cluster_labels = clusterer.fit_predict(embeddings)
-    
-    # Create clustered sentences CSV
-    logger.info("\nCreating clustered sentences CSV...")
-    clustered_df = sentences_df.copy()
-    clustered_df['cluster_id'] = cluster_labels
-    
-    # Reorder columns: sentence_id, sentence_text, cluster_id, source_pdf, source_url
-    clustered_df = clustered_df[['sentence_id', 'sentence_text', 'cluster_id', 'source_pdf', 'source_url']]
-    
     output_path = Path(output_csv)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    clustered_df.to_csv(output_path, index=False)
-    logger.info(f"Saved {len(clustered_df)} labeled sentences to {output_path}")
+    profiler = RunProfiler(
+        'recluster',
+        report_path=report_path or output_path.with_name(f"{output_path.stem}_run_report.json"),
+        profile_stage=profile_stage,
+        profile_mode=profile_mode,
+        params={
+            'input': str(input_csv),
+            'assign_model': assign_model,
+            'warm_start': warm_start,
+            'topk': topk,
+        }
+    )
+    
+    with profiler:
+        # Load sentences
+        logger.info(f"\n[Step 1/3] Loading sentences from {input_csv}...")
+        input_path = Path(input_csv)
+        if not input_path.exists():
+            logger.error(f"Input file not found: {input_csv}")
+            return
+        
+        with profiler.stage('load') as record:
+            sentences_df, embeddings = read_sentences(input_csv, with_embeddings=True)
+            record.add_items(len(sentences_df))
+        logger.info(f"Loaded {len(sentences_df)} sentences")
+        
+        # Generate embeddings
+        if embeddings is not None:
+            logger.info(f"\n[Step 2/3] Using stored embeddings with shape {embeddings.shape}")
+        else:
+            logger.info("\n[Step 2/3] Generating sentence embeddings...")
+            with profiler.stage('encode') as record:
+                encoder = SentenceEncoder(
+                    batch_size=tuning.get('encoder_batch_size') or 32,
+                    num_threads=tuning.get('torch_threads')
+                )
+                sentence_texts = sentences_df['sentence_text'].tolist()
+                embeddings = encoder.encode(sentence_texts)
+                record.add_items(len(sentence_texts))
+        
+        if sweep is not None:
+            configs = parameter_grid(**sweep)
+            sweep_path = output_path.with_name(f"{output_path.stem}_sweep.csv")
+            logger.info(f"\n[Step 3/3] Sweeping {len(configs)} clustering configurations...")
+            with profiler.stage('sweep') as record:
+                results = run_sweep(embeddings, configs, n_jobs=n_jobs)
+                results.to_csv(sweep_path, index=False)
+                record.add_items(len(configs))
+                record.add_outputs([sweep_path])
+            
+            logger.info("\n" + "=" * 80)
+            logger.info("Sweep Results (best silhouette first)")
+            logger.info("=" * 80)
+            logger.info("\n" + results.drop(columns=['peak_memory_bytes']).to_string(index=False, float_format='%.3f'))
+            logger.info(f"\nSweep table: {sweep_path}")
+            logger.info("=" * 80)
+            return
+        
+        # Perform clustering
+        if assign_model:
+            logger.info(f"\n[Step 3/3] Assigning sentences with saved model {assign_model}...")
+            with profiler.stage('assign') as record:
+                clusterer = SentenceClusterer.load(assign_model)
+                cluster_labels = clusterer.assign(embeddings)
+                drift = clusterer.drift_report(embeddings, cluster_labels)
+                record.add_items(len(cluster_labels))
+            if drift['refit_recommended']:
+                logger.warning("Cluster drift exceeds thresholds; consider re-running without --assign-model")
+        else:
+            logger.info("\n[Step 3/3] Performing semantic clustering...")
+            clusterer = SentenceClusterer(
+                method=method,
+                min_cluster_size=min_cluster_size,
+                min_samples=min_samples,
+                n_components=n_components,
+                metric=metric,
+                n_partitions=n_partitions,
+                n_jobs=n_jobs,
+                merge_threshold=merge_threshold,
+                low_memory=low_memory,
+                coreset_size=coreset_size,
+                coreset_strategy=coreset_strategy
+            )
+            profiler.params['clusterer'] = clusterer._params()
+            with profiler.stage('cluster') as record:
+                previous = SentenceClusterer.load(warm_start) if warm_start else None
+                cluster_labels = clusterer.fit_predict(
+                    embeddings,
+                    warm_start=previous,
+                    strata=pd.factorize(sentences_df['source_pdf'])[0]
+                )
+                record.add_items(len(cluster_labels))
+                if clusterer.coreset_report_:
+                    record.extra['coreset'] = clusterer.coreset_report_
+                if model_path:
+                    clusterer.save(model_path)
+                    record.add_outputs([Path(model_path)])
+            
+            if coreset_check and clusterer.coreset_report_:
+                logger.info("\nFitting on all sentences to check the coreset fit...")
+                with profiler.stage('full_fit') as record:
+                    full_params = clusterer._params()
+                    full_params.pop('coreset_size')
+                    full_params.pop('coreset_strategy')
+                    full_labels = SentenceClusterer(**full_params).fit_predict(embeddings, warm_start=previous)
+                    record.add_items(len(full_labels))
+                    agreement = label_agreement(cluster_labels, full_labels)
+                    record.extra['agreement'] = agreement
+                # Stage times are final once the stages have exited
+                coreset_stage = next(stage for stage in profiler.stages if stage.name == 'cluster')
+                agreement['speedup'] = round(record.wall_seconds / max(coreset_stage.wall_seconds, 1e-9), 2)
+                logger.info(
+                    f"Coreset vs. full fit: adjusted Rand index {agreement['adjusted_rand_index']:.3f}, "
+                    f"NMI {agreement['normalized_mutual_info']:.3f}, "
+                    f"{agreement['n_clusters']} vs. {agreement['n_clusters_reference']} clusters, "
+                    f"{agreement['speedup']:.1f}x faster"
+                )
+        
+        # Create clustered sentences CSV
+        logger.info("\nCreating clustered sentences CSV...")
+        with profiler.stage('write') as record:
+            clustered_df = sentences_df.copy()
+            clustered_df['cluster_id'] = cluster_labels
+            
+            # Reorder columns: sentence_id, sentence_text, cluster_id, source_pdf, source_url
+            clustered_df = clustered_df[['sentence_id', 'sentence_text', 'cluster_id', 'source_pdf', 'source_url']]
+            
+            write_sentences(clustered_df, output_path, embeddings=embeddings if store_embeddings else None)
+            record.add_items(len(clustered_df))
+            record.add_outputs([output_path])
+        logger.info(f"Saved {len(clustered_df)} labeled sentences to {output_path}")
+        
+        if topk:
+            topk_path = output_path.with_name(f"{output_path.stem}_topk.npz")
+            with profiler.stage('topk') as record:
+                topk_ids, topk_probs = clusterer.predict_topk(embeddings, k=topk)
+                save_soft_assignments(
+                    topk_path,
+                    clustered_df['sentence_id'].to_numpy(),
+                    topk_ids,
+                    topk_probs
+                )
+                record.add_items(len(topk_ids))
+                record.add_outputs([topk_path])
+        
+        summary_path = output_path.with_name(f"{output_path.stem}_summary.json")
+        with profiler.stage('summary') as record:
+            save_cluster_summary(summary_path, summarize_clusters(clustered_df, embeddings))
+            record.add_items(len(clustered_df))
+            record.add_outputs([summary_path])
     
     # Summary statistics
     logger.info("\n" + "=" * 80)
@@ -110,6 +279,7 @@ def recluster(
             logger.info(f"  Cluster {cluster_id}: {count} sentences")
     
     logger.info(f"\nOutput file: {output_path}")
+    logger.info(f"Cluster summary: {summary_path}")
     logger.info("=" * 80)
 
 
@@ -124,13 +294,13 @@ def main():
         '--input',
         type=str,
         default='data/output/sentences_raw.csv',
-        help='Input CSV file (default: data/output/sentences_raw.csv)'
+        help='Input table, .csv/.parquet/.arrow (default: data/output/sentences_raw.csv)'
     )
     parser.add_argument(
         '--output',
         type=str,
         default='data/output/sentences_clustered.csv',
-        help='Output CSV file (default: data/output/sentences_clustered.csv)'
+        help='Output table, format from the extension (default: data/output/sentences_clustered.csv)'
     )
     parser.add_argument(
         '--method',
@@ -164,9 +334,164 @@ def main():
         default='cosine',
         help='Distance metric (default: cosine)'
     )
+    parser.add_argument(
+        '--partitions',
+        type=int,
+        default=None,
+        help='Number of coarse k-means partitions for hierarchical clustering (default: disabled)'
+    )
+    parser.add_argument(
+        '--n-jobs',
+        type=int,
+        default=None,
+        help='Worker processes for partitioned clustering or --sweep (default: tuned, or CPU count)'
+    )
+    parser.add_argument(
+        '--merge-threshold',
+        type=float,
+        default=None,
+        help='Merge clusters across partitions above this centroid cosine similarity (default: disabled)'
+    )
+    parser.add_argument(
+        '--model-out',
+        type=str,
+        default='data/output/cluster_model.pkl',
+        help='Where to save the fitted cluster model (default: data/output/cluster_model.pkl)'
+    )
+    parser.add_argument(
+        '--assign-model',
+        type=str,
+        default=None,
+        help='Assign sentences to the clusters of a saved model instead of refitting'
+    )
+    parser.add_argument(
+        '--warm-start',
+        type=str,
+        default=None,
+        help='Seed GMM from the means, weights and covariances of a saved model'
+    )
+    parser.add_argument(
+        '--low-memory',
+        action='store_true',
+        help='Skip redundant normalization copies, keep float32 and report peak clustering memory'
+    )
+    parser.add_argument(
+        '--store-embeddings',
+        action='store_true',
+        help='Store embeddings as a column of the output table (parquet/arrow only)'
+    )
+    parser.add_argument(
+        '--topk',
+        type=int,
+        default=0,
+        help='Store the top-k cluster IDs and probabilities per sentence (default: disabled)'
+    )
+    parser.add_argument(
+        '--report',
+        type=str,
+        default=None,
+        help='Where to write the JSON telemetry report (default: <output stem>_run_report.json)'
+    )
+    parser.add_argument(
+        '--profile-stage',
+        choices=['load', 'encode', 'sweep', 'assign', 'cluster', 'full_fit', 'write', 'topk', 'summary'],
+        default=None,
+        help='Run this stage under a function-level profiler'
+    )
+    parser.add_argument(
+        '--profile-mode',
+        choices=list(PROFILE_MODES),
+        default='cprofile',
+        help='Profiler for --profile-stage: cprofile (exact) or sampling (low overhead) (default: cprofile)'
+    )
+    parser.add_argument(
+        '--coreset-size',
+        type=int,
+        default=None,
+        help='Fit on a coreset of this many sentences and assign the rest (default: disabled)'
+    )
+    parser.add_argument(
+        '--coreset-strategy',
+        choices=list(CORESET_STRATEGIES),
+        default='kmeans++',
+        help='Coreset sampling: kmeans++ (importance sampling) or stratified (per source PDF) (default: kmeans++)'
+    )
+    parser.add_argument(
+        '--coreset-check',
+        action='store_true',
+        help='Also fit on all sentences and report the agreement and speedup of the coreset fit'
+    )
+    
+    parser.add_argument(
+        '--sweep',
+        action='store_true',
+        help='Fit every combination of the --sweep-* values in parallel and write a comparison table'
+    )
+    parser.add_argument(
+        '--sweep-method',
+        nargs='+',
+        choices=['hdbscan', 'gmm'],
+        default=None,
+        help='Methods to sweep (default: --method)'
+    )
+    parser.add_argument(
+        '--sweep-n-components',
+        nargs='+',
+        type=int,
+        default=None,
+        help='GMM component counts to sweep (default: --n-components)'
+    )
+    parser.add_argument(
+        '--sweep-min-cluster-size',
+        nargs='+',
+        type=int,
+        default=None,
+        help='HDBSCAN minimum cluster sizes to sweep (default: --min-cluster-size)'
+    )
+    parser.add_argument(
+        '--sweep-min-samples',
+        nargs='+',
+        type=int,
+        default=None,
+        help='HDBSCAN minimum samples to sweep (default: --min-samples)'
+    )
+    parser.add_argument(
+        '--sweep-metric',
+        nargs='+',
+        choices=['euclidean', 'cosine'],
+        default=None,
+        help='Distance metrics to sweep (default: --metric)'
+    )
+    parser.add_argument(
+        '--no-tuning',
+        action='store_true',
+        help="Ignore this machine's saved tuning profile and use the built-in defaults"
+    )
+    parser.add_argument(
+        '--tuning-dir',
+        default=DEFAULT_TUNING_DIR,
+        help=f'Directory of the per-machine tuning profiles (default: {DEFAULT_TUNING_DIR})'
+    )
     
     args = parser.parse_args()
     
+    tuning = None
+    if not args.no_tuning:
+        profile = load_profile(args.tuning_dir)
+        if profile is not None:
+            tuning = profile['settings']
+            log_settings(tuning)
+    
+    sweep = None
+    if args.sweep:
+        sweep = {
+            'methods': args.sweep_method or [args.method],
+            'n_components': args.sweep_n_components or [args.n_components],
+            'min_cluster_size': args.sweep_min_cluster_size or [args.min_cluster_size],
+            'min_samples': args.sweep_min_samples or [args.min_samples],
+            'metrics': args.sweep_metric or [args.metric],
+        }
+    
     recluster(
         input_csv=args.input,
         output_csv=args.output,
@@ -174,7 +499,24 @@ def main():
         min_cluster_size=args.min_cluster_size,
         min_samples=args.min_samples,
         n_components=args.n_components,
-        metric=args.metric
+        metric=args.metric,
+        n_partitions=args.partitions,
+        n_jobs=args.n_jobs,
+        merge_threshold=args.merge_threshold,
+        model_path=args.model_out,
+        assign_model=args.assign_model,
+        warm_start=args.warm_start,
+        low_memory=args.low_memory,
+        topk=args.topk,
+        store_embeddings=args.store_embeddings,
+        report_path=args.report,
+        profile_stage=args.profile_stage,
+        profile_mode=args.profile_mode,
+        sweep=sweep,
+        coreset_size=args.coreset_size,
+        coreset_strategy=args.coreset_strategy,
+        coreset_check=args.coreset_check,
+        tuning=tuning
     )
 
 
@@ -0,0 +1 @@
+"""Search module for nearest-neighbor lookup of similar sentences."""
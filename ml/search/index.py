@@ -0,0 +1,439 @@
+"""Persistent cosine nearest-neighbor indexes over sentence embeddings."""
+
+import json
+import logging
+import math
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+INDEX_KINDS = ('auto', 'exact', 'ivf')
+
+# Largest corpus that 'auto' indexes exactly; larger corpora get an IVF index
+MAX_EXACT_VECTORS = 200_000
+
+# Rows processed per block when normalizing, assigning and scanning vectors
+_BLOCK = 65536
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Unit-normalize rows as float32 so inner products are cosine similarities."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _block(embeddings: np.ndarray, rows: Optional[np.ndarray], start: int) -> np.ndarray:
+    """Block of embeddings at positions start to start + _BLOCK of rows (of all rows if None)."""
+    if rows is None:
+        return embeddings[start:start + _BLOCK]
+    return embeddings[rows[start:start + _BLOCK]]
+
+
+def _merge_topk(
+    best_scores: np.ndarray,
+    best_rows: np.ndarray,
+    scores: np.ndarray,
+    rows: np.ndarray,
+    k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Merge a block of candidate scores into running top-k results.
+    
+    Args:
+        best_scores: Current top-k scores with shape [n_queries, k]
+        best_rows: Their vector rows with shape [n_queries, k]
+        scores: Candidate scores with shape [n_queries, n_candidates]
+        rows: Vector rows of the candidates with shape [n_candidates]
+        k: Number of results kept
+    
+    Returns:
+        Tuple of (scores, rows) of the new top-k, unsorted within each row
+    """
+    all_scores = np.concatenate([best_scores, scores], axis=1)
+    all_rows = np.concatenate([best_rows, np.broadcast_to(rows, scores.shape)], axis=1)
+    keep = np.argpartition(-all_scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(all_scores, keep, axis=1), np.take_along_axis(all_rows, keep, axis=1)
+
+
+class VectorIndex:
+    """Base class of the indexes: memory-mapped vectors, their sentence IDs and metadata."""
+    
+    kind = 'base'
+    
+    def __init__(self, vectors: np.ndarray, ids: np.ndarray, metadata: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the index over already normalized vectors.
+        
+        Args:
+            vectors: Unit-norm float32 vectors with shape [n_vectors, dim]
+            ids: Sentence ID of each vector with shape [n_vectors]
+            metadata: Contents of index.json
+        """
+        self.vectors = vectors
+        self.ids = ids
+        self.metadata = metadata or {}
+    
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+    
+    @property
+    def dim(self) -> int:
+        """Embedding dimension."""
+        return self.vectors.shape[1]
+    
+    def _prepare_queries(self, queries: np.ndarray) -> np.ndarray:
+        """Validate and normalize a [n_queries, dim] query batch."""
+        queries = np.atleast_2d(queries)
+        if queries.shape[1] != self.dim:
+            raise ValueError(f"Expected queries with {self.dim} dimensions, got {queries.shape[1]}")
+        return _normalize(queries)
+    
+    def _finish(self, best_scores: np.ndarray, best_rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Sort top-k results by decreasing score and map vector rows to sentence IDs."""
+        order = np.argsort(-best_scores, axis=1)
+        scores = np.take_along_axis(best_scores, order, axis=1)
+        rows = np.take_along_axis(best_rows, order, axis=1)
+        ids = np.where(rows >= 0, self.ids[np.maximum(rows, 0)], -1)
+        return ids, np.where(rows >= 0, scores, -np.inf).astype(np.float32)
+    
+    def search(self, queries: np.ndarray, k: int = 10, **kwargs) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k most similar vectors of each query.
+        
+        Args:
+            queries: Query embeddings with shape [n_queries, dim]
+            k: Number of neighbors per query
+        
+        Returns:
+            Tuple of (sentence IDs, cosine similarities), both with shape
+            [n_queries, k], most similar first; missing neighbors are -1 / -inf
+        """
+        raise NotImplementedError
+    
+    @staticmethod
+    def _write_metadata(directory: Path, metadata: Dict[str, Any]):
+        """Write index.json with the format version and build time."""
+        metadata = {
+            'format_version': INDEX_FORMAT_VERSION,
+            **metadata,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        with open(directory / "index.json", 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2)
+
+
+class ExactIndex(VectorIndex):
+    """Exact search by blocked matrix products over all vectors."""
+    
+    kind = 'exact'
+    
+    @classmethod
+    def build(
+        cls,
+        embeddings: np.ndarray,
+        ids: np.ndarray,
+        directory: Path,
+        rows: Optional[np.ndarray] = None
+    ) -> 'ExactIndex':
+        """
+        Write an exact index to a directory.
+        
+        Args:
+            embeddings: Embeddings with shape [n_vectors, dim] (may be memory-mapped)
+            ids: Sentence ID of each embedding
+            directory: Output directory
+            rows: Sorted rows of the embeddings to index (all if None)
+        
+        Returns:
+            The index, loaded memory-mapped from the directory
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        n_vectors = embeddings.shape[0] if rows is None else len(rows)
+        dim = embeddings.shape[1]
+        
+        vectors = np.lib.format.open_memmap(
+            directory / "vectors.npy", mode='w+', dtype=np.float32, shape=(n_vectors, dim)
+        )
+        for start in range(0, n_vectors, _BLOCK):
+            vectors[start:start + _BLOCK] = _normalize(_block(embeddings, rows, start))
+        vectors.flush()
+        del vectors
+        ids = np.asarray(ids, dtype=np.int64)
+        np.save(directory / "ids.npy", ids if rows is None else ids[rows])
+        cls._write_metadata(directory, {'kind': cls.kind, 'n_vectors': n_vectors, 'dim': dim})
+        return load_index(directory)
+    
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int = 10,
+        block_size: int = _BLOCK,
+        **kwargs
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k most similar vectors of each query exactly.
+        
+        Only a [n_queries, block_size] score block exists at any time.
+        
+        Args:
+            queries: Query embeddings with shape [n_queries, dim]
+            k: Number of neighbors per query
+            block_size: Vectors scored per matrix product
+        
+        Returns:
+            Tuple of (sentence IDs, cosine similarities), both with shape
+            [n_queries, k], most similar first; missing neighbors are -1 / -inf
+        """
+        queries = self._prepare_queries(queries)
+        best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        best_rows = np.full((len(queries), k), -1, dtype=np.int64)
+        
+        for start in range(0, len(self), block_size):
+            block = self.vectors[start:start + block_size]
+            scores = queries @ block.T
+            rows = np.arange(start, start + len(block))
+            best_scores, best_rows = _merge_topk(best_scores, best_rows, scores, rows, k)
+        return self._finish(best_scores, best_rows)
+
+
+class IVFIndex(VectorIndex):
+    """Approximate search over an inverted file: vectors grouped by nearest k-means centroid.
+    
+    A query scans only the lists of its nprobe most similar centroids. Vectors are
+    stored sorted by list, so each probed list is one contiguous memory-mapped read.
+    """
+    
+    kind = 'ivf'
+    
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        ids: np.ndarray,
+        centroids: np.ndarray,
+        offsets: np.ndarray,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Initialize the index.
+        
+        Args:
+            vectors: Unit-norm vectors sorted by list, shape [n_vectors, dim]
+            ids: Sentence ID of each vector
+            centroids: Unit-norm list centroids with shape [n_lists, dim]
+            offsets: Start row of each list plus the end row, shape [n_lists + 1]
+            metadata: Contents of index.json
+        """
+        super().__init__(vectors, ids, metadata)
+        self.centroids = centroids
+        self.offsets = offsets
+        self.nprobe = int(self.metadata.get('nprobe', 8))
+    
+    @property
+    def n_lists(self) -> int:
+        """Number of inverted lists."""
+        return self.centroids.shape[0]
+    
+    @classmethod
+    def build(
+        cls,
+        embeddings: np.ndarray,
+        ids: np.ndarray,
+        directory: Path,
+        n_lists: Optional[int] = None,
+        nprobe: int = 8,
+        train_size: int = 100_000,
+        random_state: int = 42,
+        rows: Optional[np.ndarray] = None
+    ) -> 'IVFIndex':
+        """
+        Train the list centroids and write an IVF index to a directory.
+        
+        Args:
+            embeddings: Embeddings with shape [n_vectors, dim] (may be memory-mapped)
+            ids: Sentence ID of each embedding
+            directory: Output directory
+            n_lists: Number of inverted lists (defaults to 4 * sqrt(n_vectors))
+            nprobe: Lists scanned per query unless search() is given another value
+            train_size: Maximum number of vectors sampled to train the centroids
+            random_state: Random seed of sampling and k-means
+            rows: Sorted rows of the embeddings to index (all if None)
+        
+        Returns:
+            The index, loaded memory-mapped from the directory
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        n_vectors = embeddings.shape[0] if rows is None else len(rows)
+        dim = embeddings.shape[1]
+        n_lists = min(n_lists or max(1, int(4 * math.sqrt(n_vectors))), n_vectors)
+        
+        rng = np.random.RandomState(random_state)
+        sample = np.sort(rng.choice(n_vectors, size=min(n_vectors, max(train_size, n_lists)), replace=False))
+        logger.info(f"Training {n_lists} IVF lists on {len(sample)} of {n_vectors} vectors")
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, batch_size=4096, n_init=1, random_state=random_state)
+        kmeans.fit(_normalize(embeddings[sample if rows is None else rows[sample]]))
+        centroids = _normalize(kmeans.cluster_centers_)
+        
+        assignments = np.empty(n_vectors, dtype=np.int64)
+        for start in range(0, n_vectors, _BLOCK):
+            block = _normalize(_block(embeddings, rows, start))
+            assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        order = np.argsort(assignments, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=n_lists))])
+        
+        vectors = np.lib.format.open_memmap(
+            directory / "vectors.npy", mode='w+', dtype=np.float32, shape=(n_vectors, dim)
+        )
+        for start in range(0, n_vectors, _BLOCK):
+            positions = order[start:start + _BLOCK]
+            # Sorted rows keep reads from a memory-mapped source sequential
+            sorted_positions = np.sort(positions)
+            block = _normalize(embeddings[sorted_positions if rows is None else rows[sorted_positions]])
+            vectors[start:start + len(positions)] = block[np.searchsorted(sorted_positions, positions)]
+        vectors.flush()
+        del vectors
+        ids = np.asarray(ids, dtype=np.int64)
+        np.save(directory / "ids.npy", (ids if rows is None else ids[rows])[order])
+        np.save(directory / "centroids.npy", centroids)
+        np.save(directory / "offsets.npy", offsets)
+        
+        sizes = np.diff(offsets)
+        cls._write_metadata(directory, {
+            'kind': cls.kind,
+            'n_vectors': n_vectors,
+            'dim': dim,
+            'n_lists': n_lists,
+            'nprobe': nprobe,
+            'largest_list': int(sizes.max()),
+            'empty_lists': int((sizes == 0).sum()),
+        })
+        return load_index(directory)
+    
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int = 10,
+        nprobe: Optional[int] = None,
+        **kwargs
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find approximately the k most similar vectors of each query.
+        
+        Queries are grouped by probed list, so every list is read and scored
+        once per query batch with one matrix product.
+        
+        Args:
+            queries: Query embeddings with shape [n_queries, dim]
+            k: Number of neighbors per query
+            nprobe: Lists scanned per query (the index default if None); more
+                lists raise recall and lower throughput
+        
+        Returns:
+            Tuple of (sentence IDs, cosine similarities), both with shape
+            [n_queries, k], most similar first; missing neighbors are -1 / -inf
+        """
+        queries = self._prepare_queries(queries)
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        best_rows = np.full((len(queries), k), -1, dtype=np.int64)
+        
+        coarse = queries @ self.centroids.T
+        probes = np.argpartition(-coarse, nprobe - 1, axis=1)[:, :nprobe]
+        for list_id in np.unique(probes):
+            start, end = self.offsets[list_id], self.offsets[list_id + 1]
+            if start == end:
+                continue
+            members = np.flatnonzero((probes == list_id).any(axis=1))
+            scores = queries[members] @ self.vectors[start:end].T
+            best_scores[members], best_rows[members] = _merge_topk(
+                best_scores[members], best_rows[members], scores, np.arange(start, end), k
+            )
+        return self._finish(best_scores, best_rows)
+
+
+def build_index(
+    embeddings: np.ndarray,
+    ids: np.ndarray,
+    directory: Path,
+    kind: str = 'auto',
+    exclude: Optional[np.ndarray] = None,
+    **kwargs
+) -> VectorIndex:
+    """
+    Build and persist a nearest-neighbor index.
+    
+    Args:
+        embeddings: Embeddings with shape [n_vectors, dim] (may be memory-mapped)
+        ids: Sentence ID of each embedding
+        directory: Output directory
+        kind: 'exact', 'ivf', or 'auto' (exact up to MAX_EXACT_VECTORS vectors)
+        exclude: Rows left out of the index (e.g. all-zero embeddings of rejected sentences)
+        **kwargs: IVFIndex.build() options (n_lists, nprobe, ...)
+    
+    Returns:
+        The index, loaded memory-mapped from the directory
+    """
+    if kind not in INDEX_KINDS:
+        raise ValueError(f"Unknown index kind: {kind}")
+    if len(ids) != embeddings.shape[0]:
+        raise ValueError(f"Got {len(ids)} IDs for {embeddings.shape[0]} embeddings")
+    rows = None
+    if exclude is not None and len(exclude):
+        rows = np.setdiff1d(np.arange(embeddings.shape[0]), exclude)
+    n_vectors = embeddings.shape[0] if rows is None else len(rows)
+    if n_vectors == 0:
+        raise ValueError("No embeddings to index")
+    if kind == 'auto':
+        kind = 'exact' if n_vectors <= MAX_EXACT_VECTORS else 'ivf'
+    
+    started = time.perf_counter()
+    if kind == 'exact':
+        index = ExactIndex.build(embeddings, ids, directory, rows=rows)
+    else:
+        index = IVFIndex.build(embeddings, ids, directory, rows=rows, **kwargs)
+    logger.info(
+        f"Built {kind} index of {len(index)} vectors in {directory} "
+        f"({time.perf_counter() - started:.1f}s)"
+    )
+    return index
+
+
+def load_index(directory: Path, mmap: bool = True) -> VectorIndex:
+    """
+    Load an index written by build_index().
+    
+    Args:
+        directory: Index directory
+        mmap: Memory-map the vectors instead of reading them into memory
+    
+    Returns:
+        ExactIndex or IVFIndex
+    """
+    directory = Path(directory)
+    with open(directory / "index.json", 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+    if metadata['format_version'] != INDEX_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported index format {metadata['format_version']} "
+            f"(expected {INDEX_FORMAT_VERSION}) in {directory}"
+        )
+    
+    mmap_mode = 'r' if mmap else None
+    vectors = np.load(directory / "vectors.npy", mmap_mode=mmap_mode)
+    ids = np.load(directory / "ids.npy")
+    if metadata['kind'] == 'exact':
+        return ExactIndex(vectors, ids, metadata)
+    return IVFIndex(
+        vectors, ids,
+        centroids=np.load(directory / "centroids.npy"),
+        offsets=np.load(directory / "offsets.npy"),
+        metadata=metadata
+    )
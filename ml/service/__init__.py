@@ -0,0 +1 @@
+"""Service module for long-lived sentence analysis inference."""
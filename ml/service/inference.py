@@ -0,0 +1,325 @@
+"""Micro-batched sentence analysis over a resident encoder and cluster model."""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+from clustering.clusterer import SentenceClusterer
+from embeddings.encoder import ENCODER_SETTINGS_NAME, SentenceEncoder, load_encoder_settings
+from preprocessing.sentence_splitter import SentenceSplitter
+from search.index import VectorIndex, load_index
+from storage.columnar import read_sentences
+from storage.sentence_store import SentenceStore
+
+logger = logging.getLogger(__name__)
+
+# Sentence encoded at startup to load the model weights and check the embedding dimension
+_WARMUP_SENTENCE = "This sentence warms up the encoder before the first request arrives."
+
+
+class MicroBatcher:
+    """Coalesces concurrent requests on an asyncio loop into single batch calls."""
+    
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0
+    ):
+        """
+        Initialize the batcher.
+        
+        Args:
+            process_batch: Blocking function mapping a list of items to a list of
+                results of the same length; it runs on one worker thread
+            max_batch_size: Items after which a batch is dispatched without waiting
+            max_wait_ms: Longest time the first request of a batch waits for others
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # One thread, so the model is never called concurrently and the loop stays responsive
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='batch')
+        self.n_requests = 0
+        self.n_batches = 0
+        self.n_items = 0
+        self.max_batch_seen = 0
+        self.busy_seconds = 0.0
+    
+    def start(self):
+        """Start dispatching batches; must be called from the running event loop."""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._dispatch())
+    
+    async def stop(self):
+        """Stop dispatching and release the worker thread."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._executor.shutdown(wait=True)
+    
+    async def submit(self, items: List[Any]) -> List[Any]:
+        """
+        Queue items for the next batch and wait for their results.
+        
+        Args:
+            items: Items of one request
+        
+        Returns:
+            Results for the items, in order
+        """
+        if not items:
+            return []
+        if self._queue is None:
+            raise RuntimeError("MicroBatcher has not been started")
+        
+        future = asyncio.get_running_loop().create_future()
+        self.n_requests += 1
+        await self._queue.put((items, future))
+        return await future
+    
+    async def _collect(self) -> List[Tuple[List[Any], asyncio.Future]]:
+        """Wait for a request, then gather more until the batch is full or the wait expires."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        size = len(batch[0][0])
+        deadline = loop.time() + self.max_wait
+        
+        while size < self.max_batch_size:
+            # Requests that queued up during the previous batch are taken without waiting
+            if self._queue.empty():
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                request = self._queue.get_nowait()
+            batch.append(request)
+            size += len(request[0])
+        return batch
+    
+    async def _dispatch(self):
+        """Run batches one after the other and hand each request its slice of the results."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            items = [item for request_items, _ in batch for item in request_items]
+            
+            started = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self._executor, self.process_batch, items)
+            except Exception as e:
+                logger.error(f"Batch of {len(items)} items failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self.busy_seconds += time.perf_counter() - started
+            
+            self.n_batches += 1
+            self.n_items += len(items)
+            self.max_batch_seen = max(self.max_batch_seen, len(items))
+            offset = 0
+            for request_items, future in batch:
+                # Requests whose client went away are cancelled; their results are dropped
+                if not future.done():
+                    future.set_result(results[offset:offset + len(request_items)])
+                offset += len(request_items)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Batching statistics since start.
+        
+        Returns:
+            Dictionary with request, batch and item counts, the mean and largest
+            batch size and the time spent processing batches
+        """
+        return {
+            'requests': self.n_requests,
+            'batches': self.n_batches,
+            'items': self.n_items,
+            'mean_batch_size': self.n_items / self.n_batches if self.n_batches else 0.0,
+            'max_batch_size': self.max_batch_seen,
+            'busy_seconds': round(self.busy_seconds, 3),
+        }
+
+
+class InferenceService:
+    """Splits text into sentences and assigns them to the clusters of a saved model."""
+    
+    def __init__(
+        self,
+        model_path: str,
+        encoder: Optional[SentenceEncoder] = None,
+        encoder_config: Optional[Dict[str, Any]] = None,
+        min_tokens: int = 5,
+        topk: int = 3,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        index_dir: Optional[str] = None,
+        sentences_path: Optional[str] = None
+    ):
+        """
+        Load the encoder and the cluster model once for the lifetime of the service.
+        
+        Args:
+            model_path: Cluster model saved by the pipeline (cluster_model.pkl)
+            encoder: Pre-built encoder with the SentenceEncoder interface, used
+                instead of loading SentenceEncoder(**encoder_config)
+            encoder_config: SentenceEncoder keyword arguments; must match the
+                encoder the cluster model was fitted on. Settings not given are
+                taken from the encoder.json the pipeline saved next to the model
+            min_tokens: Minimum number of tokens of an analyzed sentence
+            topk: Soft cluster assignments returned per sentence (none if 0)
+            max_batch_size: Sentences after which a batch is encoded without waiting
+            max_wait_ms: Longest time a request waits for others to share its batch
+            index_dir: Search index built by the pipeline (search_index/) for
+                similar-sentence queries (disabled if None)
+            sentences_path: Sentence table, or sentence store (sentences.sqlite)
+                queried by ID instead of loaded into memory, whose texts are
+                returned with the similar sentences (IDs only if None)
+        """
+        self.model_path = str(model_path)
+        self.clusterer = SentenceClusterer.load(model_path)
+        if encoder is None:
+            saved = load_encoder_settings(Path(model_path).with_name(ENCODER_SETTINGS_NAME))
+            encoder_config = {**saved, **(encoder_config or {})}
+            if encoder_config.get('max_seq_length') == 'auto':
+                # Resolving the cap on the first requests would fix it for the life of the process
+                raise ValueError("The service needs the sequence length cap resolved by the pipeline, not 'auto'")
+            encoder = SentenceEncoder(**encoder_config)
+        self.encoder = encoder
+        self.splitter = SentenceSplitter(min_tokens=min_tokens)
+        self.topk = topk
+        self.index: Optional[VectorIndex] = load_index(index_dir) if index_dir else None
+        self.sentence_texts = None
+        self.sentence_store: Optional[SentenceStore] = None
+        if sentences_path and str(sentences_path).endswith('.sqlite'):
+            self.sentence_store = SentenceStore(sentences_path)
+        elif sentences_path:
+            texts, _ = read_sentences(sentences_path, columns=['sentence_id', 'sentence_text'])
+            self.sentence_texts = texts.set_index('sentence_id')['sentence_text']
+        self.batcher = MicroBatcher(self._process_batch, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        self.started_at: Optional[float] = None
+    
+    def _process_batch(self, items: List[Tuple[str, int]]) -> List[Dict[str, Any]]:
+        """
+        Encode, assign and search one batch of sentences (runs on the batcher's thread).
+        
+        Args:
+            items: (sentence, number of similar sentences requested) of all
+                requests in the batch
+        
+        Returns:
+            One result dictionary per sentence
+        """
+        sentences = [sentence for sentence, _ in items]
+        embeddings = self.encoder.encode(sentences, show_progress_bar=False)
+        labels = self.clusterer.assign(embeddings)
+        # The encoder returns zero vectors for sentences it rejects as too long
+        rejected = ~np.any(embeddings, axis=1)
+        labels[rejected] = -1
+        if self.topk:
+            topk_ids, topk_probs = self.clusterer.predict_topk(embeddings, k=self.topk)
+            topk_ids[rejected] = -1
+        
+        results = []
+        for i, sentence in enumerate(sentences):
+            result = {'sentence_text': sentence, 'cluster_id': int(labels[i])}
+            if self.topk:
+                result['top_clusters'] = [
+                    {'cluster_id': int(cluster_id), 'probability': float(probability)}
+                    for cluster_id, probability in zip(topk_ids[i], topk_probs[i])
+                    if cluster_id >= 0
+                ]
+            results.append(result)
+        
+        # One search over the sentences that asked for neighbors, with the largest k of the batch
+        wanted = [i for i, (_, k) in enumerate(items) if k > 0 and not rejected[i]]
+        if wanted and self.index is not None:
+            max_k = max(items[i][1] for i in wanted)
+            neighbor_ids, neighbor_scores = self.index.search(embeddings[wanted], k=max_k)
+            for row, i in enumerate(wanted):
+                results[i]['similar'] = self._neighbors(
+                    neighbor_ids[row, :items[i][1]], neighbor_scores[row, :items[i][1]]
+                )
+        return results
+    
+    def _neighbors(self, ids: np.ndarray, scores: np.ndarray) -> List[Dict[str, Any]]:
+        """Describe the similar sentences of one query, with their texts when available."""
+        neighbors = []
+        stored = self.sentence_store.get_many(ids[ids >= 0]) if self.sentence_store is not None else {}
+        for sentence_id, score in zip(ids, scores):
+            if sentence_id < 0:
+                break
+            neighbor = {'sentence_id': int(sentence_id), 'score': float(score)}
+            if self.sentence_texts is not None:
+                neighbor['sentence_text'] = self.sentence_texts.get(sentence_id)
+            elif self.sentence_store is not None:
+                neighbor['sentence_text'] = stored.get(int(sentence_id), {}).get('sentence_text')
+            neighbors.append(neighbor)
+        return neighbors
+    
+    async def start(self):
+        """Warm up the encoder and start batching; fails fast on a model/encoder mismatch."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._process_batch, [(_WARMUP_SENTENCE, 1 if self.index else 0)])
+        self.batcher.start()
+        self.started_at = time.time()
+        logger.info(f"Inference service ready (cluster model {self.model_path})")
+    
+    async def stop(self):
+        """Stop batching."""
+        await self.batcher.stop()
+        if self.sentence_store is not None:
+            self.sentence_store.close()
+    
+    async def analyze(self, text: str, similar: int = 0) -> Dict[str, Any]:
+        """
+        Split text into sentences and assign each to a cluster.
+        
+        Args:
+            text: Text to analyze
+            similar: Most similar corpus sentences returned per sentence
+                (none if 0; requires a search index)
+        
+        Returns:
+            Dictionary with 'n_sentences' and 'sentences' (sentence_text, cluster_id,
+            top_clusters and, if requested, similar per sentence)
+        """
+        if similar and self.index is None:
+            raise ValueError("Similar-sentence search needs a service started with a search index")
+        sentences = [sentence['sentence_text'] for sentence in self.splitter.split(text)]
+        results = await self.batcher.submit([(sentence, similar) for sentence in sentences])
+        return {'n_sentences': len(results), 'sentences': results}
+    
+    def info(self) -> Dict[str, Any]:
+        """
+        Describe the loaded models and the batching statistics.
+        
+        Returns:
+            Dictionary with the encoder, the cluster model, the search index, uptime
+            and batching statistics
+        """
+        return {
+            'encoder': getattr(self.encoder, 'model_name', type(self.encoder).__name__),
+            'cluster_model': self.model_path,
+            'cluster_method': self.clusterer.method,
+            'search_index': self.index.metadata if self.index is not None else None,
+            'uptime_seconds': round(time.time() - self.started_at, 1) if self.started_at else 0.0,
+            'batching': self.batcher.stats(),
+        }
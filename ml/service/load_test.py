@@ -0,0 +1,316 @@
+"""Local load test for the inference service.
+
+Run from the ml directory, against a running server:
+
+    python -m service.load_test --url http://127.0.0.1:8000 --concurrency 32 --requests 2000
+
+or against an in-process server, with the saved cluster model or fully offline
+with a hashing encoder and a model fitted on a synthetic corpus:
+
+    python -m service.load_test --model data/output/cluster_model.pkl
+    python -m service.load_test --stub
+
+Reports p50/p90/p99 latency, requests per second and the server's batching statistics.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import numpy as np
+
+from benchmarks.corpus import TOPICS, synthetic_sentences
+from benchmarks.stub_encoder import HashingEncoder
+from clustering.clusterer import SentenceClusterer
+from service.inference import InferenceService
+from service.server import InferenceServer, quiet_request_logging
+
+logger = logging.getLogger(__name__)
+
+
+class _Connection:
+    """Keep-alive HTTP/1.1 client connection speaking just enough HTTP for the service."""
+    
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+    
+    async def request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Tuple[int, Any]:
+        """Send one request, reconnecting if needed, and return (status, decoded JSON body)."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        
+        body = json.dumps(payload).encode() if payload is not None else b''
+        head = (
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        )
+        self.writer.write(head.encode('latin-1') + body)
+        await self.writer.drain()
+        
+        status_line = await self.reader.readline()
+        if not status_line:
+            await self.close()
+            raise ConnectionError("Server closed the connection")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0) or 0)
+        data = await self.reader.readexactly(length) if length else b''
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, json.loads(data) if data else None
+    
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+            self.writer = None
+            self.reader = None
+
+
+def request_texts(n: int, sentences_per_request: int, seed: int = 0) -> List[str]:
+    """
+    Build request bodies from the synthetic benchmark corpus.
+    
+    Args:
+        n: Number of texts
+        sentences_per_request: Sentences per text
+        seed: Random seed
+    
+    Returns:
+        List of texts
+    """
+    sentences = synthetic_sentences(n * sentences_per_request, seed=seed)
+    return [
+        " ".join(sentence['sentence_text'] for sentence in sentences[i:i + sentences_per_request])
+        for i in range(0, len(sentences), sentences_per_request)
+    ]
+
+
+async def run_load(
+    host: str,
+    port: int,
+    texts: List[str],
+    concurrency: int = 16,
+    warmup: int = 20
+) -> Dict[str, Any]:
+    """
+    Send every text to /analyze from concurrent keep-alive clients.
+    
+    Args:
+        host: Server host
+        port: Server port
+        texts: Request texts, sent in order by whichever client is free
+        concurrency: Number of concurrent clients (one connection each)
+        warmup: Requests sent before measuring
+    
+    Returns:
+        Report with request and error counts, requests per second, latency
+        percentiles in milliseconds and the server's batching statistics
+    """
+    warmup_connection = _Connection(host, port)
+    for text in texts[:warmup]:
+        await warmup_connection.request('POST', '/analyze', {'text': text})
+    _, stats_before = await warmup_connection.request('GET', '/stats')
+    
+    measured = texts[warmup:]
+    latencies: List[float] = []
+    errors: List[str] = []
+    n_sentences = 0
+    next_index = 0
+    
+    async def client():
+        nonlocal next_index, n_sentences
+        connection = _Connection(host, port)
+        try:
+            while next_index < len(measured):
+                text = measured[next_index]
+                next_index += 1
+                started = time.perf_counter()
+                try:
+                    status, body = await connection.request('POST', '/analyze', {'text': text})
+                except (ConnectionError, asyncio.IncompleteReadError) as e:
+                    errors.append(f"{type(e).__name__}: {e}")
+                    await connection.close()
+                    continue
+                latencies.append(time.perf_counter() - started)
+                if status != 200:
+                    errors.append(f"HTTP {status}: {body.get('error') if body else ''}")
+                else:
+                    n_sentences += body['n_sentences']
+        finally:
+            await connection.close()
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    
+    _, stats_after = await warmup_connection.request('GET', '/stats')
+    await warmup_connection.close()
+    
+    batching_before, batching_after = stats_before['batching'], stats_after['batching']
+    n_batches = batching_after['batches'] - batching_before['batches']
+    n_items = batching_after['items'] - batching_before['items']
+    latencies_ms = np.array(latencies) * 1000.0 if latencies else np.zeros(1)
+    return {
+        'requests': len(measured),
+        'errors': len(errors),
+        'error_samples': errors[:5],
+        'concurrency': concurrency,
+        'elapsed_seconds': round(elapsed, 3),
+        'requests_per_second': round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        'sentences_per_second': round(n_sentences / elapsed, 1) if elapsed > 0 else 0.0,
+        'latency_ms': {
+            'mean': round(float(latencies_ms.mean()), 2),
+            'p50': round(float(np.percentile(latencies_ms, 50)), 2),
+            'p90': round(float(np.percentile(latencies_ms, 90)), 2),
+            'p99': round(float(np.percentile(latencies_ms, 99)), 2),
+            'max': round(float(latencies_ms.max()), 2),
+        },
+        'batches': n_batches,
+        'mean_batch_size': round(n_items / n_batches, 1) if n_batches else 0.0,
+        'encoder': stats_after['encoder'],
+    }
+
+
+def fit_stub_model(model_path: Path, n_sentences: int = 4000, seed: int = 0) -> HashingEncoder:
+    """
+    Fit a GMM cluster model on hashed embeddings of the synthetic corpus.
+    
+    Args:
+        model_path: Where to save the model
+        n_sentences: Training sentences
+        seed: Random seed of the corpus
+    
+    Returns:
+        The hashing encoder the model was fitted with
+    """
+    encoder = HashingEncoder()
+    sentences = [sentence['sentence_text'] for sentence in synthetic_sentences(n_sentences, seed=seed)]
+    clusterer = SentenceClusterer(method='gmm', n_components=len(TOPICS), metric='cosine', low_memory=True)
+    clusterer.fit_predict(encoder.encode(sentences))
+    clusterer.save(model_path)
+    return encoder
+
+
+async def _run_local(args: argparse.Namespace, texts: List[str]) -> Dict[str, Any]:
+    """Start an in-process server on a free port, load it, and stop it."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.stub:
+            model_path = Path(tmp_dir) / "cluster_model.pkl"
+            encoder = fit_stub_model(model_path, seed=args.seed + 1)
+        else:
+            model_path, encoder = args.model, None
+        service = InferenceService(
+            model_path,
+            encoder=encoder,
+            max_batch_size=args.max_batch_size,
+            max_wait_ms=args.max_wait_ms
+        )
+        server = InferenceServer(service, host='127.0.0.1', port=0)
+        port = await server.start()
+        try:
+            return await run_load('127.0.0.1', port, texts, args.concurrency, args.warmup)
+        finally:
+            await server.stop()
+
+
+def _log_report(report: Dict[str, Any]):
+    """Log a load test report."""
+    latency = report['latency_ms']
+    logger.info("=" * 80)
+    logger.info(f"Load test: {report['requests']} requests, concurrency {report['concurrency']}, "
+                f"encoder {report['encoder']}")
+    logger.info("=" * 80)
+    logger.info(f"Throughput: {report['requests_per_second']} requests/s, "
+                f"{report['sentences_per_second']} sentences/s")
+    logger.info(f"Latency (ms): p50 {latency['p50']}, p90 {latency['p90']}, p99 {latency['p99']}, "
+                f"mean {latency['mean']}, max {latency['max']}")
+    logger.info(f"Batching: {report['batches']} batches, {report['mean_batch_size']} sentences per batch")
+    if report['errors']:
+        logger.warning(f"{report['errors']} failed requests, e.g. {report['error_samples']}")
+
+
+def main():
+    """Main entry point for the load test."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    
+    parser = argparse.ArgumentParser(description="Load test for the inference service")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--url', help='Base URL of a running server, e.g. http://127.0.0.1:8000')
+    target.add_argument('--model', help='Start an in-process server with this cluster model')
+    target.add_argument(
+        '--stub',
+        action='store_true',
+        help='Start an in-process server with a hashing encoder and a synthetic cluster model (offline)'
+    )
+    parser.add_argument('--requests', type=int, default=1000, help='Measured requests (default: 1000)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients (default: 16)')
+    parser.add_argument(
+        '--sentences-per-request',
+        type=int,
+        default=3,
+        help='Sentences in each request text (default: 3)'
+    )
+    parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests sent first (default: 20)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the request texts (default: 0)')
+    parser.add_argument(
+        '--max-batch-size',
+        type=int,
+        default=64,
+        help='Batch size of an in-process server (default: 64)'
+    )
+    parser.add_argument(
+        '--max-wait-ms',
+        type=float,
+        default=5.0,
+        help='Batching wait of an in-process server (default: 5)'
+    )
+    parser.add_argument('--output', default=None, help='Also write the report as JSON to this path')
+    args = parser.parse_args()
+    
+    quiet_request_logging()
+    logging.getLogger('benchmarks').setLevel(logging.WARNING)
+    texts = request_texts(args.requests + args.warmup, args.sentences_per_request, seed=args.seed)
+    
+    if args.url:
+        parsed = urlparse(args.url)
+        report = asyncio.run(run_load(
+            parsed.hostname or '127.0.0.1', parsed.port or 80, texts, args.concurrency, args.warmup
+        ))
+    else:
+        report = asyncio.run(_run_local(args, texts))
+    
+    _log_report(report)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Report saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
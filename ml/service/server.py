@@ -0,0 +1,290 @@
+"""HTTP front end for the inference service, built on asyncio streams.
+
+Run from the ml directory:
+
+    python -m service.server --model data/output/cluster_model.pkl --port 8000
+
+Endpoints: POST /analyze with {"text": "..."}, POST /similar with
+{"text": "...", "k": 10} (needs --index), GET /health and GET /stats.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import signal
+import sys
+from typing import Any, Dict, Optional, Tuple
+
+from embeddings.encoder import LONG_POLICIES
+from service.inference import InferenceService
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 1 << 20
+MAX_SIMILAR = 100
+
+_REASONS = {
+    200: 'OK', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found',
+    405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error',
+}
+
+
+def quiet_request_logging():
+    """Raise the log level of modules that log on every request or batch."""
+    for name in ('embeddings', 'preprocessing', 'clustering'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+
+class InferenceServer:
+    """Minimal HTTP/1.1 server with keep-alive that routes requests to an InferenceService."""
+    
+    def __init__(self, service: InferenceService, host: str = '127.0.0.1', port: int = 8000):
+        """
+        Initialize the server.
+        
+        Args:
+            service: Inference service handling the requests
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+        """
+        self.service = service
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+    
+    async def start(self) -> int:
+        """
+        Start the service and begin accepting connections.
+        
+        Returns:
+            Bound port
+        """
+        await self.service.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Listening on http://{self.host}:{self.port}")
+        return self.port
+    
+    async def stop(self):
+        """Stop accepting connections and shut the service down."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        await self.service.stop()
+    
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """
+        Handle one request.
+        
+        Args:
+            method: HTTP method
+            path: Request path without the query string
+            body: Request body
+        
+        Returns:
+            Tuple of (status code, JSON payload or None)
+        """
+        if method == 'OPTIONS':
+            return 204, None
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        if path == '/stats':
+            return 200, self.service.info()
+        if path not in ('/analyze', '/similar'):
+            return 404, {'error': f"Unknown path: {path}"}
+        if method != 'POST':
+            return 405, {'error': f"Use POST for {path}"}
+        
+        try:
+            request = json.loads(body or b'{}')
+            text = request['text']
+            if not isinstance(text, str):
+                raise TypeError("'text' must be a string")
+            similar = int(request.get('k', 10) if path == '/similar' else request.get('similar', 0))
+            if not 0 <= similar <= MAX_SIMILAR:
+                raise ValueError(f"at most {MAX_SIMILAR} similar sentences can be requested")
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, {'error': f"Expected a JSON body with a 'text' string: {e}"}
+        if similar and self.service.index is None:
+            return 400, {'error': "The service was started without a search index (--index)"}
+        
+        try:
+            return 200, await self.service.analyze(text, similar=similar)
+        except Exception as e:
+            logger.error(f"Analysis failed: {e}")
+            return 500, {'error': str(e)}
+    
+    @staticmethod
+    def _write_response(
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: Optional[Dict[str, Any]],
+        keep_alive: bool
+    ):
+        """Serialize a JSON response; CORS headers let the frontend call the service directly."""
+        body = json.dumps(payload).encode() if payload is not None else b''
+        headers = [
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+            f"Content-Length: {len(body)}",
+            "Access-Control-Allow-Origin: *",
+            "Access-Control-Allow-Methods: GET, POST, OPTIONS",
+            "Access-Control-Allow-Headers: Content-Type",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if payload is not None:
+            headers.append("Content-Type: application/json")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode('latin-1') + body)
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one connection until the client closes it or asks to."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    self._write_response(writer, 400, {'error': "Malformed request line"}, keep_alive=False)
+                    break
+                
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    self._write_response(writer, 400, {'error': "Malformed Content-Length"}, keep_alive=False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    self._write_response(writer, 413, {'error': f"Body exceeds {MAX_BODY_BYTES} bytes"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                
+                status, payload = await self._route(method.upper(), target.split('?', 1)[0], body)
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+    
+    async def serve_forever(self):
+        """Serve until interrupted with SIGINT or SIGTERM."""
+        await self.start()
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except NotImplementedError:
+                pass
+        try:
+            await stop.wait()
+        finally:
+            logger.info("Shutting down")
+            await self.stop()
+
+
+def main():
+    """Main entry point for the inference server."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    
+    parser = argparse.ArgumentParser(description="INCLUSIFY sentence analysis inference service")
+    parser.add_argument(
+        '--model',
+        default='data/output/cluster_model.pkl',
+        help='Cluster model saved by the pipeline (default: data/output/cluster_model.pkl)'
+    )
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='Port to bind (default: 8000)')
+    parser.add_argument(
+        '--encoder-model',
+        default=None,
+        help='Sentence transformer model; must match the one the cluster model was fitted on'
+    )
+    parser.add_argument(
+        '--max-seq-length',
+        type=int,
+        default=None,
+        metavar='TOKENS',
+        help='Encoder sequence length cap in tokens (default: the cap in the encoder.json saved next to '
+             '--model, else the model limit)'
+    )
+    parser.add_argument(
+        '--long-sentences',
+        choices=list(LONG_POLICIES),
+        default=None,
+        help='Encoding of sentences over --max-seq-length; must match the pipeline run '
+             '(default: the policy in encoder.json, else truncate)'
+    )
+    parser.add_argument(
+        '--max-batch-size',
+        type=int,
+        default=64,
+        help='Sentences after which a batch is encoded without waiting (default: 64)'
+    )
+    parser.add_argument(
+        '--max-wait-ms',
+        type=float,
+        default=5.0,
+        help='Longest time a request waits for others to share its batch (default: 5)'
+    )
+    parser.add_argument('--topk', type=int, default=3, help='Soft cluster assignments per sentence (default: 3)')
+    parser.add_argument(
+        '--index',
+        default=None,
+        help='Search index built by the pipeline (e.g. data/output/search_index) to serve /similar'
+    )
+    parser.add_argument(
+        '--sentences',
+        default=None,
+        help='Sentence table or store (e.g. data/output/sentences.sqlite) whose texts /similar returns'
+    )
+    args = parser.parse_args()
+    
+    encoder_config: Dict[str, Any] = {}
+    if args.long_sentences:
+        encoder_config['long_policy'] = args.long_sentences
+    if args.encoder_model:
+        encoder_config['model_name'] = args.encoder_model
+    if args.max_seq_length is not None:
+        encoder_config['max_seq_length'] = args.max_seq_length
+    
+    service = InferenceService(
+        args.model,
+        encoder_config=encoder_config,
+        topk=args.topk,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        index_dir=args.index,
+        sentences_path=args.sentences
+    )
+    quiet_request_logging()
+    asyncio.run(InferenceServer(service, host=args.host, port=args.port).serve_forever())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Storage module for sentence table output formats."""
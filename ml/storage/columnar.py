@@ -0,0 +1,378 @@
+"""Sentence tables in CSV, Parquet or Arrow IPC format, with optional embedding columns."""
+
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Only needed for the columnar formats
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# Output format name -> file extension
+FORMATS = {'csv': '.csv', 'parquet': '.parquet', 'arrow': '.arrow'}
+
+# Low-cardinality columns stored dictionary-encoded
+DICTIONARY_COLUMNS = ('source_pdf', 'source_url')
+
+EMBEDDING_COLUMN = 'embedding'
+
+
+def _require_pyarrow():
+    """Raise a helpful error if pyarrow is missing."""
+    if pa is None:
+        raise ImportError("pyarrow is required for Parquet/Arrow outputs: pip install pyarrow")
+
+
+def format_of(path: Path) -> str:
+    """
+    Infer the table format from a file extension.
+    
+    Args:
+        path: Table file path
+        
+    Returns:
+        Format name ('csv', 'parquet' or 'arrow')
+    """
+    suffix = Path(path).suffix.lower()
+    for fmt, extension in FORMATS.items():
+        if suffix == extension:
+            return fmt
+    if suffix in ('.feather', '.ipc'):
+        return 'arrow'
+    raise ValueError(f"Unsupported table format: {path}")
+
+
+def table_path(directory: Path, stem: str, fmt: str) -> Path:
+    """
+    Path of a table in the given format.
+    
+    Args:
+        directory: Output directory
+        stem: File name without extension
+        fmt: Format name
+        
+    Returns:
+        Path with the format's extension
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown output format: {fmt} (expected one of {list(FORMATS)})")
+    return Path(directory) / f"{stem}{FORMATS[fmt]}"
+
+
+class SentenceTableWriter:
+    """Writes sentence rows as row groups (Parquet) or record batches (Arrow IPC) as they stream in.
+    
+    Dictionary-encoded columns keep one growing dictionary per column, so every
+    batch only adds new values (dictionary deltas) and readers get a single
+    dictionary per column. Embeddings are stored as a fixed-size list column of
+    float32 built directly on the numpy buffer.
+    """
+    
+    def __init__(
+        self,
+        path: str,
+        columns: Sequence[str],
+        embedding_dim: Optional[int] = None,
+        row_group_size: int = 65536
+    ):
+        """
+        Initialize the writer.
+        
+        Args:
+            path: Output file (.csv, .parquet or .arrow)
+            columns: Sentence columns in output order
+            embedding_dim: Dimension of the embedding column (no embeddings if None)
+            row_group_size: Number of rows buffered per row group / record batch
+        """
+        self.path = Path(path)
+        self.format = format_of(self.path)
+        self.columns = list(columns)
+        self.embedding_dim = embedding_dim
+        self.row_group_size = row_group_size
+        self.n_rows = 0
+        self._buffer: List[pd.DataFrame] = []
+        self._embedding_buffer: List[np.ndarray] = []
+        self._buffered = 0
+        self._dictionaries: Dict[str, Dict[str, int]] = {name: {} for name in DICTIONARY_COLUMNS}
+        self._writer = None
+        self._sink = None
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.format == 'csv':
+            if embedding_dim is not None:
+                logger.warning("CSV outputs cannot hold embeddings; the embedding column is dropped")
+                self.embedding_dim = None
+        else:
+            _require_pyarrow()
+            self.schema = self._schema()
+    
+    def _schema(self) -> 'pa.Schema':
+        """Arrow schema of the table."""
+        types = {
+            'sentence_id': pa.int64(),
+            'sentence_text': pa.string(),
+            'cluster_id': pa.int32(),
+        }
+        fields = []
+        for name in self.columns:
+            if name in DICTIONARY_COLUMNS:
+                fields.append(pa.field(name, pa.dictionary(pa.int32(), pa.string())))
+            else:
+                fields.append(pa.field(name, types.get(name, pa.string())))
+        if self.embedding_dim is not None:
+            fields.append(pa.field(EMBEDDING_COLUMN, pa.list_(pa.float32(), self.embedding_dim)))
+        return pa.schema(fields)
+    
+    def _dictionary_array(self, name: str, values: pd.Series) -> 'pa.DictionaryArray':
+        """Encode values against the column's growing dictionary."""
+        dictionary = self._dictionaries[name]
+        codes, uniques = pd.factorize(values.astype(str), sort=False)
+        mapping = np.empty(len(uniques), dtype=np.int32)
+        for i, value in enumerate(uniques):
+            mapping[i] = dictionary.setdefault(value, len(dictionary))
+        return pa.DictionaryArray.from_arrays(
+            pa.array(mapping[codes], type=pa.int32()),
+            pa.array(list(dictionary), type=pa.string())
+        )
+    
+    def _record_batch(self, df: pd.DataFrame, embeddings: Optional[np.ndarray]) -> 'pa.RecordBatch':
+        """Convert buffered rows into an Arrow record batch."""
+        arrays = []
+        for field in self.schema:
+            if field.name == EMBEDDING_COLUMN:
+                flat = np.ascontiguousarray(embeddings, dtype=np.float32).reshape(-1)
+                # pa.array on a contiguous float32 buffer does not copy
+                arrays.append(pa.FixedSizeListArray.from_arrays(pa.array(flat), self.embedding_dim))
+            elif field.name in DICTIONARY_COLUMNS:
+                arrays.append(self._dictionary_array(field.name, df[field.name]))
+            else:
+                values = df[field.name].to_numpy()
+                if pa.types.is_string(field.type):
+                    values = values.astype(object)
+                arrays.append(pa.array(values, type=field.type, from_pandas=True))
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+    
+    def _open_writer(self):
+        """Create the Parquet or Arrow IPC file writer."""
+        if self.format == 'parquet':
+            self._writer = pq.ParquetWriter(self.path, self.schema, compression='zstd')
+        else:
+            self._sink = pa.OSFile(str(self.path), 'wb')
+            self._writer = pa.ipc.new_file(
+                self._sink, self.schema,
+                options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+            )
+    
+    def _flush(self):
+        """Write the buffered rows as one row group / record batch."""
+        if not self._buffer:
+            return
+        df = pd.concat(self._buffer, ignore_index=True) if len(self._buffer) > 1 else self._buffer[0]
+        embeddings = None
+        if self.embedding_dim is not None:
+            embeddings = np.concatenate(self._embedding_buffer) if len(self._embedding_buffer) > 1 else self._embedding_buffer[0]
+        self._buffer, self._embedding_buffer, self._buffered = [], [], 0
+        
+        if self.format == 'csv':
+            df[self.columns].to_csv(self.path, mode='a' if self.n_rows else 'w', header=not self.n_rows, index=False)
+        else:
+            batch = self._record_batch(df, embeddings)
+            if self._writer is None:
+                self._open_writer()
+            if self.format == 'parquet':
+                self._writer.write_batch(batch, row_group_size=len(df))
+            else:
+                self._writer.write_batch(batch)
+        self.n_rows += len(df)
+    
+    def write(self, df: pd.DataFrame, embeddings: Optional[np.ndarray] = None):
+        """
+        Append rows, flushing full row groups.
+        
+        Args:
+            df: Rows with (at least) the writer's columns
+            embeddings: Matching embeddings when the table has an embedding column
+        """
+        if self.embedding_dim is not None:
+            if embeddings is None or len(embeddings) != len(df):
+                raise ValueError("Embeddings must be provided for every row")
+        
+        for start in range(0, len(df), self.row_group_size):
+            end = start + self.row_group_size
+            chunk = df.iloc[start:end]
+            # Fill the current row group first
+            take = min(len(chunk), self.row_group_size - self._buffered)
+            for part, part_start in ((chunk.iloc[:take], start), (chunk.iloc[take:], start + take)):
+                if len(part) == 0:
+                    continue
+                self._buffer.append(part)
+                if self.embedding_dim is not None:
+                    self._embedding_buffer.append(embeddings[part_start:part_start + len(part)])
+                self._buffered += len(part)
+                if self._buffered >= self.row_group_size:
+                    self._flush()
+    
+    def close(self):
+        """Flush remaining rows and finalize the file."""
+        self._flush()
+        if self.n_rows == 0 and self.format == 'csv':
+            pd.DataFrame(columns=self.columns).to_csv(self.path, index=False)
+        if self.format != 'csv':
+            if self._writer is None:
+                # Empty table: still write a valid file with the schema
+                self._open_writer()
+                self._writer.write_table(self.schema.empty_table())
+            self._writer.close()
+            if self._sink is not None:
+                self._sink.close()
+    
+    def __enter__(self) -> 'SentenceTableWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def write_sentences(
+    df: pd.DataFrame,
+    path: str,
+    embeddings: Optional[np.ndarray] = None,
+    row_group_size: int = 65536
+) -> Path:
+    """
+    Write a sentence table in the format given by the file extension.
+    
+    Args:
+        df: Sentence rows
+        path: Output file (.csv, .parquet or .arrow)
+        embeddings: Optional embeddings stored as an embedding column
+        row_group_size: Rows per row group / record batch
+        
+    Returns:
+        Path the table was written to
+    """
+    embedding_dim = embeddings.shape[1] if embeddings is not None and embeddings.ndim == 2 else None
+    with SentenceTableWriter(path, df.columns, embedding_dim, row_group_size) as writer:
+        writer.write(df, embeddings if embedding_dim is not None else None)
+    return Path(path)
+
+
+def _read_schema(path: Path) -> 'pa.Schema':
+    """Schema of a Parquet or Arrow IPC file without reading its data."""
+    _require_pyarrow()
+    if format_of(path) == 'parquet':
+        return pq.read_schema(path)
+    return pa.ipc.open_file(pa.memory_map(str(path), 'r')).schema
+
+
+def _read_arrow_table(path: Path, columns: Optional[Sequence[str]]) -> 'pa.Table':
+    """Read a Parquet or memory-mapped Arrow IPC file as an Arrow table."""
+    _require_pyarrow()
+    if format_of(path) == 'parquet':
+        return pq.read_table(path, columns=list(columns) if columns else None, memory_map=True)
+    table = pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+    return table.select(list(columns)) if columns else table
+
+
+def read_sentences(
+    path: str,
+    columns: Optional[Sequence[str]] = None,
+    with_embeddings: bool = False
+) -> Tuple[pd.DataFrame, Optional[np.ndarray]]:
+    """
+    Read a sentence table in any supported format.
+    
+    Embeddings from single-batch memory-mapped Arrow IPC files are returned as
+    zero-copy views of the mapped file.
+    
+    Args:
+        path: Table file (.csv, .parquet or .arrow)
+        columns: Columns to load (all sentence columns if None)
+        with_embeddings: Whether to also return the embedding column
+        
+    Returns:
+        Tuple of (sentence DataFrame, embeddings or None if absent/not requested)
+    """
+    path = Path(path)
+    if format_of(path) == 'csv':
+        return pd.read_csv(path, usecols=list(columns) if columns else None), None
+    
+    wanted = None
+    if columns is not None:
+        available = _read_schema(path).names
+        wanted = list(columns)
+        if with_embeddings and EMBEDDING_COLUMN in available:
+            wanted.append(EMBEDDING_COLUMN)
+    table = _read_arrow_table(path, wanted)
+    embeddings = None
+    if with_embeddings and EMBEDDING_COLUMN in table.column_names:
+        column = table.column(EMBEDDING_COLUMN)
+        chunks = column.chunks
+        dim = column.type.list_size
+        if len(chunks) == 1:
+            values = chunks[0].flatten().to_numpy(zero_copy_only=True)
+        else:
+            values = np.concatenate([chunk.flatten().to_numpy(zero_copy_only=True) for chunk in chunks])
+        embeddings = values.reshape(-1, dim)
+    
+    names = [name for name in (columns or table.column_names) if name != EMBEDDING_COLUMN]
+    df = table.select(names).to_pandas()
+    for name in DICTIONARY_COLUMNS:
+        if name in df.columns:
+            df[name] = df[name].astype(str)
+    return df, embeddings
+
+
+def append_sentences(
+    df: pd.DataFrame,
+    path: str,
+    embeddings: Optional[np.ndarray] = None,
+    row_group_size: int = 65536
+) -> Path:
+    """
+    Append rows to an existing sentence table.
+    
+    CSV files are appended in place. Parquet and Arrow files are immutable, so
+    existing batches are streamed into a new file followed by the new rows.
+    
+    Args:
+        df: Rows to append (same columns as the table)
+        path: Existing table file
+        embeddings: Embeddings for the new rows if the table has an embedding column
+        row_group_size: Rows per row group / record batch
+        
+    Returns:
+        Path of the table
+    """
+    path = Path(path)
+    if format_of(path) == 'csv':
+        df.to_csv(path, mode='a', header=False, index=False)
+        return path
+    
+    existing = _read_arrow_table(path, None)
+    has_embeddings = EMBEDDING_COLUMN in existing.column_names
+    embedding_dim = existing.schema.field(EMBEDDING_COLUMN).type.list_size if has_embeddings else None
+    if has_embeddings and embeddings is None:
+        raise ValueError(f"{path} stores embeddings; embeddings for the new rows are required")
+    
+    columns = [name for name in existing.column_names if name != EMBEDDING_COLUMN]
+    tmp_path = path.with_name(path.stem + '.tmp' + path.suffix)
+    with SentenceTableWriter(tmp_path, columns, embedding_dim, row_group_size) as writer:
+        for batch in existing.to_batches(max_chunksize=row_group_size):
+            batch_df = pa.Table.from_batches([batch]).select(columns).to_pandas()
+            batch_embeddings = None
+            if has_embeddings:
+                values = batch.column(EMBEDDING_COLUMN).flatten().to_numpy()
+                batch_embeddings = values.reshape(-1, embedding_dim)
+            writer.write(batch_df, batch_embeddings)
+        writer.write(df[columns], embeddings if has_embeddings else None)
+    del existing
+    tmp_path.replace(path)
+    return path
@@ -0,0 +1,440 @@
+"""Indexed SQLite store of the labeled sentences for point, per-PDF, per-cluster and keyword lookups.
+
+Inspect a store from the ml directory:
+
+    python -m storage.sentence_store data/output/sentences.sqlite --id 42
+    python -m storage.sentence_store data/output/sentences.sqlite --cluster 3 --limit 20
+    python -m storage.sentence_store data/output/sentences.sqlite --search "gender identity"
+"""
+
+import argparse
+import json
+import logging
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+STORE_FORMAT_VERSION = 1
+
+# Columns of the store, in table order
+STORE_COLUMNS = ('sentence_id', 'sentence_text', 'cluster_id', 'source_pdf', 'source_url')
+
+# Rows passed to each executemany call of a bulk insert
+_INSERT_BATCH = 50_000
+
+# Most IDs bound in one IN (...) lookup
+_MAX_PARAMS = 500
+
+_SCHEMA = (
+    # sentence_id is the rowid, so point lookups are a single B-tree search
+    """CREATE TABLE sentences (
+        sentence_id INTEGER PRIMARY KEY,
+        sentence_text TEXT NOT NULL,
+        cluster_id INTEGER NOT NULL,
+        source_pdf TEXT NOT NULL,
+        source_url TEXT
+    )""",
+    "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+)
+
+# Built after the bulk insert, which is faster than updating them row by row. SQLite
+# appends the rowid to every index entry, so rows of one PDF or cluster come out in
+# sentence_id order without a sort.
+_INDEXES = (
+    "CREATE INDEX sentences_source_pdf ON sentences (source_pdf)",
+    "CREATE INDEX sentences_cluster_id ON sentences (cluster_id)",
+)
+
+# External-content full-text index: it stores only the tokens and reads texts from sentences
+_FTS_TABLE = (
+    "CREATE VIRTUAL TABLE sentences_fts USING fts5("
+    "sentence_text, content='sentences', content_rowid='sentence_id')"
+)
+
+_SELECT = f"SELECT {', '.join(STORE_COLUMNS)} FROM sentences"
+
+
+def _has_fts5(conn: sqlite3.Connection) -> bool:
+    """Whether this SQLite build includes the FTS5 extension."""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp.fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _rows(df: pd.DataFrame) -> Iterator[Tuple[Any, ...]]:
+    """Rows of a sentence table as tuples of Python values in STORE_COLUMNS order."""
+    source_urls = df['source_url'].astype(object)
+    return zip(
+        df['sentence_id'].astype('int64').tolist(),
+        df['sentence_text'].astype(str).tolist(),
+        df['cluster_id'].astype('int64').tolist(),
+        df['source_pdf'].astype(str).tolist(),
+        source_urls.where(source_urls.notna(), None).tolist(),
+    )
+
+
+def _insert(conn: sqlite3.Connection, df: pd.DataFrame, fts: bool):
+    """Insert sentence rows (and their full-text entries) in the current transaction."""
+    for start in range(0, len(df), _INSERT_BATCH):
+        batch = df.iloc[start:start + _INSERT_BATCH]
+        conn.executemany("INSERT INTO sentences VALUES (?, ?, ?, ?, ?)", _rows(batch))
+        if fts:
+            conn.executemany(
+                "INSERT INTO sentences_fts (rowid, sentence_text) VALUES (?, ?)",
+                zip(batch['sentence_id'].astype('int64').tolist(), batch['sentence_text'].astype(str).tolist())
+            )
+
+
+def _build_store(path: Path, df: pd.DataFrame) -> bool:
+    """Create the tables, insert the rows and build the indexes; returns whether FTS5 was used."""
+    conn = sqlite3.connect(path)
+    try:
+        # The temporary file is discarded on failure, so it needs no journal
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA cache_size = -65536")
+        fts = _has_fts5(conn)
+        if not fts:
+            logger.warning("SQLite was built without FTS5; keyword lookups will scan the sentences")
+        
+        with conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            _insert(conn, df, fts=False)
+            for statement in _INDEXES:
+                conn.execute(statement)
+            if fts:
+                conn.execute(_FTS_TABLE)
+                conn.execute("INSERT INTO sentences_fts (sentences_fts) VALUES ('rebuild')")
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ('format_version', str(STORE_FORMAT_VERSION)),
+                ('fts', '1' if fts else '0'),
+                ('n_sentences', str(len(df))),
+            ])
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return fts
+
+
+def write_sentence_store(path: str, df: pd.DataFrame) -> Path:
+    """
+    Write labeled sentences to a new SQLite store, replacing any existing store.
+    
+    The store is built in a temporary file in a single transaction, with the
+    indexes and the full-text index created after the rows are inserted, and
+    then moved into place, so readers never see a partial store.
+    
+    Args:
+        path: Store file (e.g. data/output/sentences.sqlite)
+        df: Sentence table with the STORE_COLUMNS
+    
+    Returns:
+        Path of the store
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.unlink(missing_ok=True)
+    # Inserting in rowid order appends to the B-tree instead of splitting pages
+    df = df.sort_values('sentence_id', kind='stable')
+    
+    try:
+        fts = _build_store(tmp_path, df)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    tmp_path.replace(path)
+    logger.info(f"Wrote {len(df)} sentences to the sentence store {path}" + (" with full-text index" if fts else ""))
+    return path
+
+
+def append_sentence_store(path: str, df: pd.DataFrame) -> Path:
+    """
+    Add labeled sentences to an existing store in one transaction.
+    
+    Args:
+        path: Store written by write_sentence_store()
+        df: New sentences with the STORE_COLUMNS; their IDs must not be in the store
+    
+    Returns:
+        Path of the store
+    """
+    path = Path(path)
+    df = df.sort_values('sentence_id', kind='stable')
+    conn = sqlite3.connect(path)
+    try:
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+        with conn:
+            _insert(conn, df, fts=meta['fts'] == '1')
+            conn.execute(
+                "UPDATE meta SET value = CAST(value AS INTEGER) + ? WHERE key = 'n_sentences'", (len(df),)
+            )
+    finally:
+        conn.close()
+    logger.info(f"Appended {len(df)} sentences to the sentence store {path}")
+    return path
+
+
+def _fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query matching sentences that contain every word."""
+    return ' '.join(f'"{word}"' for word in re.findall(r'\w+', text))
+
+
+class SentenceStore:
+    """Read-only lookups in a sentence store written by write_sentence_store().
+    
+    The connection can be shared between threads, e.g. by the inference service.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Open a sentence store.
+        
+        Args:
+            path: Store file (e.g. data/output/sentences.sqlite)
+        """
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"Sentence store not found: {self.path}")
+        
+        self._conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        if int(meta['format_version']) != STORE_FORMAT_VERSION:
+            raise ValueError(
+                f"Sentence store {self.path} has format version {meta['format_version']}, "
+                f"expected {STORE_FORMAT_VERSION}; re-run the pipeline to rebuild it"
+            )
+        self.has_fts = meta['fts'] == '1'
+        self.n_sentences = int(meta['n_sentences'])
+    
+    def __len__(self) -> int:
+        return self.n_sentences
+    
+    def _fetch(self, sql: str, params: Sequence[Any]) -> List[Dict[str, Any]]:
+        """Run a query and return its rows as dictionaries."""
+        return [dict(row) for row in self._conn.execute(sql, params)]
+    
+    def get(self, sentence_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Look up one sentence.
+        
+        Args:
+            sentence_id: Sentence ID
+        
+        Returns:
+            The sentence row, or None if the ID is not in the store
+        """
+        rows = self._fetch(f"{_SELECT} WHERE sentence_id = ?", (int(sentence_id),))
+        return rows[0] if rows else None
+    
+    def get_many(self, sentence_ids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Look up several sentences.
+        
+        Args:
+            sentence_ids: Sentence IDs
+        
+        Returns:
+            Sentence rows by ID; IDs that are not in the store are left out
+        """
+        ids = [int(sentence_id) for sentence_id in sentence_ids]
+        rows = {}
+        for start in range(0, len(ids), _MAX_PARAMS):
+            chunk = ids[start:start + _MAX_PARAMS]
+            placeholders = ', '.join('?' * len(chunk))
+            for row in self._fetch(f"{_SELECT} WHERE sentence_id IN ({placeholders})", chunk):
+                rows[row['sentence_id']] = row
+        return rows
+    
+    def _page(self, column: str, value: Any, limit: int, after_id: Optional[int]) -> List[Dict[str, Any]]:
+        """Rows with column = value in sentence_id order, starting after after_id."""
+        if after_id is None:
+            return self._fetch(f"{_SELECT} WHERE {column} = ? ORDER BY sentence_id LIMIT ?", (value, limit))
+        return self._fetch(
+            f"{_SELECT} WHERE {column} = ? AND sentence_id > ? ORDER BY sentence_id LIMIT ?",
+            (value, int(after_id), limit)
+        )
+    
+    def by_pdf(self, source_pdf: str, limit: int = 100, after_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        List the sentences of one source PDF, a page at a time.
+        
+        Args:
+            source_pdf: PDF file name
+            limit: Most sentences returned
+            after_id: Return sentences after this ID (the last ID of the previous page)
+        
+        Returns:
+            Sentence rows in sentence_id order
+        """
+        return self._page('source_pdf', source_pdf, limit, after_id)
+    
+    def by_cluster(self, cluster_id: int, limit: int = 100, after_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        List the sentences of one cluster, a page at a time.
+        
+        Args:
+            cluster_id: Cluster ID (-1 for noise)
+            limit: Most sentences returned
+            after_id: Return sentences after this ID (the last ID of the previous page)
+        
+        Returns:
+            Sentence rows in sentence_id order
+        """
+        return self._page('cluster_id', int(cluster_id), limit, after_id)
+    
+    def count(self, cluster_id: Optional[int] = None, source_pdf: Optional[str] = None) -> int:
+        """
+        Count sentences, optionally of one cluster and/or source PDF.
+        
+        Args:
+            cluster_id: Only count this cluster (all clusters if None)
+            source_pdf: Only count this PDF (all PDFs if None)
+        
+        Returns:
+            Number of sentences
+        """
+        if cluster_id is None and source_pdf is None:
+            return self.n_sentences
+        conditions, params = [], []
+        if cluster_id is not None:
+            conditions.append("cluster_id = ?")
+            params.append(int(cluster_id))
+        if source_pdf is not None:
+            conditions.append("source_pdf = ?")
+            params.append(source_pdf)
+        sql = f"SELECT COUNT(*) FROM sentences WHERE {' AND '.join(conditions)}"
+        return self._conn.execute(sql, params).fetchone()[0]
+    
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        cluster_id: Optional[int] = None,
+        source_pdf: Optional[str] = None,
+        raw: bool = False,
+        max_candidates: int = 10_000
+    ) -> List[Dict[str, Any]]:
+        """
+        Find sentences containing every word of a keyword query.
+        
+        With the full-text index, results are ranked by BM25 and carry their
+        'score' (higher is better). Only the first max_candidates matches (in
+        sentence_id order) are ranked, which keeps words that occur in most
+        sentences at milliseconds. Without the full-text index, matching
+        sentences are found by a case-insensitive scan and returned in
+        sentence_id order.
+        
+        Args:
+            query: Keywords
+            limit: Most sentences returned
+            cluster_id: Only search this cluster (all clusters if None)
+            source_pdf: Only search this PDF (all PDFs if None)
+            raw: Pass query to FTS5 unchanged, for phrase, prefix and boolean queries
+                (e.g. '"gender identity" OR pronoun*')
+            max_candidates: Most matches ranked
+        
+        Returns:
+            Matching sentence rows
+        """
+        conditions, params = [], []
+        if cluster_id is not None:
+            conditions.append("s.cluster_id = ?")
+            params.append(int(cluster_id))
+        if source_pdf is not None:
+            conditions.append("s.source_pdf = ?")
+            params.append(source_pdf)
+        columns = ', '.join(f"s.{column}" for column in STORE_COLUMNS)
+        
+        if self.has_fts:
+            match = query if raw else _fts_query(query)
+            if not match:
+                return []
+            filters = ''.join(f" AND {condition}" for condition in conditions)
+            rows = self._fetch(
+                f"SELECT * FROM (SELECT {columns}, bm25(sentences_fts) AS rank FROM sentences_fts "
+                f"JOIN sentences s ON s.sentence_id = sentences_fts.rowid "
+                f"WHERE sentences_fts MATCH ?{filters} LIMIT ?) ORDER BY rank LIMIT ?",
+                [match, *params, max_candidates, limit]
+            )
+            for row in rows:
+                # FTS5 reports BM25 negated, so that better matches sort first
+                row['score'] = -row.pop('rank')
+            return rows
+        
+        words = re.findall(r'\w+', query)
+        if not words:
+            return []
+        for word in words:
+            # '_' is a LIKE wildcard; words contain no other special characters
+            conditions.append("s.sentence_text LIKE ? ESCAPE '\\'")
+            escaped = word.replace('_', '\\_')
+            params.append(f"%{escaped}%")
+        return self._fetch(
+            f"SELECT {columns} FROM sentences s WHERE {' AND '.join(conditions)} ORDER BY s.sentence_id LIMIT ?",
+            [*params, limit]
+        )
+    
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+    
+    def __enter__(self) -> 'SentenceStore':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def main():
+    """Main entry point for sentence store lookups."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stderr)
+        ]
+    )
+    
+    parser = argparse.ArgumentParser(description="Look up sentences in a sentence store")
+    parser.add_argument('store', help='Sentence store (e.g. data/output/sentences.sqlite)')
+    lookup = parser.add_mutually_exclusive_group(required=True)
+    lookup.add_argument('--id', type=int, nargs='+', default=None, help='Sentence IDs to look up')
+    lookup.add_argument('--pdf', default=None, help='List the sentences of this source PDF')
+    lookup.add_argument('--cluster', type=int, default=None, help='List the sentences of this cluster')
+    lookup.add_argument('--search', default=None, help='Keywords to search for')
+    parser.add_argument('--limit', type=int, default=20, help='Most sentences listed (default: 20)')
+    parser.add_argument('--after-id', type=int, default=None, help='List sentences after this ID (next page)')
+    parser.add_argument('--raw', action='store_true', help='Pass --search to FTS5 unchanged')
+    args = parser.parse_args()
+    
+    with SentenceStore(args.store) as store:
+        started = time.perf_counter()
+        if args.id:
+            rows = list(store.get_many(args.id).values())
+        elif args.pdf is not None:
+            rows = store.by_pdf(args.pdf, limit=args.limit, after_id=args.after_id)
+        elif args.cluster is not None:
+            rows = store.by_cluster(args.cluster, limit=args.limit, after_id=args.after_id)
+        else:
+            rows = store.search(args.search, limit=args.limit, raw=args.raw)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        for row in rows:
+            print(json.dumps(row, ensure_ascii=False))
+        logger.info(f"{len(rows)} sentences in {elapsed_ms:.2f} ms (store of {len(store)} sentences)")
+
+
+if __name__ == "__main__":
+    main()
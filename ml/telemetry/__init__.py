@@ -0,0 +1 @@
+"""Telemetry module for per-stage profiling and resource usage reports."""
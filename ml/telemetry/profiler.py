@@ -0,0 +1,506 @@
+"""Per-stage wall/CPU time, throughput, memory and output size telemetry."""
+
+import cProfile
+import json
+import logging
+import os
+import platform
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ('cprofile', 'sampling')
+
+# Number of functions listed per stage profile in the report
+TOP_FUNCTIONS = 25
+
+
+def peak_rss() -> int:
+    """
+    Peak resident set size of this process so far.
+    
+    Returns:
+        Peak RSS in bytes (0 if unavailable)
+    """
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return int(peak) if sys.platform == 'darwin' else int(peak) * 1024
+
+
+def current_rss() -> int:
+    """
+    Current resident set size of this process.
+    
+    Returns:
+        RSS in bytes, falling back to the peak RSS where /proc is unavailable
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return peak_rss()
+
+
+def cpu_seconds() -> Dict[str, float]:
+    """
+    CPU time used by this process and its reaped child processes.
+    
+    Returns:
+        Dictionary with 'process' and 'children' CPU seconds
+    """
+    times = os.times()
+    return {
+        'process': time.process_time(),
+        'children': times.children_user + times.children_system,
+    }
+
+
+class SamplingProfiler:
+    """Low-overhead statistical profiler that samples the stack of one thread."""
+    
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        """
+        Initialize the sampling profiler.
+        
+        Args:
+            thread_id: Identifier of the thread to sample
+            interval: Seconds between samples
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+    
+    def start(self):
+        """Start sampling in a background thread."""
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop sampling."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+    
+    def write_folded(self, path: Path):
+        """
+        Write the samples as collapsed stacks (flamegraph.pl / speedscope input).
+        
+        Args:
+            path: Output file path
+        """
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+    
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize the samples by function.
+        
+        Returns:
+            Dictionary with the sample count and the functions with the most
+            'self' (innermost frame) and 'inclusive' (anywhere on the stack) samples
+        """
+        self_counts: Counter = Counter()
+        inclusive_counts: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            self_counts[frames[-1]] += count
+            for frame in set(frames):
+                inclusive_counts[frame] += count
+        
+        n_samples = sum(self.stacks.values())
+        
+        def top(counts: Counter) -> List[Dict[str, Any]]:
+            return [
+                {'function': function, 'samples': count, 'fraction': count / n_samples}
+                for function, count in counts.most_common(TOP_FUNCTIONS)
+            ]
+        
+        return {
+            'samples': n_samples,
+            'interval_seconds': self.interval,
+            'self': top(self_counts) if n_samples else [],
+            'inclusive': top(inclusive_counts) if n_samples else [],
+        }
+
+
+class StageRecord:
+    """Measurements of one pipeline stage."""
+    
+    def __init__(self, name: str):
+        """
+        Initialize an empty stage record.
+        
+        Args:
+            name: Stage name
+        """
+        self.name = name
+        self.status = 'running'
+        self.error: Optional[str] = None
+        self.items = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.child_cpu_seconds = 0.0
+        self.rss_start_bytes = 0
+        self.peak_rss_bytes = 0
+        self.outputs: List[Path] = []
+        self.output_sizes: Dict[str, int] = {}
+        self.per_item: List[Dict[str, Any]] = []
+        self.extra: Dict[str, Any] = {}
+        self.profile: Optional[Dict[str, Any]] = None
+    
+    def add_items(self, n: int):
+        """
+        Count processed items (PDFs, sentences, ...) towards the throughput.
+        
+        Args:
+            n: Number of items
+        """
+        self.items += int(n)
+    
+    def add_outputs(self, paths: Iterable[Path]):
+        """
+        Register files written by the stage; their sizes count as bytes written.
+        
+        Args:
+            paths: Output file paths
+        """
+        self.outputs.extend(Path(path) for path in paths)
+    
+    def measure_outputs(self):
+        """Record the current sizes of the registered output files."""
+        # Keyed by path, so files registered more than once are counted once
+        self.output_sizes = {str(path): path.stat().st_size for path in self.outputs if path.exists()}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the record to a JSON-serializable dictionary.
+        
+        Returns:
+            Stage measurements
+        """
+        if self.status == 'skipped':
+            return {'name': self.name, 'status': self.status}
+        record = {
+            'name': self.name,
+            'status': self.status,
+            'wall_seconds': self.wall_seconds,
+            'cpu_seconds': self.cpu_seconds,
+            'child_cpu_seconds': self.child_cpu_seconds,
+            'items': self.items,
+            'items_per_second': self.items / self.wall_seconds if self.wall_seconds > 0 else None,
+            'rss_start_bytes': self.rss_start_bytes,
+            'peak_rss_bytes': self.peak_rss_bytes,
+            'bytes_written': sum(self.output_sizes.values()),
+            'outputs': self.output_sizes,
+        }
+        if self.error:
+            record['error'] = self.error
+        if self.extra:
+            record.update(self.extra)
+        if self.per_item:
+            record['per_item'] = self.per_item
+        if self.profile:
+            record['profile'] = self.profile
+        return record
+
+
+class RunProfiler:
+    """Collects per-stage telemetry for one run and writes it as a JSON report."""
+    
+    def __init__(
+        self,
+        run_name: str,
+        report_path: Optional[str] = None,
+        profile_stage: Optional[str] = None,
+        profile_mode: str = 'cprofile',
+        sample_interval: float = 0.005,
+        memory_interval: float = 0.05,
+        params: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Initialize the profiler.
+        
+        Args:
+            run_name: Name of the run in the report
+            report_path: Where to write the JSON report on finish (not written if None)
+            profile_stage: Stage to run under a function-level profiler (disabled if None)
+            profile_mode: 'cprofile' (deterministic, exact call counts) or
+                'sampling' (statistical, low overhead)
+            sample_interval: Seconds between stack samples in sampling mode
+            memory_interval: Seconds between RSS samples
+            params: Run parameters recorded in the report
+        """
+        if profile_mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile_mode: {profile_mode}")
+        
+        self.run_name = run_name
+        self.report_path = Path(report_path) if report_path else None
+        self.profile_stage = profile_stage
+        self.profile_mode = profile_mode
+        self.sample_interval = sample_interval
+        self.memory_interval = memory_interval
+        self.params = params or {}
+        
+        self.stages: List[StageRecord] = []
+        self._active: Optional[StageRecord] = None
+        self._started_at: Optional[str] = None
+        self._wall_start = 0.0
+        self._cpu_start: Dict[str, float] = {}
+        self._peak_rss = 0
+        self._stop = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+    
+    def _watch_memory(self):
+        while not self._stop.wait(self.memory_interval):
+            rss = current_rss()
+            self._peak_rss = max(self._peak_rss, rss)
+            active = self._active
+            if active is not None:
+                active.peak_rss_bytes = max(active.peak_rss_bytes, rss)
+    
+    def start(self):
+        """Start timing the run and sampling memory."""
+        self._started_at = datetime.now(timezone.utc).isoformat()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = cpu_seconds()
+        self._peak_rss = current_rss()
+        self._stop.clear()
+        self._monitor = threading.Thread(target=self._watch_memory, daemon=True)
+        self._monitor.start()
+    
+    def __enter__(self) -> 'RunProfiler':
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.finish()
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageRecord]:
+        """
+        Measure a stage; exceptions are recorded and re-raised.
+        
+        Args:
+            name: Stage name
+        
+        Yields:
+            The stage record, for counting items and registering outputs
+        """
+        record = StageRecord(name)
+        record.rss_start_bytes = current_rss()
+        record.peak_rss_bytes = record.rss_start_bytes
+        peak_before = peak_rss()
+        self.stages.append(record)
+        self._active = record
+        
+        profiler = self._start_profile(name)
+        cpu_start = cpu_seconds()
+        wall_start = time.perf_counter()
+        try:
+            yield record
+            record.status = 'complete'
+        except BaseException as e:
+            record.status = 'failed'
+            record.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record.wall_seconds = time.perf_counter() - wall_start
+            cpu_end = cpu_seconds()
+            record.cpu_seconds = cpu_end['process'] - cpu_start['process']
+            record.child_cpu_seconds = cpu_end['children'] - cpu_start['children']
+            record.measure_outputs()
+            self._active = None
+            
+            # A new process-wide peak during the stage is exact; otherwise rely on the samples
+            peak_after = peak_rss()
+            if peak_after > peak_before:
+                record.peak_rss_bytes = max(record.peak_rss_bytes, peak_after)
+            record.peak_rss_bytes = max(record.peak_rss_bytes, current_rss())
+            self._peak_rss = max(self._peak_rss, record.peak_rss_bytes)
+            
+            if profiler is not None:
+                record.profile = self._finish_profile(name, profiler)
+            
+            logger.info(
+                f"[telemetry] {name}: {record.wall_seconds:.2f}s wall, "
+                f"{record.cpu_seconds + record.child_cpu_seconds:.2f}s CPU, "
+                f"peak RSS {record.peak_rss_bytes / 2**20:.0f} MiB"
+            )
+    
+    def skip(self, name: str):
+        """
+        Record a stage that was skipped because its checkpoint is up to date.
+        
+        Args:
+            name: Stage name
+        """
+        record = StageRecord(name)
+        record.status = 'skipped'
+        self.stages.append(record)
+    
+    @property
+    def current(self) -> Optional[StageRecord]:
+        """Record of the stage being measured, if any."""
+        return self._active
+    
+    def add_items(self, n: int):
+        """
+        Count processed items towards the current stage (no-op outside a stage).
+        
+        Args:
+            n: Number of items
+        """
+        if self._active is not None:
+            self._active.add_items(n)
+    
+    def add_outputs(self, paths: Iterable[Path]):
+        """
+        Register files written by the current stage (no-op outside a stage).
+        
+        Args:
+            paths: Output file paths
+        """
+        if self._active is not None:
+            self._active.add_outputs(paths)
+    
+    @contextmanager
+    def item(self, name: str) -> Iterator[Dict[str, Any]]:
+        """
+        Time one item (e.g. one PDF) of the current stage.
+        
+        Args:
+            name: Item name
+        
+        Yields:
+            The item's entry, to which extra fields can be added
+        """
+        entry: Dict[str, Any] = {'name': name}
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry['wall_seconds'] = time.perf_counter() - wall_start
+            entry['cpu_seconds'] = time.process_time() - cpu_start
+            if self._active is not None:
+                self._active.per_item.append(entry)
+    
+    def _profile_path(self, name: str, suffix: str) -> Path:
+        base = self.report_path if self.report_path else Path(f"{self.run_name}_report.json")
+        return base.with_name(f"{base.stem}_{name}{suffix}")
+    
+    def _start_profile(self, name: str) -> Optional[Any]:
+        if name != self.profile_stage:
+            return None
+        if self.profile_mode == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = SamplingProfiler(threading.get_ident(), interval=self.sample_interval)
+            profiler.start()
+        logger.info(f"[telemetry] Profiling stage '{name}' with {self.profile_mode}")
+        return profiler
+    
+    def _finish_profile(self, name: str, profiler: Any) -> Dict[str, Any]:
+        if isinstance(profiler, SamplingProfiler):
+            profiler.stop()
+            path = self._profile_path(name, '.folded')
+            profiler.write_folded(path)
+            summary = profiler.summary()
+        else:
+            profiler.disable()
+            path = self._profile_path(name, '.prof')
+            profiler.dump_stats(str(path))
+            stats = pstats.Stats(profiler).stats
+            by_cumulative = sorted(stats.items(), key=lambda entry: entry[1][3], reverse=True)
+            summary = {
+                'functions': [
+                    {
+                        'function': f"{func} ({Path(filename).name}:{line})",
+                        'calls': n_calls,
+                        'self_seconds': self_time,
+                        'cumulative_seconds': cumulative_time,
+                    }
+                    for (filename, line, func), (_, n_calls, self_time, cumulative_time, _)
+                    in by_cumulative[:TOP_FUNCTIONS]
+                ]
+            }
+        logger.info(f"[telemetry] Saved {self.profile_mode} profile of '{name}' to {path}")
+        return {'mode': self.profile_mode, 'path': str(path), **summary}
+    
+    def report(self) -> Dict[str, Any]:
+        """
+        Build the run report.
+        
+        Returns:
+            JSON-serializable dictionary with run totals, system information,
+            run parameters and one entry per stage
+        """
+        cpu_end = cpu_seconds()
+        return {
+            'run': self.run_name,
+            'started': self._started_at,
+            'wall_seconds': time.perf_counter() - self._wall_start,
+            'cpu_seconds': cpu_end['process'] - self._cpu_start.get('process', 0.0),
+            'child_cpu_seconds': cpu_end['children'] - self._cpu_start.get('children', 0.0),
+            'peak_rss_bytes': max(self._peak_rss, current_rss()),
+            'system': {
+                'platform': platform.platform(),
+                'python': platform.python_version(),
+                'cpu_count': os.cpu_count(),
+                'pid': os.getpid(),
+            },
+            'params': self.params,
+            'stages': [record.to_dict() for record in self.stages],
+        }
+    
+    def finish(self) -> Dict[str, Any]:
+        """
+        Stop sampling memory and write the report if a report path is set.
+        
+        Returns:
+            The run report
+        """
+        self._stop.set()
+        if self._monitor is not None:
+            self._monitor.join()
+            self._monitor = None
+        
+        report = self.report()
+        if self.report_path:
+            self.report_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.report_path.with_name(self.report_path.name + '.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(report, f, indent=2, default=str)
+            tmp_path.replace(self.report_path)
+            logger.info(f"[telemetry] Run report saved to {self.report_path}")
+        return report
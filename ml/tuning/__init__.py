@@ -0,0 +1 @@
+"""Tuning module for hardware-aware batch sizes and worker counts."""
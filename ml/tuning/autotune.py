@@ -0,0 +1,669 @@
+"""Hardware-aware tuning of encoder batch sizes, torch threads and worker pool sizes.
+
+Run from the ml directory to probe this machine's cores and memory, calibrate
+the sentence encoder and the PDF extractor, and save the tuned profile:
+
+    python -m tuning.autotune
+    python -m tuning.autotune --local data/raw_pdfs --sample-size 2048
+    python -m tuning.autotune --stub    # offline, with the hashing encoder
+
+Profiles are saved per machine in data/tuning/<machine>.json. pipeline.py and
+recluster.py load the profile of the machine they run on.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from benchmarks.corpus import synthetic_sentences, write_synthetic_pdfs
+from benchmarks.stub_encoder import HashingEncoder
+from data_collection.local_source import LocalPDFSource
+from data_collection.text_extractor import TextExtractor
+from preprocessing.sentence_splitter import SentenceSplitter
+from embeddings.encoder import SentenceEncoder
+from telemetry.profiler import RunProfiler
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+try:
+    import torch
+except ImportError:  # Only needed to detect GPUs
+    torch = None
+
+logger = logging.getLogger(__name__)
+
+# Version of the profile format; profiles of other versions are ignored
+PROFILE_VERSION = 1
+
+DEFAULT_TUNING_DIR = "data/tuning"
+
+# Encoder batch sizes tried, in increasing order
+BATCH_SIZES = (8, 16, 32, 64, 128, 256, 512)
+
+# Share of the available memory the tuned settings may use
+MEMORY_FRACTION = 0.5
+
+# Settings within this share of the best throughput count as equally fast, and
+# the cheapest of them (smallest batch, fewest threads or workers) is chosen
+TOLERANCE = 0.95
+
+# A search stops once throughput drops below this share of the best so far
+FALLOFF = 0.85
+
+# Per-process components of the extraction calibration workers
+_worker_extractor: Optional[TextExtractor] = None
+_worker_splitter: Optional[SentenceSplitter] = None
+
+
+def _read(path: str) -> Optional[str]:
+    """Contents of a small system file, or None if it cannot be read."""
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _cgroup_cpu_quota() -> Optional[float]:
+    """CPU quota of this process's cgroup in cores (None if unlimited)."""
+    try:
+        cpu_max = _read('/sys/fs/cgroup/cpu.max')  # cgroup v2: "<quota> <period>" or "max <period>"
+        if cpu_max:
+            quota, _, period = cpu_max.partition(' ')
+            return int(quota) / int(period) if quota != 'max' else None
+        quota = _read('/sys/fs/cgroup/cpu/cpu.cfs_quota_us')  # cgroup v1: -1 if unlimited
+        period = _read('/sys/fs/cgroup/cpu/cpu.cfs_period_us')
+        if quota and period and int(quota) > 0:
+            return int(quota) / int(period)
+    except (ValueError, ZeroDivisionError):
+        pass
+    return None
+
+
+def _cgroup_memory() -> Tuple[Optional[int], Optional[int]]:
+    """Memory limit and usage of this process's cgroup in bytes (None if unlimited or unknown)."""
+    for limit_path, usage_path in (
+        ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory.current'),
+        ('/sys/fs/cgroup/memory/memory.limit_in_bytes', '/sys/fs/cgroup/memory/memory.usage_in_bytes'),
+    ):
+        limit = _read(limit_path)
+        if limit and limit.isdigit():
+            usage = _read(usage_path)
+            return int(limit), int(usage) if usage and usage.isdigit() else None
+    return None, None
+
+
+def _meminfo() -> Dict[str, int]:
+    """Fields of /proc/meminfo in bytes (empty where /proc is unavailable)."""
+    info = {}
+    for line in (_read('/proc/meminfo') or '').splitlines():
+        name, _, value = line.partition(':')
+        fields = value.split()
+        if fields and fields[0].isdigit():
+            info[name] = int(fields[0]) * 1024
+    return info
+
+
+def _children_peak_rss() -> int:
+    """Peak RSS of the largest terminated child process in bytes (0 if unavailable)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return int(peak) if sys.platform == 'darwin' else int(peak) * 1024
+
+
+def usable_cpus() -> int:
+    """
+    Number of cores this process may use.
+    
+    Unlike os.cpu_count(), this respects the CPU affinity mask and container
+    CPU quotas, so a container on a 64-core host with a 4-core quota gets 4.
+    
+    Returns:
+        Usable cores (at least 1)
+    """
+    try:
+        n_cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS and Windows
+        n_cpus = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    if quota:
+        n_cpus = min(n_cpus, max(1, int(quota)))
+    return n_cpus
+
+
+def probe_hardware() -> Dict[str, Any]:
+    """
+    Probe the cores, memory and GPUs available to this process.
+    
+    Returns:
+        Dictionary with the host, usable and logical cores, total and available
+        memory in bytes (within the container's memory limit) and the CUDA GPUs
+    """
+    meminfo = _meminfo()
+    total = meminfo.get('MemTotal')
+    if total is None:
+        try:
+            total = os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+        except (ValueError, OSError, AttributeError):
+            total = 0
+    available = meminfo.get('MemAvailable', total)
+    limit, usage = _cgroup_memory()
+    if limit is not None and limit < total:
+        total = limit
+        available = min(available, limit - (usage or 0))
+    
+    gpus = []
+    if torch is not None and torch.cuda.is_available():
+        for index in range(torch.cuda.device_count()):
+            properties = torch.cuda.get_device_properties(index)
+            gpus.append({'name': properties.name, 'memory_bytes': int(properties.total_memory)})
+    
+    return {
+        'hostname': platform.node(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'python': platform.python_version(),
+        'logical_cpus': os.cpu_count(),
+        'usable_cpus': usable_cpus(),
+        'total_memory_bytes': int(total),
+        'available_memory_bytes': int(max(available, 0)),
+        'gpus': gpus,
+    }
+
+
+def machine_key(hardware: Dict[str, Any]) -> str:
+    """
+    Key of a machine's tuning profile.
+    
+    Besides the host name, the key covers the usable cores, total memory and
+    GPUs, so a resized VM or container is tuned again.
+    
+    Args:
+        hardware: Output of probe_hardware()
+    
+    Returns:
+        File-name-safe machine key
+    """
+    identity = json.dumps([
+        hardware['machine'],
+        hardware['usable_cpus'],
+        round(hardware['total_memory_bytes'] / 2**30),
+        [gpu['name'] for gpu in hardware['gpus']],
+    ])
+    host = re.sub(r'[^A-Za-z0-9_.-]+', '-', hardware['hostname'] or 'localhost')
+    return f"{host}-{hashlib.sha1(identity.encode()).hexdigest()[:10]}"
+
+
+def profile_path(tuning_dir: str, hardware: Dict[str, Any]) -> Path:
+    """
+    Path of a machine's tuning profile.
+    
+    Args:
+        tuning_dir: Directory of the tuning profiles
+        hardware: Output of probe_hardware()
+    
+    Returns:
+        <tuning_dir>/<machine key>.json
+    """
+    return Path(tuning_dir) / f"{machine_key(hardware)}.json"
+
+
+def _doubling(limit: int) -> List[int]:
+    """Powers of two below limit, followed by limit."""
+    values = []
+    value = 1
+    while value < limit:
+        values.append(value)
+        value *= 2
+    return values + [limit]
+
+
+def _cheapest(measurements: List[Dict[str, Any]], key: str) -> Dict[str, Any]:
+    """The measurement with the smallest key among those within TOLERANCE of the best throughput."""
+    best = max(measurement['items_per_second'] for measurement in measurements)
+    candidates = [m for m in measurements if m['items_per_second'] >= TOLERANCE * best]
+    return min(candidates, key=lambda measurement: measurement[key])
+
+
+def _measure_encode(profiler: RunProfiler, encoder: Any, sentences: List[str]) -> Dict[str, Any]:
+    """Time one encoding pass over the calibration sentences and measure its memory growth."""
+    with profiler.stage('encode') as record:
+        encoder.encode(sentences, show_progress_bar=False)
+        record.add_items(len(sentences))
+    return {
+        'seconds': round(record.wall_seconds, 4),
+        'items_per_second': round(len(sentences) / max(record.wall_seconds, 1e-9), 2),
+        'memory_growth_bytes': max(0, record.peak_rss_bytes - record.rss_start_bytes),
+        'peak_rss_bytes': record.peak_rss_bytes,
+    }
+
+
+def calibrate_encoder(
+    encoder: Any,
+    sentences: List[str],
+    memory_budget: int,
+    max_threads: Optional[int] = None,
+    batch_sizes: Sequence[int] = BATCH_SIZES
+) -> Dict[str, Any]:
+    """
+    Find the encoder batch size and torch thread count with the best throughput.
+    
+    Batch sizes are tried in increasing order with max_threads threads, until
+    throughput falls off, the next batch size would exceed the memory budget,
+    or a batch runs out of memory. Thread counts are then halved at the chosen
+    batch size while throughput holds. Among settings within 5% of the best
+    throughput, the smallest batch and the fewest threads are chosen. The
+    encoder is left with the chosen settings.
+    
+    Args:
+        encoder: Object with an encode(sentences, show_progress_bar) method and a
+            batch_size attribute; thread counts are only tuned if it has set_num_threads()
+        sentences: Calibration sentences
+        memory_budget: Bytes by which encoding may grow the process's memory
+        max_threads: Most threads tried (thread counts are not tuned if None)
+        batch_sizes: Batch sizes tried, in increasing order
+    
+    Returns:
+        Chosen 'batch_size' and 'torch_threads', their throughput and memory use,
+        and every measurement
+    """
+    tune_threads = bool(max_threads) and hasattr(encoder, 'set_num_threads')
+    if tune_threads:
+        encoder.set_num_threads(max_threads)
+    threads = max_threads if tune_threads else None
+    # Batches larger than the sample would measure the same as one batch of the whole sample
+    batch_sizes = [size for size in batch_sizes if size <= len(sentences)] or [min(batch_sizes)]
+    
+    # The first call pays for lazy initialization and is not measured
+    encoder.batch_size = batch_sizes[0]
+    encoder.encode(sentences[:batch_sizes[0]], show_progress_bar=False)
+    
+    measurements = []
+    with RunProfiler('autotune', memory_interval=0.01) as profiler:
+        best = 0.0
+        for batch_size in batch_sizes:
+            encoder.batch_size = batch_size
+            try:
+                result = _measure_encode(profiler, encoder, sentences)
+            except (MemoryError, RuntimeError) as e:  # torch reports device OOM as RuntimeError
+                logger.warning(f"Encoding with batch size {batch_size} failed, not trying larger batches: {e}")
+                break
+            result.update(batch_size=batch_size, torch_threads=threads)
+            logger.info(
+                f"Encoder: batch size {batch_size}, {threads or 'default'} threads: "
+                f"{result['items_per_second']:.1f} sentences/s, "
+                f"+{result['memory_growth_bytes'] / 2**20:.0f} MiB"
+            )
+            if measurements and result['memory_growth_bytes'] > memory_budget:
+                logger.info(f"Batch size {batch_size} exceeds the memory budget")
+                break
+            measurements.append(result)
+            best = max(best, result['items_per_second'])
+            if result['items_per_second'] < FALLOFF * best or 2 * result['memory_growth_bytes'] > memory_budget:
+                break
+        chosen = _cheapest(measurements, 'batch_size')
+        
+        if tune_threads:
+            encoder.batch_size = chosen['batch_size']
+            thread_measurements = [chosen]
+            # Fewer threads never encode faster, so stop at the first clear slowdown
+            for n_threads in reversed(_doubling(max_threads)[:-1]):
+                encoder.set_num_threads(n_threads)
+                result = _measure_encode(profiler, encoder, sentences)
+                result.update(batch_size=chosen['batch_size'], torch_threads=n_threads)
+                logger.info(
+                    f"Encoder: batch size {chosen['batch_size']}, {n_threads} threads: "
+                    f"{result['items_per_second']:.1f} sentences/s"
+                )
+                measurements.append(result)
+                thread_measurements.append(result)
+                if result['items_per_second'] < TOLERANCE * chosen['items_per_second']:
+                    break
+            chosen = _cheapest(thread_measurements, 'torch_threads')
+            encoder.set_num_threads(chosen['torch_threads'])
+    
+    encoder.batch_size = chosen['batch_size']
+    if hasattr(encoder, 'reset_length_stats'):
+        encoder.reset_length_stats()
+    return {
+        'model_name': getattr(encoder, 'model_name', type(encoder).__name__),
+        'batch_size': chosen['batch_size'],
+        'torch_threads': chosen['torch_threads'],
+        'sentences_per_second': chosen['items_per_second'],
+        'memory_growth_bytes': chosen['memory_growth_bytes'],
+        'peak_rss_bytes': chosen['peak_rss_bytes'],
+        'sample_size': len(sentences),
+        'measurements': measurements,
+    }
+
+
+def _init_worker(min_tokens: int):
+    """Create the extractor and splitter once per calibration worker process."""
+    global _worker_extractor, _worker_splitter
+    _worker_extractor = TextExtractor()
+    _worker_splitter = SentenceSplitter(min_tokens=min_tokens)
+
+
+def _extract_and_split(pdf_path: str) -> int:
+    """Extract and split one PDF like a streaming extraction worker; returns the sentence count."""
+    text = _worker_extractor.extract_text(pdf_path)
+    if not text:
+        return 0
+    return len(_worker_splitter.split(text, source_pdf=Path(pdf_path).name, source_url=''))
+
+
+def calibrate_extractor(
+    pdf_paths: List[str],
+    memory_budget: int,
+    max_workers: int,
+    min_tokens: int = 5
+) -> Dict[str, Any]:
+    """
+    Find the number of extraction worker processes with the best throughput.
+    
+    Worker counts are doubled up to max_workers until throughput falls off or
+    the workers' combined peak memory would exceed the budget. The fewest
+    workers within 5% of the best throughput are chosen.
+    
+    Args:
+        pdf_paths: Calibration PDFs (at least twice max_workers for useful results)
+        memory_budget: Bytes the worker processes may use together
+        max_workers: Most worker processes tried
+        min_tokens: Minimum tokens per sentence for the splitter
+    
+    Returns:
+        Chosen 'workers', their throughput, the peak memory of one worker, and
+        every measurement
+    """
+    measurements = []
+    best = 0.0
+    for workers in _doubling(max_workers):
+        started = time.perf_counter()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(min_tokens,)
+        ) as executor:
+            n_sentences = sum(executor.map(_extract_and_split, pdf_paths))
+        seconds = time.perf_counter() - started
+        worker_rss = _children_peak_rss()
+        result = {
+            'workers': workers,
+            'seconds': round(seconds, 4),
+            'items_per_second': round(len(pdf_paths) / seconds, 2),
+            'sentences': n_sentences,
+            'worker_peak_rss_bytes': worker_rss,
+        }
+        logger.info(
+            f"Extractor: {workers} workers: {result['items_per_second']:.1f} PDFs/s, "
+            f"{worker_rss / 2**20:.0f} MiB per worker"
+        )
+        if measurements and workers * worker_rss > memory_budget:
+            logger.info(f"{workers} extraction workers exceed the memory budget")
+            break
+        measurements.append(result)
+        best = max(best, result['items_per_second'])
+        if result['items_per_second'] < FALLOFF * best:
+            break
+    
+    chosen = _cheapest(measurements, 'workers')
+    return {
+        'workers': chosen['workers'],
+        'pdfs_per_second': chosen['items_per_second'],
+        'worker_peak_rss_bytes': max(measurement['worker_peak_rss_bytes'] for measurement in measurements),
+        'n_pdfs': len(pdf_paths),
+        'measurements': measurements,
+    }
+
+
+def derive_settings(
+    hardware: Dict[str, Any],
+    encoder_result: Dict[str, Any],
+    extractor_result: Dict[str, Any],
+    memory_budget: int
+) -> Dict[str, Any]:
+    """
+    Turn calibration results into pipeline settings.
+    
+    Args:
+        hardware: Output of probe_hardware()
+        encoder_result: Output of calibrate_encoder()
+        extractor_result: Output of calibrate_extractor()
+        memory_budget: Bytes the tuned settings may use
+    
+    Returns:
+        Settings used by DataPipeline: 'encoder_batch_size', 'torch_threads',
+        'encode_batch_size' (sentences per encode call in streaming runs),
+        'extract_workers', 'cluster_jobs' and 'shard_workers', plus the
+        'model_name' the encoder was calibrated with
+    """
+    n_cpus = hardware['usable_cpus']
+    batch_size = encoder_result['batch_size']
+    threads = encoder_result['torch_threads'] or n_cpus
+    extract_workers = extractor_result['workers']
+    if not hardware['gpus']:
+        # In streaming runs the extraction workers share the cores with the encoder's threads
+        extract_workers = max(1, min(extract_workers, n_cpus - threads))
+    # Every shard process loads its own encoder
+    shard_workers = max(1, min(n_cpus // threads, memory_budget // max(encoder_result['peak_rss_bytes'], 1)))
+    return {
+        'model_name': encoder_result['model_name'],
+        'encoder_batch_size': batch_size,
+        'torch_threads': encoder_result['torch_threads'],
+        'encode_batch_size': max(256, 2 * batch_size),
+        'extract_workers': extract_workers,
+        'cluster_jobs': n_cpus,
+        'shard_workers': int(shard_workers),
+    }
+
+
+def save_profile(profile: Dict[str, Any], tuning_dir: str = DEFAULT_TUNING_DIR) -> Path:
+    """
+    Save a tuning profile under its machine key.
+    
+    Args:
+        profile: Output of autotune()
+        tuning_dir: Directory of the tuning profiles
+    
+    Returns:
+        Path of the saved profile
+    """
+    path = Path(tuning_dir) / f"{profile['machine']}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2)
+    return path
+
+
+def load_profile(
+    tuning_dir: str = DEFAULT_TUNING_DIR,
+    hardware: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Load the saved tuning profile of this machine.
+    
+    Args:
+        tuning_dir: Directory of the tuning profiles
+        hardware: Output of probe_hardware() (probed if None)
+    
+    Returns:
+        The profile, or None if this machine has no profile of the current version
+    """
+    path = profile_path(tuning_dir, hardware or probe_hardware())
+    if not path.exists():
+        return None
+    with open(path) as f:
+        profile = json.load(f)
+    if profile.get('version') != PROFILE_VERSION:
+        logger.warning(f"Ignoring tuning profile {path} of version {profile.get('version')}; run autotune again")
+        return None
+    logger.info(f"Using tuning profile {path} (created {profile['created']})")
+    return profile
+
+
+def autotune(
+    encoder: Any,
+    pdf_paths: Optional[List[str]] = None,
+    tuning_dir: str = DEFAULT_TUNING_DIR,
+    sample_size: int = 1024,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Probe this machine, calibrate the encoder and the extractor, and save the profile.
+    
+    Args:
+        encoder: Loaded encoder to calibrate (see calibrate_encoder); it is left
+            with the tuned batch size and thread count
+        pdf_paths: PDFs to calibrate the extractor on (synthetic PDFs if None)
+        tuning_dir: Directory of the tuning profiles
+        sample_size: Number of synthetic sentences encoded per calibration pass
+        seed: Seed of the synthetic sentences and PDFs
+    
+    Returns:
+        Tuning profile with the hardware, the calibration measurements and the
+        derived 'settings'
+    """
+    hardware = probe_hardware()
+    n_cpus = hardware['usable_cpus']
+    memory_budget = int(MEMORY_FRACTION * hardware['available_memory_bytes'])
+    logger.info(
+        f"Tuning for {n_cpus} usable cores ({hardware['logical_cpus']} logical), "
+        f"{hardware['available_memory_bytes'] / 2**30:.1f} GiB available memory, "
+        f"{len(hardware['gpus'])} GPUs"
+    )
+    
+    sentences = [sentence['sentence_text'] for sentence in synthetic_sentences(sample_size, seed=seed)]
+    # With a GPU, torch threads only drive tokenization and are left at their default
+    encoder_result = calibrate_encoder(
+        encoder, sentences, memory_budget, max_threads=None if hardware['gpus'] else n_cpus
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if not pdf_paths:
+            n_pdfs = min(max(8, 2 * n_cpus), 128)
+            pdf_paths = [pdf['local_path'] for pdf in write_synthetic_pdfs(Path(tmp_dir), n_pdfs, seed=seed)]
+        extractor_result = calibrate_extractor(pdf_paths, memory_budget, max_workers=n_cpus)
+    
+    profile = {
+        'version': PROFILE_VERSION,
+        'machine': machine_key(hardware),
+        'created': datetime.now(timezone.utc).isoformat(),
+        'hardware': hardware,
+        'memory_budget_bytes': memory_budget,
+        'encoder': encoder_result,
+        'extractor': extractor_result,
+        'settings': derive_settings(hardware, encoder_result, extractor_result, memory_budget),
+    }
+    path = save_profile(profile, tuning_dir)
+    logger.info(f"Saved tuning profile to {path}")
+    log_settings(profile['settings'])
+    return profile
+
+
+def log_settings(settings: Dict[str, Any]):
+    """
+    Log tuned settings.
+    
+    Args:
+        settings: 'settings' of a tuning profile
+    """
+    logger.info(
+        f"Tuned settings: encoder batch size {settings['encoder_batch_size']}, "
+        f"{settings['torch_threads'] or 'default'} torch threads, "
+        f"{settings['extract_workers']} extraction workers, "
+        f"{settings['cluster_jobs']} clustering workers, {settings['shard_workers']} shard processes"
+    )
+
+
+def main():
+    """Main entry point for auto-tuning."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    
+    parser = argparse.ArgumentParser(
+        description="Calibrate encoder batch size, torch threads and worker counts for this machine"
+    )
+    encoder_group = parser.add_mutually_exclusive_group()
+    encoder_group.add_argument(
+        '--model',
+        default=None,
+        help='Sentence transformer model to calibrate (default: the pipeline model)'
+    )
+    encoder_group.add_argument(
+        '--stub',
+        action='store_true',
+        help='Calibrate the hashing encoder instead (offline)'
+    )
+    parser.add_argument(
+        '--local',
+        action='append',
+        default=None,
+        metavar='PATH',
+        help='Calibrate extraction on PDFs from a directory, file or glob (default: synthetic PDFs)'
+    )
+    parser.add_argument(
+        '--max-pdfs',
+        type=int,
+        default=64,
+        help='Most --local PDFs used for calibration (default: 64)'
+    )
+    parser.add_argument(
+        '--sample-size',
+        type=int,
+        default=1024,
+        help='Sentences encoded per calibration pass (default: 1024)'
+    )
+    parser.add_argument(
+        '--tuning-dir',
+        default=DEFAULT_TUNING_DIR,
+        help=f'Directory of the per-machine tuning profiles (default: {DEFAULT_TUNING_DIR})'
+    )
+    parser.add_argument(
+        '--show',
+        action='store_true',
+        help="Show this machine's saved profile instead of calibrating"
+    )
+    args = parser.parse_args()
+    
+    if args.show:
+        profile = load_profile(args.tuning_dir)
+        if profile is None:
+            logger.error(f"No tuning profile for this machine in {args.tuning_dir}")
+            sys.exit(1)
+        print(json.dumps(profile['settings'], indent=2))
+        return
+    
+    if args.stub:
+        encoder = HashingEncoder()
+    else:
+        encoder = SentenceEncoder(args.model) if args.model else SentenceEncoder()
+    
+    pdf_paths = None
+    if args.local:
+        pdf_paths = [str(path) for path in islice(LocalPDFSource(args.local).iter_paths(), args.max_pdfs)]
+    autotune(encoder, pdf_paths=pdf_paths, tuning_dir=args.tuning_dir, sample_size=args.sample_size)
+
+
+if __name__ == "__main__":
+    main()